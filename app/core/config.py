@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +8,54 @@ class Settings(BaseSettings):
     postgres_db: str
     application_secret_key: str
 
+    # Кэш проверенных подписей параметров запуска VK
+    auth_cache_size: int = 10_000
+    auth_cache_ttl_seconds: int = 3600
+
+    # Сессионные токены, выдаваемые /auth
+    session_secret_key: Optional[str] = None  # По умолчанию выводится из application_secret_key
+    session_token_ttl_seconds: int = 24 * 3600
+
+    # VK API
+    vk_api_url: str = "https://api.vk.com/method"  # Можно направить на локальную заглушку
+    vk_api_version: str = "5.131"
+    vk_api_timeout_seconds: float = 5.0
+    vk_api_max_connections: int = 20
+    vk_group_cache_size: int = 10_000
+    vk_group_cache_ttl_seconds: int = 6 * 3600
+
+    # Справочники в памяти (бонусы, достижения): предел устаревания при изменениях из другого процесса
+    catalog_ttl_seconds: int = 300
+
+    # Массовое начисление достижений (/admin/achievements/grants): пользователей в одной транзакции
+    achievement_grant_chunk_size: int = 1000
+    achievement_grant_history_size: int = 100  # Сколько завершённых заданий хранить для просмотра
+
+    # Автоматическое начисление по условиям: сколько пар (пользователь, достижение) помнить
+    # как недоступные, чтобы не обращаться к базе на каждом клике после выполнения условия
+    achievement_rules_cache_size: int = 100_000
+    achievement_rules_cache_ttl_seconds: int = 3600
+
+    # Логирование: общий уровень и уровни отдельных логгеров, например LOG_LEVELS='{"economy": "WARNING"}'
+    log_level: str = "INFO"
+    log_levels: Dict[str, str] = {}
+    log_format: str = "text"  # "text" или "json" — одна JSON-строка на запись
+    # Доля записываемых событий log_event, например LOG_SAMPLE_RATES='{"clicker.click": 0.01}'
+    log_sample_rates: Dict[str, float] = {}
+
+    # Метрики в формате Prometheus на /metrics
+    metrics_enabled: bool = True
+
+    # Счётчики SQL на запрос: заголовки X-SQL-* в ответе и порог предупреждения о повторах (N+1)
+    sql_debug_headers: bool = False
+    sql_repeat_warning_threshold: int = 5
+
+    # Профилирование запросов (pyinstrument): по заголовку X-Profile от администратора или по доле запросов
+    profiling_sample_rate: float = 0.0
+    profiling_interval: float = 0.001  # Период выборки стека, секунды
+    profiling_max_concurrent: int = 2
+    profiling_max_files: int = 200
+
     class Config:
         env_file = ".env"
         
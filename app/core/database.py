@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.core.metrics import InstrumentedAsyncPool, pool_collector, registry
 
-engine: AsyncEngine = create_async_engine(settings.database_url)
+engine: AsyncEngine = create_async_engine(settings.database_url, poolclass=InstrumentedAsyncPool)
+registry.register_collector(pool_collector(lambda: engine.pool))
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
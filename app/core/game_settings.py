@@ -1,2 +1,17 @@
 AUTOCOLLECT_DEFAULT_DURATION_IN_MINUTES = 0
-AUTOCOLLECT_DEFAULT_RICE = 0
\ No newline at end of file
+AUTOCOLLECT_DEFAULT_RICE = 0
+
+# Отложенная запись кликов (write-behind)
+CLICK_FLUSH_INTERVAL_MS = 500  # Максимальная задержка записи накопленного риса в базу (мс)
+CLICK_FLUSH_MAX_CLICKS = 200  # Количество кликов, после которого накопитель сбрасывается досрочно
+
+
+# Пакетная отправка кликов
+RICE_PER_CLICK = 1  # Базовое количество риса за один клик (до применения бонусов)
+CLICKS_PER_SECOND_LIMIT = 20  # Максимум кликов, засчитываемых за одну секунду
+CLICK_BATCH_MAX_ITEMS = 600  # Максимум пачек в одном запросе
+CLICK_BATCH_MAX_AGE_SECONDS = 600  # Пачки старше этого возраста отклоняются
+CLICK_BATCH_CLOCK_SKEW_SECONDS = 5  # Допустимое опережение часов клиента
+
+# WebSocket-канал кликера
+CLICKER_WS_REFRESH_SECONDS = 10  # Период перечитывания пользователя и совхоза для рассылки изменений
@@ -1,24 +1,171 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any, Optional
+from app.core.config import settings
 
 # Путь для хранения логов
 LOG_DIR = Path(__file__).resolve().parent.parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+LOGGER_NAME = "SocialRating"
+
 # Создание обработчика для записи логов в файл
 file_handler = RotatingFileHandler(
     LOG_DIR / "app.log", maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
 )
+stream_handler = logging.StreamHandler()  # Для вывода в консоль
+
+
+
+class EventMessage:
+    """
+    Сообщение структурированного события: имя, типизированные поля и необязательный
+    текстовый шаблон. Строка собирается только при выводе записи.
+    """
+
+    __slots__ = ("event", "fields", "template")
+
+    def __init__(self, event: str, fields: dict[str, Any], template: Optional[str] = None):
+        self.event = event
+        self.fields = fields
+        self.template = template
+
+    def __str__(self) -> str:
+        if self.template:
+            return self.template % self.fields
+        return " ".join([self.event, *(f"{key}={value}" for key, value in self.fields.items())])
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись как один JSON-объект. Поля событий `log_event` выводятся на верхнем уровне.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, EventMessage):
+            payload["event"] = record.msg.event
+            payload.update(record.msg.fields)
+        else:
+            payload["message"] = record.getMessage()
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _EventQueueHandler(QueueHandler):
+    # События передаются в фоновый поток как есть, чтобы форматтер получил их поля
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, EventMessage):
+            return super().prepare(record)
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+if settings.log_format == "json":
+    formatter: logging.Formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+stream_handler.setFormatter(formatter)
+
+# Запись в файл и консоль выполняется в фоновом потоке: обработчики событийного цикла
+# только кладут запись в очередь и не блокируются на вводе-выводе
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+queue_listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+
+# В очередь попадает только текст сообщения, остальное оформляют обработчики фонового потока
+queue_handler = _EventQueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
 
 # Настройка логгера
 logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),  # Для вывода в консоль
-        file_handler,  # Для записи в файл
-    ],
+    level=settings.log_level.upper(),
+    handlers=[queue_handler],
 )
 
-logger = logging.getLogger("SocialRating")
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Возвращает дочерний логгер приложения, например `SocialRating.economy`.
+    Уровень каждого дочернего логгера задаётся настройкой `log_levels`.
+
+    :param name: Имя логгера относительно `SocialRating`.
+    :return: Логгер.
+    """
+    return logger.getChild(name)
+
+
+def configure_log_levels(levels: dict[str, str]) -> None:
+    """
+    Применяет уровни логирования к отдельным логгерам. Имена указываются относительно `SocialRating`.
+    """
+    for name, level in levels.items():
+        target = logger if name == LOGGER_NAME else get_logger(name)
+        target.setLevel(level.upper())
+
+
+def log_event(
+    target: logging.Logger,
+    event: str,
+    template: Optional[str] = None,
+    level: int = logging.INFO,
+    **fields: Any,
+) -> None:
+    """
+    Записывает структурированное событие с учётом доли выборки из `log_sample_rates`.
+    Предупреждения и ошибки записываются всегда.
+
+    :param target: Логгер.
+    :param event: Имя события, например `clicker.click`.
+    :param template: Шаблон текста для текстового режима, поля подставляются по имени (`%(user_id)s`).
+    :param level: Уровень записи.
+    :param fields: Поля события.
+    """
+    if not target.isEnabledFor(level):
+        return
+
+    if level < logging.WARNING:
+        rate = settings.log_sample_rates.get(event, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            fields["sample_rate"] = rate
+
+    target.log(level, EventMessage(event, fields, template))
+
+
+def start_logging() -> None:
+    if queue_listener._thread is None:
+        queue_listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Останавливает фоновый поток логирования, дописав все записи из очереди.
+    """
+    if queue_listener._thread is not None:
+        queue_listener.stop()
+
+
+configure_log_levels(settings.log_levels)
+start_logging()
+atexit.register(stop_logging)
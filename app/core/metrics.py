@@ -0,0 +1,249 @@
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Optional, Protocol
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Метрики хранятся в памяти процесса и обновляются только из событийного цикла,
+# поэтому обходятся без блокировок. Формат вывода — текстовый формат Prometheus 0.0.4.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, labels: tuple = (), value: float = 0) -> None:
+        self._values[labels] = value
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин. Наблюдение — один bisect и три сложения.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по корзинам (последняя — +Inf), сумма, количество]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class _SupportsStats(Protocol):
+    def stats(self) -> dict: ...
+
+
+class MetricsRegistry:
+    """
+    Набор метрик приложения и функций, снимающих значения в момент запроса /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+        self._caches: dict[str, _SupportsStats] = {}
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self._collectors.append(collector)
+
+    def register_cache(self, name: str, cache: _SupportsStats) -> None:
+        """
+        Регистрирует кэш, у которого есть метод `stats()` (счётчики hits/misses/size).
+        """
+        self._caches[name] = cache
+
+    def _render_caches(self) -> Iterable[str]:
+        gauges = {
+            "hits": ("cache_hits_total", "counter", "Попадания в кэш."),
+            "misses": ("cache_misses_total", "counter", "Промахи кэша."),
+            "size": ("cache_size", "gauge", "Количество записей в кэше."),
+            "hit_ratio": ("cache_hit_ratio", "gauge", "Доля попаданий в кэш."),
+            "version": ("cache_version", "gauge", "Версия справочника."),
+        }
+        stats = {name: cache.stats() for name, cache in self._caches.items()}
+        for key, (metric, kind, help) in gauges.items():
+            rows = [(name, values[key]) for name, values in stats.items() if key in values]
+            if not rows:
+                continue
+            yield f"# HELP {metric} {help}"
+            yield f"# TYPE {metric} {kind}"
+            for name, value in rows:
+                yield f'{metric}{{cache="{_escape(name)}"}} {_format_value(value)}'
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        lines.extend(self._render_caches())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.add(Histogram(
+    "http_request_duration_seconds", "Длительность обработки HTTP-запросов.", ("method", "route"),
+))
+http_requests_total = registry.add(Counter(
+    "http_requests_total", "Количество HTTP-запросов по статусам ответа.", ("method", "route", "status"),
+))
+http_requests_in_flight = registry.add(Gauge(
+    "http_requests_in_flight", "Количество обрабатываемых HTTP-запросов.",
+))
+db_pool_checkouts_total = registry.add(Counter(
+    "db_pool_checkouts_total", "Количество выдач соединений из пула.",
+))
+db_pool_wait_seconds = registry.add(Histogram(
+    "db_pool_wait_seconds", "Время ожидания соединения из пула.", buckets=POOL_WAIT_BUCKETS,
+))
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий время получения соединения (ожидание свободного или открытие нового).
+    """
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - started_at)
+            db_pool_checkouts_total.inc()
+
+
+def pool_collector(pool_getter: Callable[[], Any]) -> Callable[[], Iterable[str]]:
+    """
+    Возвращает функцию, снимающую текущее состояние пула соединений.
+    """
+
+    def collect() -> Iterable[str]:
+        pool = pool_getter()
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            return
+        for name, help, value in (
+            ("db_pool_size", "Размер пула соединений.", pool.size()),
+            ("db_pool_checked_out", "Соединения, выданные из пула.", pool.checkedout()),
+            ("db_pool_checked_in", "Свободные соединения в пуле.", pool.checkedin()),
+            ("db_pool_overflow", "Соединения сверх размера пула.", pool.overflow()),
+        ):
+            yield f"# HELP {name} {help}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {value}"
+
+    return collect
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, собирающее длительность, статусы и количество одновременных HTTP-запросов.
+    Маршрут берётся из шаблона пути (`/bonuses/{bonus_id}/purchase`), а не из фактического URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            http_requests_in_flight.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            http_request_duration.observe(elapsed, (method, route))
+            http_requests_total.inc((method, route, status_code))
+
+
+def route_template(scope) -> str:
+    # FastAPI записывает найденный маршрут в scope; для неизвестных путей используем общую метку,
+    # чтобы число рядов метрик не росло от произвольных URL
+    route: Optional[Any] = scope.get("route")
+    if route is not None:
+        return route.path
+    # Служебные маршруты Starlette (/docs, /openapi.json) не кладут route, но их пути статичны
+    if "endpoint" in scope:
+        return scope["path"]
+    return UNMATCHED_ROUTE
@@ -0,0 +1,142 @@
+import asyncio
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import route_template
+from app.models.user import UserRoles
+from app.utils.session_token import decode_session_token
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # Профилирование необязательно: без pyinstrument middleware ничего не делает
+    Profiler = None
+    SpeedscopeRenderer = None
+
+logger = get_logger("profiling")
+
+PROFILE_DIR = Path(__file__).resolve().parent.parent.parent / "profiles"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_HEADER = b"x-profile"
+
+# Имя файла профиля: время, метод, маршрут и случайный суффикс — без разделителей путей
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.speedscope\.json$")
+_ROUTE_SLUG = re.compile(r"[^\w]+")
+
+_active_profiles = 0
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    return None
+
+
+def _requested_by_admin(scope) -> bool:
+    # Заголовок учитывается только вместе с сессионным токеном администратора; проверка не требует базы
+    if not any(name == PROFILE_HEADER for name, _ in scope.get("headers", ())):
+        return False
+    token = _bearer_token(scope)
+    claims = decode_session_token(token) if token else None
+    return claims is not None and claims.role == UserRoles.admin.value
+
+
+def _should_profile(scope) -> bool:
+    if Profiler is None or _active_profiles >= settings.profiling_max_concurrent:
+        return False
+    if _requested_by_admin(scope):
+        return True
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+def _profile_name(scope) -> str:
+    route = _ROUTE_SLUG.sub("_", route_template(scope)).strip("_") or "root"
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    return f"{stamp}-{scope['method']}-{route}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+
+
+def _write_profile(name: str, profiler) -> None:
+    # Выполняется в отдельном потоке: отрисовка и запись профиля не задерживают событийный цикл
+    data = profiler.output(SpeedscopeRenderer())
+    PROFILE_DIR.mkdir(exist_ok=True)
+    (PROFILE_DIR / name).write_text(data, encoding="utf-8")
+
+    # Храним ограниченное число последних профилей
+    profiles = sorted(PROFILE_DIR.glob(f"*{PROFILE_SUFFIX}"), key=lambda path: path.stat().st_mtime)
+    for stale in profiles[:-settings.profiling_max_files]:
+        stale.unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict]:
+    """
+    Возвращает сохранённые профили, начиная с самых новых.
+    """
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = sorted(PROFILE_DIR.glob(f"*{PROFILE_SUFFIX}"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return [
+        {"name": path.name, "size": path.stat().st_size, "created_at": path.stat().st_mtime}
+        for path in profiles
+    ]
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """
+    Возвращает путь к профилю по имени или None, если имя недопустимо или файла нет.
+    """
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware, снимающее профиль отдельного запроса с помощью pyinstrument.
+
+    Профилируется запрос администратора с заголовком `X-Profile` или случайная доля запросов
+    (`profiling_sample_rate`). Профиль в асинхронном режиме учитывает время ожидания
+    (запросы к базе, внешние вызовы), сохраняется в формате speedscope в каталог `profiles`,
+    а его имя возвращается в заголовке `X-Profile-Id`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        global _active_profiles
+        _active_profiles += 1
+        profile_id: Optional[str] = None
+
+        async def send_wrapper(message):
+            nonlocal profile_id
+            if message["type"] == "http.response.start":
+                # Маршрут к этому моменту уже известен
+                profile_id = _profile_name(scope)
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = Profiler(interval=settings.profiling_interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _active_profiles -= 1
+            name = profile_id or _profile_name(scope)
+            try:
+                await asyncio.to_thread(_write_profile, name, profiler)
+                logger.info("Сохранён профиль запроса %s %s: %s", scope["method"], scope["path"], name)
+            except Exception as e:
+                logger.error("Не удалось сохранить профиль запроса %s: %s", scope["path"], e)
@@ -0,0 +1,177 @@
+import logging
+import re
+import time
+from collections import Counter as ShapeCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logger import get_logger, log_event
+from app.core.metrics import Counter, Histogram, registry, route_template
+
+logger = get_logger("sql")
+
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+db_statements_per_request = registry.add(Histogram(
+    "db_statements_per_request", "Количество SQL-запросов на HTTP-запрос.", ("route",), buckets=STATEMENT_BUCKETS,
+))
+db_time_per_request = registry.add(Histogram(
+    "db_time_per_request_seconds", "Суммарное время SQL-запросов на HTTP-запрос.", ("route",),
+))
+db_commits_total = registry.add(Counter(
+    "db_commits_total", "Количество COMMIT по маршрутам.", ("route",),
+))
+db_repeated_statements_total = registry.add(Counter(
+    "db_repeated_statements_total", "Запросы, в которых одна форма SQL повторилась больше порога.", ("route",),
+))
+
+# Списки параметров IN (...) разной длины считаются одной формой запроса
+_IN_PARAMS = re.compile(r"\((?:\$\d+|%\(\w+\)s|\?)(?:,\s*(?:\$\d+|%\(\w+\)s|\?))*\)")
+
+
+@dataclass
+class StatementStats:
+    """
+    Счётчики SQL, выполненных внутри `track_statements()`.
+    """
+    statements: int = 0
+    commits: int = 0
+    db_time: float = 0.0  # Секунды
+    shapes: ShapeCounter = field(default_factory=ShapeCounter)
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Возвращает формы запросов, повторившиеся больше `threshold` раз.
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+# Стек активных счётчиков: вложенный track_statements() не скрывает запросы от внешнего
+_active_stats: ContextVar[tuple[StatementStats, ...]] = ContextVar("sql_statement_stats", default=())
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_PARAMS.sub("(...)", statement)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    active = _active_stats.get()
+    if not active:
+        return
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+    shape = statement_shape(statement)
+    for stats in active:
+        stats.statements += 1
+        stats.shapes[shape] += 1
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    active = _active_stats.get()
+    started = conn.info.get("query_started_at")
+    if not active or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in active:
+        stats.db_time += elapsed
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _drop_failed_statement(exception_context):
+    # after_cursor_execute не вызывается для упавших запросов
+    conn = exception_context.connection
+    started = conn.info.get("query_started_at") if conn is not None else None
+    if started:
+        started.pop()
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def _count_commit(conn):
+    for stats in _active_stats.get():
+        stats.commits += 1
+
+
+@contextmanager
+def track_statements() -> Iterator[StatementStats]:
+    """
+    Считает SQL-запросы, время в базе и COMMIT, выполненные в текущем контексте (задаче asyncio).
+
+    Пример:
+        with track_statements() as stats:
+            await handle_authentication(...)
+        logger.info("%s запросов, %s COMMIT", stats.statements, stats.commits)
+    """
+    stats = StatementStats()
+    token = _active_stats.set((*_active_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+class SqlStatsMiddleware:
+    """
+    ASGI-middleware, считающее SQL-запросы каждого HTTP-запроса.
+
+    Итоги попадают в метрики, при повторе одной формы запроса больше `sql_repeat_warning_threshold`
+    раз пишется предупреждение, а при `sql_debug_headers` счётчики добавляются в заголовки ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_statements() as stats:
+            if settings.sql_debug_headers:
+                async def send_wrapper(message):
+                    if message["type"] == "http.response.start":
+                        message.setdefault("headers", [])
+                        message["headers"] = [*message["headers"], *_debug_headers(stats)]
+                    await send(message)
+            else:
+                send_wrapper = send
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _record(scope, stats)
+
+
+def _debug_headers(stats: StatementStats) -> list[tuple[bytes, bytes]]:
+    return [
+        (b"x-sql-statements", str(stats.statements).encode()),
+        (b"x-sql-commits", str(stats.commits).encode()),
+        (b"x-sql-time-ms", f"{stats.db_time * 1000:.3f}".encode()),
+    ]
+
+
+def _record(scope, stats: StatementStats) -> None:
+    route = route_template(scope)
+    db_statements_per_request.observe(stats.statements, (route,))
+    if stats.statements:
+        db_time_per_request.observe(stats.db_time, (route,))
+    if stats.commits:
+        db_commits_total.inc((route,), stats.commits)
+
+    repeated = stats.repeated_shapes(settings.sql_repeat_warning_threshold)
+    if repeated:
+        db_repeated_statements_total.inc((route,))
+        for shape, count in repeated:
+            log_event(
+                logger, "sql.repeated_statement",
+                "Возможный N+1 в %(method)s %(route)s: запрос повторён %(count)s раз: %(statement)s",
+                level=logging.WARNING,
+                method=scope["method"],
+                route=route,
+                count=count,
+                statement=shape[:500],
+            )
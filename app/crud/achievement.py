@@ -1,11 +1,33 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import load_only
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from app.core.config import settings
+from app.core.metrics import registry
 from app.models.achievement import Achievement, AchievementType, UserAchievement
+from app.crud.bulk import upsert_by_key
+from app.core.logger import logger
 from app.schemas.achievement import AchievementCreate, AchievementRead, AchievementUpdate
-from typing import Optional
-from sqlalchemy.orm import selectinload
+from app.schemas.catalog import CatalogImportResult
+from app.services.progression import next_eligible_at
+from app.utils.catalog import Catalog
+from typing import Optional, Sequence
+
+
+async def _load_achievements(session: AsyncSession) -> list[AchievementRead]:
+    result = await session.execute(select(Achievement).order_by(Achievement.id))
+    return [AchievementRead.model_validate(achievement) for achievement in result.scalars().all()]
+
+
+# Справочник достижений с индексами по ID и по типу; сбрасывается при изменениях через /achievements/crud
+achievement_catalog: Catalog[AchievementRead] = Catalog(
+    "achievements",
+    _load_achievements,
+    group_by=lambda achievement: achievement.type,
+    ttl=settings.catalog_ttl_seconds,
+)
+registry.register_cache("achievement_catalog", achievement_catalog)
 
 
 async def create_achievement(session: AsyncSession, achievement_data: AchievementCreate) -> AchievementRead:
@@ -19,6 +41,7 @@ async def create_achievement(session: AsyncSession, achievement_data: Achievemen
     new_achievement = Achievement(**achievement_data.model_dump())
     session.add(new_achievement)
     await session.commit()
+    achievement_catalog.invalidate()
     await session.refresh(new_achievement)
     return AchievementRead.model_validate(new_achievement)
 
@@ -31,26 +54,7 @@ async def get_achievement(session: AsyncSession, achievement_id: int) -> Optiona
     :param achievement_id: ID достижения.
     :return: Сериализованный объект достижения или None.
     """
-    result = await session.execute(
-        select(Achievement)
-        .options(load_only(
-            Achievement.id,
-            Achievement.name,
-            Achievement.description,
-            Achievement.condition,
-            Achievement.visual,
-            Achievement.is_active,
-            Achievement.type,
-            Achievement.social_rating_bonus,
-            Achievement.rice_production_bonus,
-            Achievement.autocollect_duration_bonus
-        ))
-        .where(Achievement.id == achievement_id)
-    )
-    achievement = result.scalar_one_or_none()
-    if achievement:
-        return AchievementRead.model_validate(achievement)
-    return None
+    return await achievement_catalog.get(session, achievement_id)
 
 
 async def update_achievement(session: AsyncSession, achievement_id: int, updates: AchievementUpdate) -> Optional[AchievementRead]:
@@ -72,6 +76,7 @@ async def update_achievement(session: AsyncSession, achievement_id: int, updates
         setattr(achievement, key, value)
 
     await session.commit()
+    achievement_catalog.invalidate()
     await session.refresh(achievement)
     return AchievementRead.model_validate(achievement)
 
@@ -91,9 +96,32 @@ async def delete_achievement(session: AsyncSession, achievement_id: int) -> bool
 
     await session.delete(achievement)
     await session.commit()
+    achievement_catalog.invalidate()
     return True
 
 
+async def import_achievements(session: AsyncSession, achievements: Sequence[AchievementCreate]) -> CatalogImportResult:
+    """
+    Массово добавляет и обновляет достижения по названию одной транзакцией.
+    Справочник в памяти перезагружается один раз после фиксации.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param achievements: Достижения для импорта.
+    :return: Списки добавленных, изменённых и неизменённых достижений.
+    :raises ValueError: Если названия достижений повторяются.
+    """
+    result = await upsert_by_key(session, Achievement, [achievement.model_dump() for achievement in achievements])
+    await session.commit()
+
+    achievement_catalog.invalidate()
+    snapshot = await achievement_catalog.load(session)
+    logger.info(
+        "Импорт достижений: добавлено %s, обновлено %s, без изменений %s.",
+        len(result.created), len(result.updated), len(result.unchanged),
+    )
+    return CatalogImportResult(**result._asdict(), catalog_version=snapshot.version)
+
+
 async def get_user_achievement(session: AsyncSession, user_id: int, achievement_id: int) -> Optional[UserAchievement]:
     """
     Получить достижение пользователя.
@@ -106,38 +134,104 @@ async def get_user_achievement(session: AsyncSession, user_id: int, achievement_
     return result.scalar_one_or_none()
 
 
-async def can_assign_achievement(session: AsyncSession, user_id: int, achievement: Achievement) -> bool:
-    """
-    Проверяет, можно ли начислить достижение пользователю.
+async def upsert_user_achievement(session: AsyncSession, user_id: int, achievement: AchievementRead, now: datetime) -> Optional[Row]:
     """
-    user_achievement = await get_user_achievement(session, user_id, achievement.id)
+    Начисляет достижение одним `INSERT ... ON CONFLICT (user_id, achievement_id) DO UPDATE ... WHERE`:
+    новая запись создаётся, у существующей увеличивается прогресс, только если наступил
+    `next_eligible_at`. Проверка и запись выполняются атомарно, поэтому параллельные
+    запросы не начислят достижение дважды. Транзакцию не фиксирует.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param achievement: Достижение из справочника.
+    :param now: Время начисления (UTC).
+    :return: Строка (progress, is_completed, last_updated, next_eligible_at) или None,
+        если достижение сейчас недоступно.
+    """
+    statement = insert(UserAchievement).values(
+        user_id=user_id,
+        achievement_id=achievement.id,
+        is_completed=True,
+        last_updated=now,
+        next_eligible_at=next_eligible_at(achievement.type, now),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserAchievement.user_id, UserAchievement.achievement_id],
+        set_={
+            "progress": UserAchievement.progress + 1,
+            "last_updated": statement.excluded.last_updated,
+            "next_eligible_at": statement.excluded.next_eligible_at,
+        },
+        # Для уникальных достижений next_eligible_at IS NULL, и условие никогда не выполняется
+        where=UserAchievement.next_eligible_at <= now,
+    )
+
+    result = await session.execute(
+        statement.returning(
+            UserAchievement.progress,
+            UserAchievement.is_completed,
+            UserAchievement.last_updated,
+            UserAchievement.next_eligible_at,
+        )
+    )
+    return result.one_or_none()
 
-    if not user_achievement:
-        return True  # Если пользователь еще не имеет достижения, можно начислить.
 
-    now = datetime.now(timezone.utc)
+async def get_unavailable_achievement_ids(session: AsyncSession, user_id: int, now: datetime) -> set[int]:
+    """
+    Возвращает ID достижений, которые пользователь сейчас получить не может: уникальные,
+    уже полученные, и периодические, у которых не наступил `next_eligible_at`.
+    Один запрос по индексу (user_id, next_eligible_at).
 
-    if achievement.type == AchievementType.UNIQUE:
-        return False  # Уникальное достижение нельзя получить больше одного раза.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param now: Текущее время (UTC).
+    :return: Множество ID достижений.
+    """
+    result = await session.execute(
+        select(UserAchievement.achievement_id).where(
+            UserAchievement.user_id == user_id,
+            or_(UserAchievement.next_eligible_at.is_(None), UserAchievement.next_eligible_at > now),
+        )
+    )
+    return set(result.scalars().all())
 
-    if achievement.type == AchievementType.DAYLY:
-        return user_achievement.last_updated.date() < now.date()  # Проверка на ежедневное
 
-    if achievement.type == AchievementType.WEEKLY:
-        return user_achievement.last_updated < (now - timedelta(days=7))  # Проверка на еженедельное
+async def get_claimable_achievements(session: AsyncSession, user_id: int) -> list[AchievementRead]:
+    """
+    Возвращает активные достижения, которые пользователь может получить прямо сейчас.
 
-    return True
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :return: Список достижений в порядке справочника.
+    """
+    unavailable = await get_unavailable_achievement_ids(session, user_id, datetime.now(timezone.utc))
+    return [
+        achievement
+        for achievement in await achievement_catalog.all(session)
+        if achievement.is_active and achievement.id not in unavailable
+    ]
 
 
-async def get_all_achievements(session: AsyncSession) -> list[Achievement]:
+async def get_all_achievements(session: AsyncSession) -> list[AchievementRead]:
     """
     Возвращает список всех доступных достижений.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :return: Список достижений.
     """
-    result = await session.execute(select(Achievement))
-    return result.scalars().all()
+    return await achievement_catalog.all(session)
+
+
+async def get_achievements_by_type(session: AsyncSession, achievement_type: AchievementType) -> list[AchievementRead]:
+    """
+    Возвращает достижения указанного типа из справочника.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param achievement_type: Тип достижения.
+    :return: Список достижений.
+    """
+    return await achievement_catalog.group(session, achievement_type)
 
 
 async def get_user_achievements(session: AsyncSession, user_id: int) -> list[UserAchievement]:
@@ -146,11 +240,7 @@ async def get_user_achievements(session: AsyncSession, user_id: int) -> list[Use
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param user_id: Идентификатор пользователя.
-    :return: Список объектов UserAchievement.
+    :return: Список объектов UserAchievement (без загрузки связанных достижений).
     """
-    result = await session.execute(
-        select(UserAchievement)
-        .where(UserAchievement.user_id == user_id)
-        .options(selectinload(UserAchievement.achievement))
-    )
+    result = await session.execute(select(UserAchievement).where(UserAchievement.user_id == user_id))
     return result.scalars().all()
\ No newline at end of file
@@ -1,12 +1,42 @@
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.core.config import settings
+from app.core.metrics import registry
 from app.models.bonus import PurchasableBonus, UserBonus
 from app.models.user import User
+from app.crud.bulk import upsert_by_key
 from app.schemas.bonus import BonusCreate, BonusRead, BonusUpdate
-from typing import Optional, List
+from app.schemas.catalog import CatalogImportResult
+from app.utils.catalog import Catalog
+from typing import Optional, List, Sequence
 from app.core.logger import logger
 
 
+async def _load_purchasable_bonuses(session: AsyncSession) -> List[BonusRead]:
+    result = await session.execute(select(PurchasableBonus).order_by(PurchasableBonus.id))
+    return [BonusRead.model_validate(bonus) for bonus in result.scalars().all()]
+
+
+def _serialize_bonus_list(bonuses: Sequence[BonusRead]) -> bytes:
+    # Тело ответа /bonuses/all/bonuses собирается один раз на версию справочника
+    return json.dumps(
+        {"bonuses": [bonus.model_dump(mode="json") for bonus in bonuses]},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+# Справочник покупаемых бонусов: загружается при старте и сбрасывается при изменениях через CRUD
+bonus_catalog: Catalog[BonusRead] = Catalog(
+    "purchasable_bonuses",
+    _load_purchasable_bonuses,
+    serializer=_serialize_bonus_list,
+    ttl=settings.catalog_ttl_seconds,
+)
+registry.register_cache("bonus_catalog", bonus_catalog)
+
+
 async def create_purchasable_bonus(session: AsyncSession, bonus_data: BonusCreate) -> BonusRead:
     """
     Асинхронное создание нового покупаемого бонуса.
@@ -32,6 +62,7 @@ async def create_purchasable_bonus(session: AsyncSession, bonus_data: BonusCreat
 
     session.add(new_bonus)  # Добавляем объект в сессию
     await session.commit()  # Фиксируем изменения
+    bonus_catalog.invalidate()
     await session.refresh(new_bonus)  # Обновляем объект, чтобы получить его актуальное состояние из базы
 
     return BonusRead.model_validate(new_bonus)  # Возвращаем сериализованный объект
@@ -45,9 +76,7 @@ async def get_purchasable_bonus(session: AsyncSession, bonus_id: int) -> Optiona
     :param bonus_id: ID бонуса.
     :return: Сериализованный объект бонуса или None.
     """
-    result = await session.execute(select(PurchasableBonus).where(PurchasableBonus.id == bonus_id))
-    bonus = result.scalar_one_or_none()
-    return BonusRead.model_validate(bonus) if bonus else None
+    return await bonus_catalog.get(session, bonus_id)
 
 
 async def update_purchasable_bonus(session: AsyncSession, bonus_id: int, updates: BonusUpdate) -> Optional[BonusRead]:
@@ -69,6 +98,7 @@ async def update_purchasable_bonus(session: AsyncSession, bonus_id: int, updates
         setattr(bonus, key, value)
 
     await session.commit()
+    bonus_catalog.invalidate()
     await session.refresh(bonus)
     return BonusRead.model_validate(bonus)
 
@@ -88,9 +118,32 @@ async def delete_purchasable_bonus(session: AsyncSession, bonus_id: int) -> bool
 
     await session.delete(bonus)
     await session.commit()
+    bonus_catalog.invalidate()
     return True
 
 
+async def import_purchasable_bonuses(session: AsyncSession, bonuses: Sequence[BonusCreate]) -> CatalogImportResult:
+    """
+    Массово добавляет и обновляет покупаемые бонусы по названию одной транзакцией.
+    Справочник в памяти перезагружается один раз после фиксации.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param bonuses: Бонусы для импорта.
+    :return: Списки добавленных, изменённых и неизменённых бонусов.
+    :raises ValueError: Если названия бонусов повторяются.
+    """
+    result = await upsert_by_key(session, PurchasableBonus, [bonus.model_dump() for bonus in bonuses])
+    await session.commit()
+
+    bonus_catalog.invalidate()
+    snapshot = await bonus_catalog.load(session)
+    logger.info(
+        "Импорт бонусов: добавлено %s, обновлено %s, без изменений %s.",
+        len(result.created), len(result.updated), len(result.unchanged),
+    )
+    return CatalogImportResult(**result._asdict(), catalog_version=snapshot.version)
+
+
 async def get_user_bonuses(session: AsyncSession, user_id: int) -> List[UserBonus]:
     """
     Получает список бонусов, связанных с пользователем.
@@ -144,8 +197,7 @@ async def get_all_bonuses(session: AsyncSession) -> List[BonusRead]:
     :param session: Асинхронная сессия SQLAlchemy.
     :return: Список всех бонусов.
     """
-    result = await session.execute(select(PurchasableBonus))
-    return [BonusRead.model_validate(bonus) for bonus in result.scalars().all()]
+    return await bonus_catalog.all(session)
 
 
 async def get_user_bonus(session: AsyncSession, user_id: int, bonus_id: int) -> Optional[UserBonus]:
@@ -0,0 +1,62 @@
+from collections import Counter
+from typing import Any, NamedTuple, Sequence
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Строк в одном INSERT: asyncpg ограничивает число параметров запроса 32767
+UPSERT_CHUNK_SIZE = 1000
+
+
+class UpsertResult(NamedTuple):
+    """
+    Итог массовой вставки: ключи добавленных, изменённых и совпавших с базой строк.
+    """
+    created: list
+    updated: list
+    unchanged: list
+
+
+async def upsert_by_key(session: AsyncSession, model, rows: Sequence[dict[str, Any]], key: str = "name") -> UpsertResult:
+    """
+    Вставляет или обновляет строки одним `INSERT ... ON CONFLICT (key) DO UPDATE` на пачку.
+    Строки, не отличающиеся от сохранённых, не перезаписываются. Транзакцию не фиксирует.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param model: ORM-модель с уникальным столбцом `key`.
+    :param rows: Значения столбцов; у всех строк одинаковый набор ключей.
+    :param key: Уникальный столбец, по которому ищется существующая строка.
+    :return: Ключи добавленных, обновлённых и неизменённых строк в порядке входных данных.
+    :raises ValueError: Если значение ключа повторяется во входных данных.
+    """
+    keys = [row[key] for row in rows]
+    duplicates = [value for value, count in Counter(keys).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Повторяющиеся значения {key}: {', '.join(map(str, duplicates))}")
+    if not rows:
+        return UpsertResult([], [], [])
+
+    table = model.__table__
+    columns = [column for column in rows[0] if column != key]
+    inserted: dict[Any, bool] = {}
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        statement = insert(table).values(list(rows[start:start + UPSERT_CHUNK_SIZE]))
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[key]],
+            set_={column: statement.excluded[column] for column in columns},
+            # Совпадающие строки пропускаются и не попадают в RETURNING
+            where=or_(*(table.c[column].is_distinct_from(statement.excluded[column]) for column in columns)),
+        ).returning(
+            table.c[key],
+            # xmax = 0 только у только что вставленной версии строки
+            literal_column("(xmax = 0)").label("inserted"),
+        )
+        result = await session.execute(statement)
+        inserted.update((row[0], row[1]) for row in result.all())
+
+    return UpsertResult(
+        created=[value for value in keys if inserted.get(value) is True],
+        updated=[value for value in keys if inserted.get(value) is False],
+        unchanged=[value for value in keys if value not in inserted],
+    )
@@ -1,20 +1,36 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.collective import Collective, CollectiveType, collective_factory
+from sqlalchemy import select, update
+from app.models.collective import Collective, CollectiveType
 from app.schemas.collective import CollectiveCreate, CollectiveRead, CollectiveUpdate
-from typing import Optional
+from app.services.progression import collective_required_rating, next_collective_type
+from typing import NamedTuple, Optional
 from fastapi import HTTPException
 
-async def create_collective(session: AsyncSession, collective_data: CollectiveCreate) -> CollectiveRead:
+
+class CollectiveRating(NamedTuple):
+    """
+    Облегчённый результат атомарного изменения рейтинга коллектива.
+    """
+    id: int
+    social_rating: int
+    type: CollectiveType
+
+
+async def create_collective(session: AsyncSession, collective_data: CollectiveCreate, commit: bool = True) -> CollectiveRead:
     """
     Асинхронное создание нового коллектива.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param collective_data: Данные для создания коллектива.
+    :param commit: Фиксировать ли транзакцию. При `False` выполняется только flush.
     :return: Данные созданного коллектива.
     """
     new_collective = Collective(**collective_data.model_dump())
     session.add(new_collective)
+    if not commit:
+        await session.flush()
+        return new_collective
+
     await session.commit()
     await session.refresh(new_collective)
 
@@ -92,18 +108,38 @@ async def get_collective_members(session: AsyncSession, collective_id: int, limi
     return result.scalars().all()
 
 
-async def update_collective_rating(session: AsyncSession, collective_id: int, rating_to_add: int) -> int:
+async def increment_collective_rating(session: AsyncSession, collective_id: int, delta: int, commit: bool = True) -> Optional[CollectiveRating]:
+    """
+    Атомарно изменяет социальный рейтинг коллектива одним UPDATE ... RETURNING.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param collective_id: ID коллектива.
+    :param delta: Изменение рейтинга (может быть отрицательным).
+    :param commit: Фиксировать ли транзакцию.
+    :return: Новые значения рейтинга и типа или None, если коллектив не найден.
+    """
+    result = await session.execute(
+        update(Collective)
+        .where(Collective.id == collective_id)
+        .values(social_rating=Collective.social_rating + delta)
+        .returning(Collective.id, Collective.social_rating, Collective.type)
+    )
+    row = result.one_or_none()
+    if commit:
+        await session.commit()
+    return CollectiveRating(*row) if row else None
+
+
+async def update_collective_rating(session: AsyncSession, collective_id: int, rating_to_add: int) -> CollectiveRating:
     """
     Обновляет социальный рейтинг коллектива.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param collective_id: ID коллектива.
     :param rating_to_add: Количество рейтинга для добавления.
-    :return: Обновленный общий рейтинг коллектива.
+    :return: Обновленный рейтинг и текущий тип коллектива.
     """
-    # Получаем коллектив по ID
-    result = await session.execute(select(Collective).where(Collective.id == collective_id))
-    collective = result.scalar_one_or_none()
+    collective = await increment_collective_rating(session, collective_id, rating_to_add)
 
     if not collective:
         raise HTTPException(
@@ -111,16 +147,24 @@ async def update_collective_rating(session: AsyncSession, collective_id: int, ra
             detail=f"Collective with ID {collective_id} not found."
         )
 
-    # Увеличиваем социальный рейтинг
-    collective.social_rating += rating_to_add
+    return collective
+
 
-    # Сохраняем изменения
-    session.add(collective)
+async def set_collective_type(session: AsyncSession, collective_id: int, new_type: CollectiveType) -> None:
+    """
+    Устанавливает тип коллектива без предварительной загрузки строки.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param collective_id: ID коллектива.
+    :param new_type: Новый тип коллектива.
+    """
+    await session.execute(
+        update(Collective)
+        .where(Collective.id == collective_id)
+        .values(type=new_type)
+    )
     await session.commit()
-    await session.refresh(collective)
 
-    return collective.social_rating\
-    
 
 async def update_collective_level(session: AsyncSession, collective: Collective) -> Collective:
     """
@@ -130,19 +174,10 @@ async def update_collective_level(session: AsyncSession, collective: Collective)
     :param collective: Объект текущего коллектива.
     :return: Обновленный объект коллектива.
     """
-    current_type = collective.type
-    types = list(CollectiveType)
-    current_index = types.index(current_type)
-
     # Проверяем, можно ли перейти на следующий уровень
-    if current_index + 1 < len(types):
-        next_type = types[current_index + 1]
-        next_bonuses = collective_factory(next_type)
-
-        if "required_rating" not in next_bonuses:
-            raise ValueError(f"Не найден required_rating для {next_type.value}")
-
-        if collective.social_rating >= next_bonuses["required_rating"]:  # Проверяем рейтинг
+    next_type = next_collective_type(collective.type)
+    if next_type is not None:
+        if collective.social_rating >= collective_required_rating(next_type):  # Проверяем рейтинг
             collective.type = next_type
             session.add(collective)
             await session.commit()
@@ -1,8 +1,26 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.user import User
+from sqlalchemy import Row, select, update
+from app.models.user import CoreType, User, UserRoles
 from app.schemas.user import UserCreate, UserRead, UserUpdate
-from typing import Optional
+from typing import NamedTuple, Optional
+
+
+class UserBalance(NamedTuple):
+    """
+    Облегчённый результат атомарного обновления счётчиков пользователя.
+    """
+    id: int
+    rice: int
+    social_rating: int
+    current_core: CoreType
+    collective_id: Optional[int]
+    clicks: int
+    invited_users: int  # Вместе с clicks нужны для условий достижений
+
+
+_BALANCE_COLUMNS = (
+    User.id, User.rice, User.social_rating, User.current_core, User.collective_id, User.clicks, User.invited_users,
+)
 
 
 async def create_user(session: AsyncSession, user_data: UserCreate) -> UserRead:
@@ -100,48 +118,84 @@ async def get_user_by_vk_id(session: AsyncSession, vk_id: str) -> Optional[UserR
     return UserRead.model_validate(user) if user else None
 
 
-async def update_user_rice_and_rating(session: AsyncSession, user_id: int, rice_to_deduct: int, rating_to_add: int) -> Optional[UserRead]:
+async def get_user_identity_by_vk_id(session: AsyncSession, vk_id: str) -> Optional[Row]:
     """
-    Обновляет количество риса и социальный рейтинг пользователя.
+    Возвращает только ID, коллектив и роль пользователя по VK ID, не загружая строку целиком.
 
     :param session: Асинхронная сессия SQLAlchemy.
-    :param user_id: ID пользователя.
-    :param rice_to_deduct: Количество риса для вычитания.
-    :param rating_to_add: Количество рейтинга для добавления.
-    :return: Сериализованный объект обновленного пользователя или None.
+    :param vk_id: VK ID пользователя.
+    :return: Строка с полями id, collective_id, role или None.
     """
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        return None
-
-    user.rice -= rice_to_deduct
-    user.social_rating += rating_to_add
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return UserRead.model_validate(user)
+    result = await session.execute(
+        select(User.id, User.collective_id, User.role).where(User.vk_id == vk_id)
+    )
+    return result.one_or_none()
 
 
-async def update_user_rice(session: AsyncSession, user_id: int, rice_to_add: int) -> Optional[UserRead]:
+async def get_user_role(session: AsyncSession, user_id: int) -> Optional[UserRoles]:
     """
-    Обновляет количество риса у пользователя.
+    Возвращает текущую роль пользователя из базы.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param user_id: ID пользователя.
-    :param rice_to_add: Количество риса для добавления.
-    :return: Сериализованный объект обновленного пользователя или None.
+    :return: Роль или None, если пользователь не найден.
     """
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        return None
+    result = await session.execute(select(User.role).where(User.id == user_id))
+    return result.scalar_one_or_none()
 
-    user.rice += rice_to_add
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return UserRead.model_validate(user)
+
+async def update_user_rice_and_rating(
+    session: AsyncSession, user_id: int, rice_to_deduct: int, rating_to_add: int, commit: bool = True
+) -> Optional[UserBalance]:
+    """
+    Атомарно списывает рис и начисляет социальный рейтинг одним UPDATE ... RETURNING.
+    Списание не выполняется, если риса у пользователя недостаточно.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param rice_to_deduct: Количество риса для вычитания.
+    :param rating_to_add: Количество рейтинга для добавления.
+    :param commit: Фиксировать ли транзакцию.
+    :return: Новые значения счётчиков или None, если пользователь не найден или риса не хватает.
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id, User.rice >= rice_to_deduct)
+        .values(
+            rice=User.rice - rice_to_deduct,
+            social_rating=User.social_rating + rating_to_add,
+        )
+        .returning(*_BALANCE_COLUMNS)
+    )
+    row = result.one_or_none()
+    if commit:
+        await session.commit()
+    return UserBalance(*row) if row else None
+
+
+async def update_user_rice(
+    session: AsyncSession, user_id: int, rice_to_add: int, clicks_to_add: int = 0, commit: bool = True
+) -> Optional[UserBalance]:
+    """
+    Атомарно добавляет рис (и клики) пользователю одним UPDATE ... RETURNING.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param rice_to_add: Количество риса для добавления.
+    :param clicks_to_add: Количество кликов для добавления.
+    :param commit: Фиксировать ли транзакцию.
+    :return: Новые значения счётчиков или None, если пользователь не найден.
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(rice=User.rice + rice_to_add, clicks=User.clicks + clicks_to_add)
+        .returning(*_BALANCE_COLUMNS)
+    )
+    row = result.one_or_none()
+    if commit:
+        await session.commit()
+    return UserBalance(*row) if row else None
 
 
 async def update_user_collective(session: AsyncSession, vk_id: str, collective_id: int) -> User:
@@ -3,7 +3,9 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from app.core.database import engine, Base
+from app.core.database import SessionLocal, engine
+from app.crud.achievement import achievement_catalog
+from app.crud.bonus import bonus_catalog
 from app.models import achievement, bonus, collective, user
 from app.routers.auth import router as auth_router
 from app.routers.crud_endpoint_achievement import router as achievement_router_crud
@@ -13,19 +15,43 @@ from app.routers.crud_endpoint_user import router as user_router_crud
 from app.routers.clicker import router as clicker
 from app.routers.bonus import router as bonus_router
 from app.routers.achievement import router as achievement_router
+from app.routers.achievement_grant import router as achievement_grant_router
 from app.routers.all_bonus import router as all_bonus_router
 from app.routers.user import router as user_router
+from app.routers.metrics import router as metrics_router
+from app.routers.profiling import router as profiling_router
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.sql_stats import SqlStatsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.services.achievement_grant_service import achievement_grant_jobs
+from app.services.click_accumulator import click_accumulator
+from app.utils.vk_api import close_vk_client, open_vk_client
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    # Схемой владеют миграции (alembic upgrade head выполняется до запуска воркеров)
+    async with SessionLocal() as session:
+        await bonus_catalog.load(session)
+        await achievement_catalog.load(session)
+    await open_vk_client()
+    click_accumulator.start()
     yield
-    await engine.dispose()
+    try:
+        # Гарантированно записываем накопленные клики до закрытия пула соединений
+        await click_accumulator.stop()
+        await achievement_grant_jobs.stop()
+    finally:
+        await close_vk_client()
+        await engine.dispose()
 
 app = FastAPI(lifespan=lifespan, swagger_ui_parameters={"syntaxHighlight.theme": "obsidian"}, debug=True)
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(SqlStatsMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # origins = [
 #     "https://*.vercel.app",
 #     "https://*.wormhole.vk-apps.com",
@@ -60,5 +86,9 @@ app.include_router(achievement_router_crud)
 app.include_router(clicker)
 app.include_router(bonus_router)
 app.include_router(achievement_router)
+app.include_router(achievement_grant_router)
 app.include_router(all_bonus_router)
-app.include_router(user_router)
\ No newline at end of file
+app.include_router(user_router)
+app.include_router(profiling_router)
+if settings.metrics_enabled:
+    app.include_router(metrics_router)
\ No newline at end of file
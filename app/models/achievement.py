@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Text, Boolean, ForeignKey, Enum, DateTime, Float
+from sqlalchemy import Integer, String, Text, Boolean, ForeignKey, Enum, DateTime, Float, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 from datetime import datetime, timezone
+from typing import Optional
 import enum
 
 class AchievementType(enum.Enum):
@@ -13,9 +15,11 @@ class Achievement(Base):
     __tablename__ = "achievements"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String, nullable=False)  # Название достижения
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)  # Название достижения (ключ импорта)
     description: Mapped[str] = mapped_column(Text, nullable=False)  # Описание достижения
     condition: Mapped[str] = mapped_column(Text, nullable=False)  # Условие получения
+    # Условие в виде выражения над счётчиками пользователя (app.services.achievement_rules); NULL — только ручное начисление
+    rule: Mapped[Optional[dict]] = mapped_column(JSONB(none_as_null=True), nullable=True)
     visual: Mapped[str] = mapped_column(String, nullable=True)  # Визуализация
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)  # Активно ли достижение
     type: Mapped[AchievementType] = mapped_column(Enum(AchievementType), nullable=False)  # Тип достижения
@@ -32,6 +36,12 @@ class Achievement(Base):
 
 class UserAchievement(Base):
     __tablename__ = "user_achievements"
+    __table_args__ = (
+        # Одна запись прогресса на пару пользователь–достижение; индекс обслуживает get_user_achievement
+        Index("ix_user_achievements_user_id_achievement_id", "user_id", "achievement_id", unique=True),
+        # Поиск достижений, которые пользователь пока не может получить (GET /achievements/claimable)
+        Index("ix_user_achievements_user_id_next_eligible_at", "user_id", "next_eligible_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -39,6 +49,8 @@ class UserAchievement(Base):
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)  # Завершено ли достижение
     progress: Mapped[int] = mapped_column(Integer, default=0)  # Текущий прогресс
     last_updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now(timezone.utc))  # Последнее обновление
+    # Когда достижение можно получить снова; NULL — повторно не начисляется (уникальные)
+    next_eligible_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="user_achievements")
     achievement: Mapped["Achievement"] = relationship("Achievement", back_populates="user_achievements")
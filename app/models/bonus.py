@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey, Float
+from sqlalchemy import Integer, String, ForeignKey, Float, Index
 from app.core.database import Base
 
 class PurchasableBonus(Base):
@@ -9,7 +9,7 @@ class PurchasableBonus(Base):
     __tablename__ = "purchasable_bonuses"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String, nullable=False)  # Название бонуса
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)  # Название бонуса (ключ импорта)
     description: Mapped[str] = mapped_column(String, nullable=False)  # Описание бонуса
     base_cost: Mapped[int] = mapped_column(Integer, nullable=False)  # Базовая стоимость
     cost_modifier: Mapped[Float] = mapped_column(Float, nullable=False, default=1.2)  # Модификатор удорожания
@@ -31,6 +31,10 @@ class UserBonus(Base):
     Бонусы, принадлежащие пользователю.
     """
     __tablename__ = "user_bonuses"
+    __table_args__ = (
+        # Один бонус пользователя на пару пользователь–бонус; индекс обслуживает get_user_bonus
+        Index("ix_user_bonuses_user_id_bonus_id", "user_id", "bonus_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     bonus_id: Mapped[int] = mapped_column(ForeignKey("purchasable_bonuses.id"))
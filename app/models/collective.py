@@ -3,6 +3,8 @@ from sqlalchemy import BigInteger, Integer, String, Enum
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import Base
 import enum
+from types import MappingProxyType
+from typing import Mapping
 
 
 class CollectiveType(enum.Enum):
@@ -32,15 +34,17 @@ class CollectiveLevel:
         self.required_rating = required_rating
         self.bonuses = bonuses
 
-def collective_factory(collective_type: CollectiveType) -> dict:
-    bonuses = {
-        CollectiveType.INITIAL: {"rice_boost": 0.05, "autocollect_bonus": 0, "required_rating": 0},
-        CollectiveType.MEDIUM: {"rice_boost": 0.1, "autocollect_bonus": 0, "required_rating": 100_000},
-        CollectiveType.GOLD: {"rice_boost": 0.25, "autocollect_bonus": 0.1, "required_rating": 1_000_000},
-        CollectiveType.DIAMOND: {"rice_boost": 0.3, "autocollect_bonus": 0.15, "required_rating": 10_000_000},
-        CollectiveType.JADE: {"rice_boost": 0.4, "autocollect_bonus": 0.2, "required_rating": 100_000_000},
-    }
-    return bonuses.get(collective_type, {})
+# Бонусы уровней совхоза создаются один раз и не изменяются
+_COLLECTIVE_BONUSES: Mapping[CollectiveType, Mapping[str, float]] = MappingProxyType({
+    CollectiveType.INITIAL: MappingProxyType({"rice_boost": 0.05, "autocollect_bonus": 0, "required_rating": 0}),
+    CollectiveType.MEDIUM: MappingProxyType({"rice_boost": 0.1, "autocollect_bonus": 0, "required_rating": 100_000}),
+    CollectiveType.GOLD: MappingProxyType({"rice_boost": 0.25, "autocollect_bonus": 0.1, "required_rating": 1_000_000}),
+    CollectiveType.DIAMOND: MappingProxyType({"rice_boost": 0.3, "autocollect_bonus": 0.15, "required_rating": 10_000_000}),
+    CollectiveType.JADE: MappingProxyType({"rice_boost": 0.4, "autocollect_bonus": 0.2, "required_rating": 100_000_000}),
+})
+
+def collective_factory(collective_type: CollectiveType) -> Mapping[str, float]:
+    return _COLLECTIVE_BONUSES.get(collective_type, MappingProxyType({}))
 
 class Collective(Base):
     __tablename__ = "collectives"
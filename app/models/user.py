@@ -1,4 +1,6 @@
 from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Boolean, DateTime, Enum, Integer, String, ForeignKey, BigInteger
 from app.core.database import Base
@@ -28,33 +30,30 @@ class CoreType(enum.Enum):
         }
         return mapping[self.value]
     
-class Core:
-    def __init__(self, type: CoreType, description: str, required_rating: int, bonuses: dict):
-        self.type = type
-        self.description = description
-        self.required_rating = required_rating
-        self.bonuses = bonuses
-        
-        
+class Core(NamedTuple):
+    type: CoreType
+    description: str
+    required_rating: int
+    bonuses: Mapping[str, float]
+
+
+# Стержни создаются один раз и не изменяются; порядок — по возрастанию требуемого рейтинга
+_ALL_CORES: tuple[Core, ...] = (
+    Core(CoreType.COPPER, "Начальный стержень", 10, MappingProxyType({"rice_boost": -0.1})),
+    Core(CoreType.IRON, "Продолжение пути", 1000, MappingProxyType({"rice_boost": 0.2})),
+    Core(CoreType.GOLD, "Уважение партии", 10000, MappingProxyType({"party_respect": 10})),
+    Core(CoreType.DIAMOND, "Уровень Мао", 100000, MappingProxyType({"rice_boost": 0.3})),
+    Core(CoreType.JADE, "Главный в партии", 1000000, MappingProxyType({"badge_boost": 0.5})),
+)
+_CORES_BY_TYPE: Mapping[CoreType, Core] = MappingProxyType({core.type: core for core in _ALL_CORES})
+
+
 def core_factory(core_type: CoreType) -> Core:
-    cores = {
-        CoreType.COPPER: Core(CoreType.COPPER, "Начальный стержень", 10, {"rice_boost": -0.1}),
-        CoreType.IRON: Core(CoreType.IRON, "Продолжение пути", 1000, {"rice_boost": 0.2}),
-        CoreType.GOLD: Core(CoreType.GOLD, "Уважение партии", 10000, {"party_respect": 10}),
-        CoreType.DIAMOND: Core(CoreType.DIAMOND, "Уровень Мао", 100000, {"rice_boost": 0.3}),
-        CoreType.JADE: Core(CoreType.JADE, "Главный в партии", 1000000, {"badge_boost": 0.5}),
-    }
-    return cores[core_type]
-
-
-def get_all_cores() -> list[Core]:
-    return [
-        Core(CoreType.COPPER, "Начальный стержень", 10, {"rice_boost": -0.1}),
-        Core(CoreType.IRON, "Продолжение пути", 1000, {"rice_boost": 0.2}),
-        Core(CoreType.GOLD, "Уважение партии", 10000, {"party_respect": 10}),
-        Core(CoreType.DIAMOND, "Уровень Мао", 100000, {"rice_boost": 0.3}),
-        Core(CoreType.JADE, "Главный в партии", 1000000, {"badge_boost": 0.5}),
-    ]
+    return _CORES_BY_TYPE[core_type]
+
+
+def get_all_cores() -> tuple[Core, ...]:
+    return _ALL_CORES
 
 class UserRoles(enum.Enum):
     admin = "admin"
@@ -85,7 +84,7 @@ class User(Base):
     invited_users_bonus: Mapped[int] = mapped_column(Integer, default=0)  # Бонус к приглашенным пользователям (множитель)
 
     # Привязка к коллективу
-    collective_id: Mapped[int] = mapped_column(ForeignKey("collectives.id"), nullable=True)
+    collective_id: Mapped[int] = mapped_column(ForeignKey("collectives.id"), nullable=True, index=True)  # Индекс для выборки участников
     start_collective_id: Mapped[int] = mapped_column(ForeignKey("collectives.id"), nullable=True)
     current_collective_type: Mapped[CollectiveType] = mapped_column(Enum(CollectiveType), nullable=True, default=None)
     collective_rice_boost: Mapped[int] = mapped_column(Integer, default=0)  # Бонус к сбору риса (%)
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.routers.dependencies.auth import get_user_depend
-from app.crud.achievement import get_achievement, can_assign_achievement, get_all_achievements, get_user_achievements
+from app.routers.dependencies.auth import get_session_claims, get_user_depend
+from app.crud.achievement import (
+    achievement_catalog,
+    get_achievement,
+    get_all_achievements,
+    get_claimable_achievements,
+    get_user_achievements,
+)
 from app.models.user import User
 from app.schemas.achievement import AchievementRead, UserAchievementRead
 from app.schemas.user import UserRead
 from app.core.logger import logger
 from app.services.achievement_service import add_user_achievement
+from app.utils.session_token import SessionClaims
 
 router = APIRouter(
     tags=["Achievements"],
@@ -16,7 +23,7 @@ router = APIRouter(
 
 @router.get("/achievements/user", response_model=list[UserAchievementRead], summary="Получить достижения пользователя")
 async def get_user_achievements_endpoint(
-    user: UserRead = Depends(get_user_depend),
+    claims: SessionClaims = Depends(get_session_claims),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -24,19 +31,21 @@ async def get_user_achievements_endpoint(
     """
     try:
         # Получаем достижения пользователя
-        achievements = await get_user_achievements(db, user_id=user.id)
+        achievements = await get_user_achievements(db, user_id=claims.user_id)
         if not achievements:
             return []
 
-        # Преобразуем их в формат Pydantic
+        # Данные достижений берём из справочника в памяти
+        catalog = await achievement_catalog.snapshot(db)
         return [
             UserAchievementRead(
-                achievement=AchievementRead.model_validate(ach.achievement),
+                achievement=catalog.by_id[ach.achievement_id],
                 progress=ach.progress,
                 is_completed=ach.is_completed,
                 last_updated=ach.last_updated,
+                next_eligible_at=ach.next_eligible_at,
             )
-            for ach in achievements if ach.achievement is not None
+            for ach in achievements if ach.achievement_id in catalog.by_id
         ]
     except Exception as e:
         logger.error(f"Ошибка при получении достижений пользователя: {e}")
@@ -61,6 +70,25 @@ async def get_all_achievements_endpoint(session: AsyncSession = Depends(get_db))
     return achievements
 
 
+@router.get(
+    "/achievements/claimable",
+    summary="Получить достижения, доступные пользователю сейчас",
+    description="""
+        Возвращает активные достижения, которые пользователь может получить прямо сейчас:
+        ещё не полученные и периодические, у которых истекло окно повторного получения.
+    """,
+    response_model=list[AchievementRead],
+)
+async def get_claimable_achievements_endpoint(
+    claims: SessionClaims = Depends(get_session_claims),
+    session: AsyncSession = Depends(get_db),
+):
+    """
+    Ручка для получения списка достижений, которые можно начислить пользователю.
+    """
+    return await get_claimable_achievements(session, claims.user_id)
+
+
 @router.post(
     "/achievements/assign/{achievement_id}",
     summary="Начислить достижение пользователю",
@@ -72,7 +100,7 @@ async def get_all_achievements_endpoint(session: AsyncSession = Depends(get_db))
 )
 async def assign_achievement(
     achievement_id: int,
-    user: User = Depends(get_user_depend),
+    claims: SessionClaims = Depends(get_session_claims),
     session: AsyncSession = Depends(get_db),
 ):
     """
@@ -82,17 +110,17 @@ async def assign_achievement(
     if not achievement:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Достижение не найдено.")
 
-    if not await can_assign_achievement(session, user.id, achievement):
+    # Проверка окна повторного получения выполняется в том же запросе, что и начисление
+    user_achievement = await add_user_achievement(session, claims.user_id, achievement)
+    if user_achievement is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Достижение '{achievement.name}' нельзя получить повторно в данный момент."
         )
 
-    user_achievement = await add_user_achievement(session, user.id, achievement_id)
-
     return {
         "status": "success",
-        "user_id": user.id,
+        "user_id": claims.user_id,
         "achievement_id": achievement.id,
         "achievement_name": achievement.name,
         "achievement_type": achievement.type.value,
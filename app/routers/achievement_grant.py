@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.routers.dependencies.auth import get_admin_claims
+from app.schemas.achievement import AchievementGrantRequest, AchievementGrantStatus
+from app.services.achievement_grant_service import achievement_grant_jobs
+
+router = APIRouter(
+    prefix="/admin/achievements/grants",
+    tags=["Admin"],
+    dependencies=[Depends(get_admin_claims)],
+)
+
+
+@router.post(
+    "/",
+    response_model=AchievementGrantStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Массово начислить достижение",
+    description="""
+        Начисляет достижение всем пользователям, подходящим под условия (список ID, совхоз,
+        диапазон рейтинга, время последнего входа), пачками в фоне. Окно повторного получения
+        и бонусы достижения применяются так же, как при одиночном начислении.
+        Прогресс доступен по GET /admin/achievements/grants/{job_id} того же процесса.
+    """,
+)
+async def start_grant_endpoint(selector: AchievementGrantRequest, session: AsyncSession = Depends(get_db)):
+    """
+    Ручка для запуска массового начисления достижения.
+    """
+    job = await achievement_grant_jobs.start(session, selector)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Достижение не найдено.")
+    return job
+
+
+@router.get("/", response_model=list[AchievementGrantStatus], summary="Список заданий массового начисления")
+async def list_grants_endpoint():
+    """
+    Возвращает задания массового начисления, начиная с самых новых.
+    """
+    return achievement_grant_jobs.all()
+
+
+@router.get("/{job_id}", response_model=AchievementGrantStatus, summary="Состояние задания массового начисления")
+async def get_grant_endpoint(job_id: str):
+    """
+    Возвращает прогресс задания массового начисления.
+    """
+    job = achievement_grant_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задание не найдено.")
+    return job
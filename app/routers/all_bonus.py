@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.crud.bonus import get_all_bonuses
+from app.crud.bonus import bonus_catalog
 
 router = APIRouter(prefix="/bonuses", tags=["Bonuses"])
 
@@ -49,6 +49,7 @@ async def get_all_bonuses_endpoint(
 ):
     """
     Ручка для получения списка всех бонусов.
+    Отдаёт заранее сериализованный JSON из справочника бонусов.
     """
-    bonuses = await get_all_bonuses(session)
-    return {"bonuses": bonuses}
+    snapshot = await bonus_catalog.snapshot(session)
+    return Response(content=snapshot.payload, media_type="application/json")
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.services.auth_service import handle_authentication
-from app.routers.dependencies.auth import get_query_params
+from app.services.click_accumulator import click_accumulator
+from app.routers.dependencies.auth import get_query_params, vk_claims_cache
 from app.schemas.user import UserBase, UserRead
 from app.schemas.collective import CollectiveBase
 
@@ -20,6 +21,9 @@ router = APIRouter(
         - Если пользователь заходит впервые, он создается.
         - Если пользователь заходит впервые и указывает группу, она проверяется или создается.
         - Если пользователь возвращается, проверяется его привязка к группе и обновляется при необходимости.
+
+        В ответе возвращается `session_token`: его можно передавать в заголовке
+        `Authorization: Bearer` вместо строки параметров запуска VK.
     """,
     response_model=dict,
     responses={
@@ -46,7 +50,9 @@ router = APIRouter(
                             "social_rating": 150,
                             "type": "Начальный совхоз",
                             "bonus": "Скорость работы +10%"
-                        }
+                        },
+                        "achievements": [],
+                        "session_token": "st1.eyJ1aWQiOjEsInZrIjoiMTIzNDU2Nzg5In0.c2lnbmF0dXJl"
                     }
                 }
             },
@@ -82,5 +88,11 @@ async def authenticate_user(
     if not vk_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing vk_user_id in token")
 
+    # Сбрасываем буфер кликов, чтобы баланс в ответе учитывал ещё не записанный рис
+    await click_accumulator.flush()
+
     result = await handle_authentication(session, vk_id, group_id)
+
+    # Коллектив пользователя мог измениться — сбрасываем закэшированные данные сессии
+    vk_claims_cache.pop(vk_id)
     return result
@@ -2,12 +2,14 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.routers.dependencies.auth import get_user_depend
+from app.routers.dependencies.auth import get_session_claims, get_user_depend
 from app.models.user import User
 from app.crud.bonus import get_all_bonuses, get_purchasable_bonus, add_or_upgrade_user_bonus
 from app.schemas.bonus import BonusRead, UserBonusRead
 from app.schemas.user import UserRead
 from app.services.bonus_service import purchase_bonus
+from app.services.click_accumulator import click_accumulator
+from app.utils.session_token import SessionClaims
 
 router = APIRouter(
     prefix="/bonuses",
@@ -17,13 +19,16 @@ router = APIRouter(
 
 @router.post("/{bonus_id}/purchase", response_model=UserBonusRead, summary="Покупка бонуса пользователем")
 async def purchase_bonus_endpoint(
-    bonus_id: int, user: UserRead = Depends(get_user_depend), db: AsyncSession = Depends(get_db)
+    bonus_id: int, claims: SessionClaims = Depends(get_session_claims), db: AsyncSession = Depends(get_db)
 ):
     """
     Покупка бонуса пользователем.
     """
     try:
-        user_bonus = await purchase_bonus(db, user_id=user.id, bonus_id=bonus_id)
+        # Списание риса должно видеть клики, ещё не записанные в базу
+        if click_accumulator.pending_rice(claims.user_id):
+            await click_accumulator.flush()
+        user_bonus = await purchase_bonus(db, user_id=claims.user_id, bonus_id=bonus_id)
         return user_bonus
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
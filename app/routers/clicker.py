@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import logging
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.models.user import CoreType
-from app.routers.dependencies.auth import get_user_depend
-from app.crud.user import update_user_rice, update_user_rice_and_rating
-from app.crud.collective import get_collective, update_collective_rating
+from app.routers.dependencies.auth import get_session_claims, get_user_depend, resolve_session_claims
+from app.crud.user import get_user, update_user_rice_and_rating
+from app.crud.collective import get_collective, set_collective_type, update_collective_rating
 from app.models.collective import Collective
+from app.schemas.clicker import ClickBatchResult, ClickBatchSubmit
 from app.schemas.user import UserBase
-from app.core.logger import logger
+from app.core.logger import get_logger, log_event
 from sqlalchemy import select
 
-from app.services.collective_service import update_collective_type
-from app.services.core_service import determine_new_core_type, update_user_core
+from app.services.achievement_rules import UserCounters
+from app.services.achievement_service import award_rule_achievements
+from app.services.collective_service import determine_new_collective_type
+from app.services.click_accumulator import click_accumulator
+from app.services.clicker_channel import ClickerChannel
+from app.services.clicker_service import award_click_achievements, refresh_user_core, rice_multiplier, submit_click_batches
+from app.utils.session_token import SessionClaims
+
+logger = get_logger("clicker")
 
 
 router = APIRouter(
@@ -27,7 +38,7 @@ router = APIRouter(
         Обновляет количество риса пользователя.
         - Если пользователь добавляет более 100 риса за один запрос, возвращается ошибка.
         - Учитываются активные бонусы, увеличивающие количество добавляемого риса.
-        - Обновляет данные пользователя в базе.
+        - Рис копится в буфере и записывается в базу пакетно; в ответе возвращается ожидаемый итог.
     """,
     response_model=dict,
     responses={
@@ -39,7 +50,8 @@ router = APIRouter(
                         "status": "success",
                         "added_rice": 120,
                         "total_rice": 500,
-                        "new_core": "IRON"
+                        "new_core": "IRON",
+                        "achievements": []
                     }
                 }
             },
@@ -56,57 +68,92 @@ async def clicker_update(
     """
     Обновляет количество риса у пользователя через кликер с учётом бонусов.
     """
-    logger.info(f"Пользователь {user.vk_id} начал процесс добавления риса через кликер. Заявленное количество: {earned_rice}.")
+    started_at = time.perf_counter()
 
     # Проверяем лимит риса за один запрос
     if earned_rice > 100:
-        logger.warning(f"Пользователь {user.vk_id} превысил лимит добавления риса. Запрос: {earned_rice} риса.")
+        log_event(
+            logger, "clicker.rejected",
+            "Пользователь %(vk_id)s превысил лимит добавления риса. Запрос: %(requested)s риса.",
+            level=logging.WARNING, user_id=user.id, vk_id=user.vk_id, requested=earned_rice,
+        )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Количество риса превышает допустимый лимит."
         )
 
     # Учитываем бонусы пользователя
-    personal_bonus = user.rice_bonus / 100
-    collective_bonus = user.collective_rice_boost / 100
-    total_bonus = 1 + personal_bonus + collective_bonus
-
-    logger.info(
-        f"Бонусы пользователя {user.vk_id}:\n"
-        f"- Личный бонус: {personal_bonus * 100}%\n"
-        f"- Бонус от совхоза: {collective_bonus * 100}%\n"
-        f"- Итоговый множитель: {total_bonus:.2f}"
-    )
+    total_bonus = rice_multiplier(user)
 
     # Рассчитываем итоговое количество добавляемого риса
     total_rice_added = int(earned_rice * total_bonus)
-    logger.info(f"Пользователь {user.vk_id} заработал {total_rice_added} риса с учётом бонусов.")
 
-    # Обновляем количество риса
-    updated_user = await update_user_rice(session, user.id, total_rice_added)
+    # Добавляем рис в буфер; запись в базу произойдёт пакетно
+    pending_rice = click_accumulator.add(user.id, total_rice_added, clicks=earned_rice)
+    total_rice = user.rice + pending_rice
 
     # Проверяем смену стержня
-    current_core = CoreType[updated_user.current_core]
-    new_core_type = determine_new_core_type(updated_user.social_rating, current_core)
-    new_core = None
-    if new_core_type != current_core:
-        success = await update_user_core(session, updated_user, new_core_type)
-        if success:
-            new_core = new_core_type.value
-            logger.info(
-                f"Смена стержня для пользователя {user.vk_id}:\n"
-                f"- Старый стержень: {current_core.value}\n"
-                f"- Новый стержень: {new_core}."
-            )
+    new_core = await refresh_user_core(session, user)
+
+    # Условия достижений, зависящие от риса, кликов и стержня
+    achievements = await award_click_achievements(session, user.id, user, new_core)
+
+    log_event(
+        logger, "clicker.click",
+        "Пользователь %(vk_id)s заработал %(delta)s риса через кликер "
+        "(заявлено %(requested)s, множитель %(multiplier).2f, личный бонус %(rice_bonus)s%%, "
+        "бонус совхоза %(collective_rice_boost)s%%).",
+        user_id=user.id,
+        vk_id=user.vk_id,
+        requested=earned_rice,
+        delta=total_rice_added,
+        multiplier=total_bonus,
+        rice_bonus=user.rice_bonus,
+        collective_rice_boost=user.collective_rice_boost,
+        total_rice=total_rice,
+        new_core=new_core.value if new_core else None,
+        duration_ms=round((time.perf_counter() - started_at) * 1000, 3),
+    )
 
     return {
         "status": "success",
         "added_rice": total_rice_added,
-        "total_rice": updated_user.rice,
-        "new_core": new_core,
+        "total_rice": total_rice,
+        "new_core": new_core.value if new_core else None,
+        "achievements": achievements,
     }
 
 
+@router.post(
+    "/batch",
+    summary="Пакетная отправка кликов",
+    description="""
+        Засчитывает клики, накопленные клиентом, одним запросом.
+        - Каждая пачка содержит время клиента и количество кликов.
+        - Клики проверяются на лимит в секунду, слишком старые и повторные пачки отклоняются.
+        - Бонусы применяются один раз ко всей сумме, результат сохраняется одной транзакцией.
+    """,
+    response_model=ClickBatchResult,
+    responses={
+        400: {"description": "Пачки кликов нарушают ограничения."},
+        401: {"description": "Пользователь не авторизован."},
+    },
+)
+async def clicker_batch_update(
+    payload: ClickBatchSubmit,
+    user: UserBase = Depends(get_user_depend),
+    session: AsyncSession = Depends(get_db),
+):
+    """
+    Засчитывает пачку кликов пользователя с учётом бонусов.
+    """
+    try:
+        return await submit_click_batches(session, user, payload.batches)
+    except ValueError as e:
+        logger.warning("Пачки кликов пользователя %s отклонены: %s", user.vk_id, e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post(
     "/convert_rice_to_rating",
     summary="Конвертация риса в рейтинг",
@@ -127,7 +174,8 @@ async def clicker_update(
                         "added_rating": 5,
                         "user_total_rating": 20,
                         "collective_total_rating": 200,
-                        "new_collective_type": "GOLD"
+                        "new_collective_type": "GOLD",
+                        "achievements": []
                     }
                 }
             },
@@ -138,67 +186,74 @@ async def clicker_update(
 )
 async def convert_rice_to_rating(
     rice_to_convert: int,
-    user: UserBase = Depends(get_user_depend),
+    claims: SessionClaims = Depends(get_session_claims),
     session: AsyncSession = Depends(get_db),
 ):
     """
     Конвертация риса в социальный рейтинг.
     """
-    logger.info(f"Пользователь {user.vk_id} начал конвертацию риса в рейтинг. Заявленное количество: {rice_to_convert}.")
+    logger.info("Пользователь %s начал конвертацию риса в рейтинг. Заявленное количество: %s.", claims.vk_id, rice_to_convert)
 
     # Проверяем минимальное количество риса для перевода
     if rice_to_convert < 100:
-        logger.warning(f"Минимальное количество риса для конвертации не достигнуто: {rice_to_convert}.")
+        logger.warning("Минимальное количество риса для конвертации не достигнуто: %s.", rice_to_convert)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Минимальное количество риса для перерасчета — 100."
         )
 
-    # Проверяем, достаточно ли риса у пользователя
-    if rice_to_convert > user.rice:
-        logger.warning(f"Недостаточно риса для конвертации у пользователя {user.vk_id}. Имеется: {user.rice}, требуется: {rice_to_convert}.")
+    # Вычисляем добавляемый рейтинг
+    added_rating = rice_to_convert // 100
+    logger.info("Рассчитанный рейтинг для конвертации: %s.", added_rating)
+
+    # Записываем накопленные клики, чтобы списание шло от актуального баланса
+    if click_accumulator.pending_rice(claims.user_id):
+        await click_accumulator.flush()
+
+    # Атомарно списываем рис и начисляем рейтинг; достаточность риса проверяется в том же UPDATE
+    updated_user = await update_user_rice_and_rating(session, claims.user_id, rice_to_convert, added_rating)
+    if not updated_user:
+        logger.warning("Недостаточно риса для конвертации у пользователя %s. Требуется: %s.", claims.vk_id, rice_to_convert)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Недостаточно риса для перевода."
         )
 
-    # Вычисляем добавляемый рейтинг
-    added_rating = rice_to_convert // 100
-    logger.info(f"Рассчитанный рейтинг для конвертации: {added_rating}.")
-
-    # Обновляем данные пользователя
-    updated_user = await update_user_rice_and_rating(session, user.id, rice_to_convert, added_rating)
-
     # Обновляем рейтинг совхоза
     collective_total_rating = None
     new_collective_type = None
     if updated_user.collective_id:
-        collective = await session.get(Collective, updated_user.collective_id)
-        if not collective:
-            logger.error(f"Совхоз с ID {updated_user.collective_id} не найден.")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Совхоз с ID {updated_user.collective_id} не найден."
-            )
-
-        previous_type = collective.type  # Исправлено: заменяем `current_collective_type` на `type`
-        previous_rating = collective.social_rating
-
-        # Обновляем рейтинг и тип коллектива
-        await update_collective_rating(session, collective.id, added_rating)
-        await update_collective_type(session, collective)
-
-        new_collective_type = collective.type  # Исправлено: заменяем `current_collective_type` на `type`
+        collective = await update_collective_rating(session, updated_user.collective_id, added_rating)
+
+        previous_type = collective.type
+        new_collective_type = determine_new_collective_type(collective.social_rating, previous_type)
+        if new_collective_type != previous_type:
+            await set_collective_type(session, collective.id, new_collective_type)
+
         logger.info(
-            f"Обновлён совхоз для пользователя {user.vk_id}:\n"
-            f"- Старый тип: {previous_type.localized_name()}\n"
-            f"- Новый тип: {new_collective_type.localized_name()}\n"
-            f"- Рейтинг до: {previous_rating}\n"
-            f"- Рейтинг после: {collective.social_rating}."
+            "Обновлён совхоз для пользователя %s:\n"
+            "- Старый тип: %s\n"
+            "- Новый тип: %s\n"
+            "- Рейтинг до: %s\n"
+            "- Рейтинг после: %s.",
+            claims.vk_id, previous_type.localized_name(), new_collective_type.localized_name(),
+            collective.social_rating - added_rating, collective.social_rating
         )
 
         collective_total_rating = collective.social_rating
 
+    # Конвертация меняет рис и рейтинг; стержень пересчитывается при следующем клике или входе
+    achievements = await award_rule_achievements(
+        session,
+        claims.user_id,
+        UserCounters.from_user(
+            updated_user,
+            click_accumulator.pending_rice(claims.user_id),
+            click_accumulator.pending_clicks(claims.user_id),
+        ),
+        ("rice", "social_rating"),
+    )
+
     return {
         "status": "success",
         "converted_rice": rice_to_convert,
@@ -206,4 +261,48 @@ async def convert_rice_to_rating(
         "user_total_rating": updated_user.social_rating,
         "collective_total_rating": collective_total_rating or 0,
         "new_collective_type": new_collective_type.localized_name() if new_collective_type else None,
+        "achievements": achievements,
     }
+
+
+@router.websocket("/ws")
+async def clicker_websocket(
+    websocket: WebSocket,
+    token: str = Query(..., description="Сессионный токен из /auth или строка параметров запуска VK"),
+):
+    """
+    WebSocket-канал кликера.
+
+    Токен проверяется один раз при подключении. Клиент отправляет кадры
+    `{"type": "click", "count": N}`, сервер отвечает итоговым количеством риса и
+    сам присылает смену стержня (`core`), уровня совхоза (`collective`) и начисленные
+    по условиям достижения (`achievement`).
+    """
+    user = None
+    async with SessionLocal() as session:
+        claims = await resolve_session_claims(token, session)
+        if claims:
+            user = await get_user(session, claims.user_id)
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    channel = ClickerChannel(websocket, user)
+    await channel.refresh(notify=False)
+    await channel.send(channel.snapshot())
+    logger.info("Пользователь %s подключился к WebSocket-каналу кликера.", user.vk_id)
+
+    refresher = asyncio.create_task(channel.refresh_forever())
+    try:
+        while True:
+            try:
+                frame = await websocket.receive_json()
+            except ValueError:
+                await channel.send({"type": "error", "detail": "Кадр должен быть JSON-объектом."})
+                continue
+            await channel.handle_frame(frame)
+    except WebSocketDisconnect:
+        logger.info("Пользователь %s отключился от WebSocket-канала кликера.", user.vk_id)
+    finally:
+        refresher.cancel()
@@ -1,8 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.crud.achievement import create_achievement, get_achievement, update_achievement, delete_achievement
+from app.crud.achievement import (
+    create_achievement,
+    get_achievement,
+    update_achievement,
+    delete_achievement,
+    import_achievements,
+)
 from app.schemas.achievement import AchievementCreate, AchievementRead
+from app.schemas.catalog import CatalogImportResult
 from app.core.database import get_db
+from app.routers.dependencies.auth import get_admin_claims
 
 router = APIRouter(
     prefix="/achievements/crud",
@@ -17,6 +25,22 @@ async def create_achievement_endpoint(achievement_data: AchievementCreate, db: A
     """
     return await create_achievement(db, achievement_data)
 
+@router.post(
+    "/bulk",
+    response_model=CatalogImportResult,
+    summary="Массовый импорт достижений",
+    dependencies=[Depends(get_admin_claims)],
+)
+async def import_achievements_endpoint(achievements: list[AchievementCreate], db: AsyncSession = Depends(get_db)):
+    """
+    Добавляет новые и обновляет существующие (по названию) достижения одной транзакцией.
+    Возвращает списки добавленных, изменённых и неизменённых достижений.
+    """
+    try:
+        return await import_achievements(db, achievements)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{achievement_id}", response_model=AchievementRead, summary="Получить достижение по ID")
 async def get_achievement_endpoint(achievement_id: int, db: AsyncSession = Depends(get_db)):
     """
@@ -7,12 +7,15 @@ from app.crud.bonus import (
     delete_purchasable_bonus,
     get_user_bonuses,
     add_or_upgrade_user_bonus,
+    import_purchasable_bonuses,
 )
 from app.models.bonus import UserBonus
 from app.schemas.bonus import BonusCreate, BonusRead, BonusUpdate, UserBonusWithLevelRead
+from app.schemas.catalog import CatalogImportResult
 from app.core.database import get_db
-from app.routers.dependencies.auth import get_user_depend
+from app.routers.dependencies.auth import get_admin_claims, get_session_claims, get_user_depend
 from app.schemas.user import UserBase
+from app.utils.session_token import SessionClaims
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
@@ -24,13 +27,13 @@ router = APIRouter(
 
 
 @router.get("/user", response_model=list[UserBonusWithLevelRead], summary="Получить бонусы пользователя")
-async def get_user_bonuses_endpoint(user: UserBase = Depends(get_user_depend), db: AsyncSession = Depends(get_db)):
+async def get_user_bonuses_endpoint(claims: SessionClaims = Depends(get_session_claims), db: AsyncSession = Depends(get_db)):
     """
     Возвращает список бонусов, которыми обладает пользователь, включая их текущий уровень.
     """
     # Загружаем бонусы пользователя с уровнями
     bonuses = await db.execute(
-        select(UserBonus).where(UserBonus.user_id == user.id).options(selectinload(UserBonus.bonus))
+        select(UserBonus).where(UserBonus.user_id == claims.user_id).options(selectinload(UserBonus.bonus))
     )
     bonuses = bonuses.scalars().all()
 
@@ -54,6 +57,23 @@ async def create_bonus_endpoint(bonus_data: BonusCreate, db: AsyncSession = Depe
     """
     return await create_purchasable_bonus(db, bonus_data)
 
+
+@router.post(
+    "/bulk",
+    response_model=CatalogImportResult,
+    summary="Массовый импорт покупаемых бонусов",
+    dependencies=[Depends(get_admin_claims)],
+)
+async def import_bonuses_endpoint(bonuses: list[BonusCreate], db: AsyncSession = Depends(get_db)):
+    """
+    Добавляет новые и обновляет существующие (по названию) бонусы одной транзакцией.
+    Возвращает списки добавленных, изменённых и неизменённых бонусов.
+    """
+    try:
+        return await import_purchasable_bonuses(db, bonuses)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # **2. Получение бонуса по ID**
 @router.get("/{bonus_id}", response_model=BonusRead, summary="Получить покупаемый бонус по ID")
 async def get_bonus_endpoint(bonus_id: int, db: AsyncSession = Depends(get_db)):
@@ -1,17 +1,55 @@
-from typing import Optional
+from typing import NamedTuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import Depends, HTTPException, status
 from app.core.config import settings
-from app.crud.user import get_user_by_vk_id
+from app.crud.user import get_user, get_user_identity_by_vk_id, get_user_role
 from app.core.database import get_db
 
-from hashlib import sha256
-from hmac import HMAC
-from base64 import b64encode
-from urllib.parse import urlparse, parse_qsl, urlencode
+from urllib.parse import urlparse, parse_qsl
 
+from app.models.user import UserRoles
 from app.schemas.user import UserRead
+from app.core.metrics import registry
+from app.utils.cache import TTLCache
+from app.utils.session_token import SessionClaims, decode_session_token, is_session_token
+from app.utils.vk_sign import is_valid_launch_sign
+
+
+class LaunchParams(NamedTuple):
+    """
+    Результат разбора и проверки строки параметров запуска VK.
+    """
+    is_valid: bool
+    params: dict
+
+
+# Клиент присылает одну и ту же строку запуска всю сессию, поэтому проверенную подпись кэшируем
+launch_params_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+registry.register_cache("launch_params", launch_params_cache)
+
+
+def parse_launch_params(token: str) -> LaunchParams:
+    """
+    Разбирает строку параметров запуска и сверяет подпись.
+    Результат кэшируется по исходной строке токена.
+    """
+    cached = launch_params_cache.get(token)
+    if cached is not None:
+        return cached
+
+    query_params = dict(
+        parse_qsl(
+            urlparse(token).query,
+            keep_blank_values=True
+        )
+    )
+
+    is_valid = is_valid_launch_sign(query_params, settings.application_secret_key)
+
+    result = LaunchParams(is_valid=is_valid, params=query_params)
+    launch_params_cache.set(token, result)
+    return result
 
 
 async def get_token(authorization: HTTPAuthorizationCredentials = Depends(HTTPBearer())) -> str:
@@ -30,74 +68,83 @@ async def check_valid_token(token: str = Depends(get_token)) -> bool:
     строку токена пользователя, а затем сверяющего подпись.
     Результат сверки подписи возвращается обратно.
     """
-    
-    query_params = dict(
-        parse_qsl(
-            urlparse(token).query,
-            keep_blank_values=True
-        )
-    )
-    
-    if not query_params.get("sign"):
-        return False
-    
-    vk_subset = sorted(
-        filter(
-            lambda key: key.startswith("vk_"),
-            query_params
-        )
-    )
-    ordered = {k: query_params[k] for k in vk_subset}
-    hash_code = b64encode(
-        HMAC(
-            settings.application_secret_key.encode(),
-            urlencode(ordered, doseq=True).encode(),
-            sha256
-        ).digest()
-    ).decode("utf-8")
-
-    if hash_code[-1] == "=":
-        hash_code = hash_code[:-1]
-
-    fixed_hash = hash_code.replace('+', '-').replace('/', '_')
-    return query_params.get("sign") == fixed_hash
+    return parse_launch_params(token).is_valid
 
 
 async def get_query_params(token: str = Depends(get_token)) -> dict:
     """
     Зависимость для получения параметров запроса
     """
-    query_params = dict(
-        parse_qsl(
-            urlparse(token).query,
-            keep_blank_values=True
-        )
-    )
-    return query_params
+    return dict(parse_launch_params(token).params)
 
 
-async def verification_user(token_is_valid: bool = Depends(check_valid_token), token: str = Depends(get_token), session: AsyncSession = Depends(get_db)) -> Optional[UserRead]:
+# VK ID -> данные сессии для клиентов, которые ещё присылают строку запуска VK вместо сессионного токена
+vk_claims_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+registry.register_cache("vk_claims", vk_claims_cache)
+
+
+async def resolve_session_claims(token: str, session: AsyncSession) -> Optional[SessionClaims]:
     """
-    Зависимость для проверки токена и получения пользователя
+    Возвращает данные сессии по сессионному токену или по строке параметров запуска VK.
+    К базе обращается только для строки запуска VK, которой ещё нет в кэше.
+
+    :param token: Сессионный токен или строка параметров запуска VK.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Данные сессии или None, если токен недействителен или пользователь не найден.
     """
-    if not token_is_valid:
-        HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        
-    query_params = await get_query_params(token)
-    user_id = query_params.get("vk_user_id")
-    
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
-    
-    user = await get_user_by_vk_id(session, user_id) 
-    if not user:
+    if is_session_token(token):
+        return decode_session_token(token)
+
+    launch = parse_launch_params(token)
+    vk_id = launch.params.get("vk_user_id")
+    if not launch.is_valid or not vk_id:
         return None
 
-    return user
+    claims = vk_claims_cache.get(vk_id)
+    if claims is None:
+        identity = await get_user_identity_by_vk_id(session, vk_id)
+        if not identity:
+            return None
+        claims = SessionClaims(
+            user_id=identity.id,
+            vk_id=vk_id,
+            collective_id=identity.collective_id,
+            role=identity.role.value,
+            expires_at=0,
+        )
+        vk_claims_cache.set(vk_id, claims)
+    return claims
+
+
+async def get_session_claims(token: str = Depends(get_token), session: AsyncSession = Depends(get_db)) -> SessionClaims:
+    """
+    Зависимость для проверки токена без загрузки пользователя
+    """
+    claims = await resolve_session_claims(token, session)
+    if not claims:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return claims
+
+
+async def verification_user(claims: SessionClaims = Depends(get_session_claims), session: AsyncSession = Depends(get_db)) -> Optional[UserRead]:
+    """
+    Зависимость для проверки токена и получения пользователя
+    """
+    return await get_user(session, claims.user_id)
 
 
 async def get_user_depend(user: UserRead = Depends(verification_user)) -> Optional[UserRead]:
     """
     Зависимость для получения пользователя
     """
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_admin_claims(claims: SessionClaims = Depends(get_session_claims), session: AsyncSession = Depends(get_db)) -> SessionClaims:
+    """
+    Зависимость для ручек администратора.
+    Роль сверяется с базой: роль в токене и кэше сессий могла устареть после разжалования.
+    """
+    if await get_user_role(session, claims.user_id) != UserRoles.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return claims
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import registry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get(
+    "/metrics",
+    summary="Метрики приложения",
+    description="Метрики в текстовом формате Prometheus: задержки и статусы запросов, пул соединений, кэши.",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def metrics_endpoint():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
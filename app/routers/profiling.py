@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from app.core.profiling import list_profiles, profile_path
+from app.routers.dependencies.auth import get_admin_claims
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["Admin"],
+    dependencies=[Depends(get_admin_claims)],
+)
+
+
+@router.get("/", response_model=list[dict], summary="Список сохранённых профилей запросов")
+async def list_profiles_endpoint():
+    """
+    Возвращает сохранённые профили запросов, начиная с самых новых.
+    """
+    return list_profiles()
+
+
+@router.get("/{name}", summary="Скачать профиль запроса")
+async def download_profile_endpoint(name: str):
+    """
+    Отдаёт профиль в формате speedscope (открывается на https://www.speedscope.app).
+    """
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -1,7 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Literal, Optional
 from app.models.achievement import AchievementType  # Импортируем Enum из модели
+from app.services.achievement_rules import compile_rule
 
 
 class AchievementBase(BaseModel):
@@ -9,6 +10,9 @@ class AchievementBase(BaseModel):
     name: str = Field(..., description="Название достижения", example="Первое достижение")
     description: str = Field(..., description="Описание достижения", example="Получено за первое действие")
     condition: str = Field(..., description="Условие получения достижения", example="Сделать что-то впервые")
+    rule: Optional[dict] = Field(
+        None, description="Условие автоматического начисления", example={"counter": "rice", "op": ">=", "value": 1000}
+    )
     visual: Optional[str] = Field(None, description="Путь к изображению достижения", example="/images/achievement1.png")
     type: AchievementType = Field(..., description="Тип достижения", example="UNIQUE")
     is_active: bool = Field(..., description="Активно ли достижение", example=True)
@@ -32,6 +36,12 @@ class AchievementCreate(BaseModel):
     name: str = Field(..., description="Название нового достижения", example="Новое достижение")
     description: str = Field(..., description="Описание нового достижения", example="Получено за новое действие")
     condition: str = Field(..., description="Условие для получения нового достижения", example="Сделать что-то новое")
+    rule: Optional[dict] = Field(
+        None,
+        description="Условие автоматического начисления: выражение над счётчиками rice, clicks, social_rating, "
+                    "invited_users, core с операторами all, any, not",
+        example={"all": [{"counter": "rice", "op": ">=", "value": 1000}, {"counter": "core", "op": ">=", "value": "IRON"}]},
+    )
     visual: Optional[str] = Field(None, description="Путь к изображению нового достижения", example="/images/achievement2.png")
     type: AchievementType = Field(..., description="Тип нового достижения", example="UNIQUE")
     is_active: bool = Field(..., description="Активно ли достижение", example=True)
@@ -47,6 +57,13 @@ class AchievementCreate(BaseModel):
         0.0, description="Процентный бонус к времени автосбора", example=15.0
     )
 
+    @field_validator("rule")
+    @classmethod
+    def check_rule(cls, rule: Optional[dict]) -> Optional[dict]:
+        if rule is not None:
+            compile_rule(rule)  # ValueError превращается в ошибку валидации 422
+        return rule
+
     class Config:
         from_attributes = True
 
@@ -59,6 +76,9 @@ class AchievementUpdate(BaseModel):
     name: Optional[str] = Field(None, description="Обновлённое название достижения", example="Обновлённое достижение")
     description: Optional[str] = Field(None, description="Обновлённое описание достижения", example="Обновлённое описание")
     condition: Optional[str] = Field(None, description="Обновлённое условие получения достижения", example="Обновлённое условие")
+    rule: Optional[dict] = Field(
+        None, description="Обновлённое условие автоматического начисления", example={"counter": "clicks", "op": ">=", "value": 100}
+    )
     visual: Optional[str] = Field(None, description="Обновлённый путь к изображению достижения", example="/images/achievement3.png")
     is_active: Optional[bool] = Field(None, description="Изменение активности достижения", example=True)
 
@@ -73,6 +93,13 @@ class AchievementUpdate(BaseModel):
         None, description="Обновлённый процентный бонус к времени автосбора", example=10.0
     )
 
+    @field_validator("rule")
+    @classmethod
+    def check_rule(cls, rule: Optional[dict]) -> Optional[dict]:
+        if rule is not None:
+            compile_rule(rule)  # ValueError превращается в ошибку валидации 422
+        return rule
+
 
 class UserAchievementRead(BaseModel):
     """
@@ -101,6 +128,51 @@ class UserAchievementRead(BaseModel):
         description="Дата и время последнего обновления прогресса достижения.",
         example="2024-12-01T12:00:00+00:00"
     )
+    next_eligible_at: Optional[datetime] = Field(
+        None,
+        title="Следующее получение",
+        description="Время, с которого достижение можно получить снова; null — повторно не начисляется.",
+        example="2024-12-02T00:00:00+00:00"
+    )
 
     class Config:
         from_attributes = True
+
+
+class AchievementGrantRequest(BaseModel):
+    """
+    Массовое начисление достижения. Условия выбора пользователей объединяются через И;
+    нужно указать хотя бы одно.
+    """
+    achievement_id: int = Field(..., description="ID начисляемого достижения", example=1)
+    user_ids: Optional[list[int]] = Field(None, description="Конкретные пользователи", example=[1, 2, 3])
+    collective_id: Optional[int] = Field(None, description="Участники совхоза", example=10)
+    min_rating: Optional[int] = Field(None, description="Социальный рейтинг не меньше", example=1000)
+    max_rating: Optional[int] = Field(None, description="Социальный рейтинг не больше", example=100000)
+    active_since: Optional[datetime] = Field(
+        None, description="Пользователи, входившие не раньше указанного времени", example="2024-12-01T00:00:00+00:00"
+    )
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if self.user_ids is None and self.collective_id is None and self.min_rating is None \
+                and self.max_rating is None and self.active_since is None:
+            raise ValueError("Нужно указать хотя бы одно условие выбора пользователей")
+        if self.min_rating is not None and self.max_rating is not None and self.min_rating > self.max_rating:
+            raise ValueError("min_rating больше max_rating")
+        return self
+
+
+class AchievementGrantStatus(BaseModel):
+    """
+    Состояние задания массового начисления достижения.
+    """
+    job_id: str = Field(..., description="ID задания", example="5f0c2e7a9b1d")
+    achievement_id: int = Field(..., description="ID начисляемого достижения", example=1)
+    status: Literal["running", "completed", "failed", "cancelled"] = Field(..., description="Состояние задания")
+    total: int = Field(0, description="Пользователей, подходящих под условия на момент запуска", example=25000)
+    processed: int = Field(0, description="Обработано пользователей", example=12000)
+    granted: int = Field(0, description="Начислено (остальным достижение сейчас недоступно)", example=11876)
+    started_at: datetime = Field(..., description="Время запуска")
+    finished_at: Optional[datetime] = Field(None, description="Время завершения")
+    error: Optional[str] = Field(None, description="Причина ошибки")
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class CatalogImportResult(BaseModel):
+    """
+    Итог массового импорта справочника (бонусов или достижений) по названиям.
+    """
+    created: list[str] = Field(..., description="Добавленные элементы", example=["Серп"])
+    updated: list[str] = Field(..., description="Элементы, данные которых изменились", example=["Мотыга"])
+    unchanged: list[str] = Field(..., description="Элементы, совпавшие с сохранёнными", example=["Трактор"])
+    catalog_version: int = Field(..., description="Версия справочника в памяти после импорта", example=3)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.core.game_settings import CLICK_BATCH_MAX_ITEMS, CLICKS_PER_SECOND_LIMIT
+from app.schemas.achievement import UserAchievementRead
+
+
+class ClickBatch(BaseModel):
+    timestamp: datetime = Field(..., description="Время клиента, к которому относится пачка кликов", example="2024-12-01T12:00:00+00:00")
+    count: int = Field(..., ge=1, le=CLICKS_PER_SECOND_LIMIT, description="Количество кликов в пачке", example=12)
+
+
+class ClickBatchSubmit(BaseModel):
+    batches: list[ClickBatch] = Field(
+        ...,
+        min_length=1,
+        max_length=CLICK_BATCH_MAX_ITEMS,
+        description="Пачки кликов, накопленные клиентом с момента предыдущей отправки",
+    )
+
+
+class ClickBatchResult(BaseModel):
+    status: str = Field(..., description="Статус обработки", example="success")
+    accepted_clicks: int = Field(..., description="Количество засчитанных кликов", example=120)
+    added_rice: int = Field(..., description="Добавленный рис с учётом бонусов", example=132)
+    total_rice: int = Field(..., description="Итоговое количество риса пользователя", example=1500)
+    new_core: Optional[str] = Field(None, description="Новый стержень, если он сменился", example="IRON")
+    achievements: list[UserAchievementRead] = Field([], description="Достижения, начисленные по условиям")
@@ -0,0 +1,213 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+from sqlalchemy import DateTime, Integer, and_, any_, func, literal, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import get_logger, log_event
+from app.crud.achievement import achievement_catalog
+from app.models.achievement import UserAchievement
+from app.models.user import User
+from app.schemas.achievement import AchievementGrantRequest, AchievementGrantStatus, AchievementRead
+from app.services.progression import next_eligible_at
+
+logger = get_logger("achievements")
+
+
+def _int_array(values: Sequence[int]):
+    # Один параметр-массив вместо IN (...): asyncpg ограничивает число параметров запроса 32767
+    return literal(list(values), ARRAY(Integer))
+
+
+def _user_filter(selector: AchievementGrantRequest):
+    conditions = []
+    if selector.user_ids is not None:
+        conditions.append(User.id == any_(_int_array(selector.user_ids)))
+    if selector.collective_id is not None:
+        conditions.append(User.collective_id == selector.collective_id)
+    if selector.min_rating is not None:
+        conditions.append(User.social_rating >= selector.min_rating)
+    if selector.max_rating is not None:
+        conditions.append(User.social_rating <= selector.max_rating)
+    if selector.active_since is not None:
+        conditions.append(User.last_entry >= selector.active_since)
+    return and_(*conditions)
+
+
+async def grant_achievement_to_users(
+    session: AsyncSession,
+    achievement: AchievementRead,
+    user_ids: Sequence[int],
+    now: datetime,
+) -> int:
+    """
+    Начисляет достижение пачке пользователей одним запросом:
+    `WITH granted AS (INSERT ... ON CONFLICT ... DO UPDATE ... WHERE ... RETURNING user_id) UPDATE users ...`.
+    Окно повторного получения проверяется так же, как при одиночном начислении. Транзакцию не фиксирует.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param achievement: Достижение из справочника.
+    :param user_ids: ID пользователей пачки.
+    :param now: Время начисления (UTC).
+    :return: Количество пользователей, которым достижение начислено.
+    """
+    statement = insert(UserAchievement).from_select(
+        ["user_id", "achievement_id", "is_completed", "progress", "last_updated", "next_eligible_at"],
+        select(
+            User.id,
+            literal(achievement.id, Integer),
+            true(),
+            literal(0, Integer),
+            literal(now, DateTime(timezone=True)),
+            literal(next_eligible_at(achievement.type, now), DateTime(timezone=True)),
+        ).where(User.id == any_(_int_array(user_ids))),
+    )
+    granted = statement.on_conflict_do_update(
+        index_elements=[UserAchievement.user_id, UserAchievement.achievement_id],
+        set_={
+            "progress": UserAchievement.progress + 1,
+            "last_updated": statement.excluded.last_updated,
+            "next_eligible_at": statement.excluded.next_eligible_at,
+        },
+        where=UserAchievement.next_eligible_at <= now,
+    ).returning(UserAchievement.user_id).cte("granted")
+
+    if achievement.social_rating_bonus or achievement.rice_production_bonus or achievement.autocollect_duration_bonus:
+        bonused = (
+            update(User)
+            .where(User.id == granted.c.user_id)
+            .values(
+                social_rating=User.social_rating + achievement.social_rating_bonus,
+                rice_bonus=User.rice_bonus + achievement.rice_production_bonus,
+                autocollect_duration_bonus=User.autocollect_duration_bonus + achievement.autocollect_duration_bonus,
+            )
+            .returning(User.id)
+            .cte("bonused")
+        )
+        counted = select(func.count()).select_from(bonused)
+    else:
+        counted = select(func.count()).select_from(granted)
+
+    return (await session.execute(counted)).scalar_one()
+
+
+async def _run_grant(job: AchievementGrantStatus, achievement: AchievementRead, selector: AchievementGrantRequest) -> None:
+    user_filter = _user_filter(selector)
+    chunk_size = settings.achievement_grant_chunk_size
+
+    async with SessionLocal() as session:
+        job.total = (await session.execute(select(func.count()).select_from(User).where(user_filter))).scalar_one()
+        await session.commit()
+
+        last_id = 0
+        while True:
+            # Обход по первичному ключу: пачки не пересекаются и не зависят от уже начисленных
+            user_ids = (await session.execute(
+                select(User.id).where(user_filter, User.id > last_id).order_by(User.id).limit(chunk_size)
+            )).scalars().all()
+            if not user_ids:
+                break
+
+            granted = await grant_achievement_to_users(session, achievement, user_ids, datetime.now(timezone.utc))
+            await session.commit()
+
+            last_id = user_ids[-1]
+            job.processed += len(user_ids)
+            job.granted += granted
+            log_event(
+                logger, "achievement.grant_progress",
+                "Задание %(job_id)s: обработано %(processed)s из %(total)s, начислено %(granted)s.",
+                job_id=job.job_id,
+                achievement_id=achievement.id,
+                processed=job.processed,
+                total=job.total,
+                granted=job.granted,
+            )
+
+
+class AchievementGrantJobs:
+    """
+    Задания массового начисления достижений в текущем процессе.
+
+    Каждая пачка фиксируется отдельно, поэтому прерванное задание можно просто запустить
+    повторно: пользователи, уже получившие достижение, будут пропущены по окну повторного
+    получения. Состояние хранится в памяти процесса, запустившего задание.
+    """
+
+    def __init__(self, history_size: int):
+        self.history_size = history_size
+        self._jobs: OrderedDict[str, AchievementGrantStatus] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def start(self, session: AsyncSession, selector: AchievementGrantRequest) -> Optional[AchievementGrantStatus]:
+        """
+        Запускает начисление в фоне.
+
+        :param session: Асинхронная сессия SQLAlchemy (для справочника достижений).
+        :param selector: Достижение и условия выбора пользователей.
+        :return: Состояние нового задания или None, если достижение не найдено.
+        """
+        achievement = await achievement_catalog.get(session, selector.achievement_id)
+        if not achievement:
+            return None
+
+        job = AchievementGrantStatus(
+            job_id=uuid.uuid4().hex[:12],
+            achievement_id=achievement.id,
+            status="running",
+            started_at=datetime.now(timezone.utc),
+        )
+        self._jobs[job.job_id] = job
+        self._prune()
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, achievement, selector))
+        logger.info("Запущено массовое начисление достижения '%s': задание %s.", achievement.name, job.job_id)
+        return job
+
+    async def _run(self, job: AchievementGrantStatus, achievement: AchievementRead, selector: AchievementGrantRequest) -> None:
+        try:
+            await _run_grant(job, achievement, selector)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception("Ошибка массового начисления (задание %s)", job.job_id)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._tasks.pop(job.job_id, None)
+            logger.info(
+                "Задание %s завершено (%s): обработано %s, начислено %s.",
+                job.job_id, job.status, job.processed, job.granted,
+            )
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status != "running"]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[AchievementGrantStatus]:
+        return self._jobs.get(job_id)
+
+    def all(self) -> list[AchievementGrantStatus]:
+        """
+        Возвращает задания, начиная с самых новых.
+        """
+        return list(reversed(self._jobs.values()))
+
+    async def stop(self) -> None:
+        """
+        Отменяет незавершённые задания; уже зафиксированные пачки остаются начисленными.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+achievement_grant_jobs = AchievementGrantJobs(settings.achievement_grant_history_size)
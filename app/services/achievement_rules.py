@@ -0,0 +1,160 @@
+"""
+Условия достижений в виде структурированных выражений над счётчиками пользователя.
+
+Формат правила (JSON):
+
+    {"counter": "rice", "op": ">=", "value": 50000}
+    {"counter": "core", "op": ">=", "value": "GOLD"}      # стержни сравниваются по порядку
+    {"all": [<правило>, ...]}
+    {"any": [<правило>, ...]}
+    {"not": <правило>}
+
+Правило компилируется один раз в предикат над `UserCounters` вместе с множеством счётчиков,
+от которых оно зависит. `AchievementRuleSet` индексирует правила по счётчикам и при событии
+проверяет только те, что зависят от изменившихся значений.
+"""
+import operator
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+from app.models.user import CoreType
+from app.services.progression import core_rank
+
+COUNTERS = ("rice", "clicks", "social_rating", "invited_users", "core")
+NUMERIC_COUNTERS = frozenset(COUNTERS) - {"core"}
+
+OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Предел вложенности: правила приходят через API и компилируются рекурсивно
+MAX_RULE_DEPTH = 16
+
+
+class UserCounters(NamedTuple):
+    """
+    Значения счётчиков пользователя, доступные условиям достижений.
+    """
+    rice: int
+    clicks: int
+    social_rating: int
+    invited_users: int
+    core: CoreType
+
+    @classmethod
+    def from_user(cls, user: Any, pending_rice: int = 0, pending_clicks: int = 0) -> "UserCounters":
+        """
+        Собирает счётчики из пользователя (ORM-объекта, схемы или `UserBalance`).
+
+        :param user: Объект с полями rice, clicks, social_rating, invited_users, current_core.
+        :param pending_rice: Рис, ещё не записанный в базу накопителем кликов.
+        :param pending_clicks: Клики, ещё не записанные в базу накопителем кликов.
+        """
+        core = user.current_core
+        return cls(
+            rice=user.rice + pending_rice,
+            clicks=user.clicks + pending_clicks,
+            social_rating=user.social_rating,
+            invited_users=user.invited_users,
+            core=core if isinstance(core, CoreType) else CoreType[core],
+        )
+
+
+class CompiledRule(NamedTuple):
+    predicate: Callable[[UserCounters], bool]
+    counters: frozenset[str]
+
+
+def compile_rule(rule: Any, depth: int = 0) -> CompiledRule:
+    """
+    Компилирует правило в предикат.
+
+    :param rule: Правило в формате, описанном в модуле.
+    :param depth: Текущая глубина вложенности.
+    :return: Предикат и счётчики, от которых он зависит.
+    :raises ValueError: Если правило некорректно.
+    """
+    if depth > MAX_RULE_DEPTH:
+        raise ValueError(f"Вложенность правила больше {MAX_RULE_DEPTH}")
+    if not isinstance(rule, dict) or len(rule) == 0:
+        raise ValueError(f"Правило должно быть непустым объектом: {rule!r}")
+
+    if "all" in rule or "any" in rule:
+        key = "all" if "all" in rule else "any"
+        if len(rule) != 1 or not isinstance(rule[key], list) or not rule[key]:
+            raise ValueError(f"'{key}' должен быть единственным ключом с непустым списком правил")
+        parts = [compile_rule(part, depth + 1) for part in rule[key]]
+        predicates = tuple(part.predicate for part in parts)
+        combine = all if key == "all" else any
+        return CompiledRule(
+            lambda counters: combine(predicate(counters) for predicate in predicates),
+            frozenset().union(*(part.counters for part in parts)),
+        )
+
+    if "not" in rule:
+        if len(rule) != 1:
+            raise ValueError("'not' должен быть единственным ключом правила")
+        inner = compile_rule(rule["not"], depth + 1)
+        inner_predicate = inner.predicate
+        return CompiledRule(lambda counters: not inner_predicate(counters), inner.counters)
+
+    if set(rule) != {"counter", "op", "value"}:
+        raise ValueError(f"Сравнение должно содержать ровно ключи counter, op, value: {rule!r}")
+
+    counter, op, value = rule["counter"], rule["op"], rule["value"]
+    if not isinstance(counter, str) or not isinstance(op, str):
+        raise ValueError(f"counter и op должны быть строками: {rule!r}")
+    if op not in OPERATORS:
+        raise ValueError(f"Неизвестная операция '{op}', допустимы: {', '.join(OPERATORS)}")
+    compare = OPERATORS[op]
+
+    if counter == "core":
+        if not isinstance(value, str) or value not in CoreType.__members__:
+            raise ValueError(f"Неизвестный стержень '{value}'")
+        rank = core_rank(CoreType[value])
+        return CompiledRule(lambda counters: compare(core_rank(counters.core), rank), frozenset({"core"}))
+
+    if counter not in NUMERIC_COUNTERS:
+        raise ValueError(f"Неизвестный счётчик '{counter}', допустимы: {', '.join(COUNTERS)}")
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Значение для '{counter}' должно быть целым числом")
+
+    index = UserCounters._fields.index(counter)
+    return CompiledRule(lambda counters: compare(counters[index], value), frozenset({counter}))
+
+
+class AchievementRuleSet:
+    """
+    Скомпилированные правила достижений с индексом «счётчик → правила, которые от него зависят».
+    """
+
+    def __init__(self, rules: Iterable[tuple[int, CompiledRule]], version: Optional[int] = None):
+        """
+        :param rules: Пары (ID достижения, скомпилированное правило).
+        :param version: Версия справочника, из которого собраны правила.
+        """
+        self.version = version
+        self.rules: dict[int, CompiledRule] = dict(rules)
+        self._by_counter: dict[str, tuple[int, ...]] = {
+            counter: tuple(key for key, rule in self.rules.items() if counter in rule.counters)
+            for counter in COUNTERS
+        }
+
+    def match(self, counters: UserCounters, changed: Iterable[str] = COUNTERS) -> list[int]:
+        """
+        Проверяет правила, зависящие от изменившихся счётчиков.
+
+        :param counters: Текущие значения счётчиков пользователя.
+        :param changed: Изменившиеся счётчики.
+        :return: ID достижений, условия которых выполнены, в порядке возрастания.
+        """
+        candidates: set[int] = set()
+        for counter in changed:
+            candidates.update(self._by_counter.get(counter, ()))
+        return sorted(key for key in candidates if self.rules[key].predicate(counters))
+
+    def __len__(self) -> int:
+        return len(self.rules)
@@ -1,102 +1,201 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.logger import logger
-from app.models.achievement import Achievement, UserAchievement
+from sqlalchemy import update
+from app.core.config import settings
+from app.core.logger import get_logger, log_event
+from app.core.metrics import registry
+from app.crud.achievement import achievement_catalog, get_user_achievement, upsert_user_achievement
 from app.models.user import User
-from datetime import datetime
-from typing import Optional
+from app.schemas.achievement import AchievementRead, UserAchievementRead
+from app.services.achievement_rules import COUNTERS, AchievementRuleSet, UserCounters, compile_rule
+from app.utils.cache import TTLCache
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence
 
+logger = get_logger("achievements")
 
-async def add_user_achievement(session: AsyncSession, user_id: int, achievement_id: int) -> UserAchievement:
+# Пары (пользователь, достижение), начисление которых сейчас заведомо не пройдёт: выполненное
+# условие срабатывает на каждом клике, а в базу за ним нужно сходить один раз
+unavailable_achievements = TTLCache(settings.achievement_rules_cache_size, settings.achievement_rules_cache_ttl_seconds)
+registry.register_cache("achievement_rules_unavailable", unavailable_achievements)
+
+# Правила, скомпилированные из текущей версии справочника достижений
+_rule_set: Optional[AchievementRuleSet] = None
+
+
+async def add_user_achievement(
+    session: AsyncSession,
+    user_id: int,
+    achievement: AchievementRead,
+    commit: bool = True,
+) -> Optional[UserAchievementRead]:
     """
-    Добавить достижение пользователю или обновить его прогресс с учётом начисляемых бонусов.
-    
+    Начисляет достижение пользователю с учётом окна повторного получения и применяет его бонусы.
+    Выполняет два запроса (upsert прогресса и UPDATE пользователя) в одной транзакции.
+
     :param session: Асинхронная сессия SQLAlchemy.
     :param user_id: ID пользователя.
-    :param achievement_id: ID достижения.
-    :return: ORM-объект UserAchievement.
+    :param achievement: Достижение из справочника.
+    :param commit: Фиксировать ли транзакцию.
+    :return: Прогресс пользователя по достижению или None, если достижение сейчас получить нельзя.
     """
-    logger.info(f"Начало начисления достижения с ID {achievement_id} для пользователя с ID {user_id}.")
-
-    # Получение достижения
-    achievement = await session.get(Achievement, achievement_id)
-    if not achievement:
-        logger.error(f"Достижение с ID {achievement_id} не найдено.")
-        raise ValueError(f"Достижение с ID {achievement_id} не найдено.")
-
-    # Получение пользователя
-    user = await session.get(User, user_id)
-    if not user:
-        logger.error(f"Пользователь с ID {user_id} не найден.")
-        raise ValueError(f"Пользователь с ID {user_id} не найден.")
-
-    # Проверяем, есть ли у пользователя уже это достижение
-    result = await session.execute(
-        select(UserAchievement).where(
-            UserAchievement.user_id == user_id,
-            UserAchievement.achievement_id == achievement_id
-        )
+    now = datetime.now(timezone.utc)
+
+    row = await upsert_user_achievement(session, user_id, achievement, now)
+    if row is None:
+        # Незафиксированных изменений нет: ON CONFLICT не затронул ни одной строки
+        return None
+
+    await apply_achievement_bonus(session, user_id, achievement)
+    if commit:
+        await session.commit()
+
+    log_event(
+        logger, "achievement.assigned",
+        "Достижение '%(achievement_name)s' начислено пользователю %(user_id)s (прогресс %(progress)s).",
+        user_id=user_id,
+        achievement_id=achievement.id,
+        achievement_name=achievement.name,
+        progress=row.progress,
     )
-    user_achievement: Optional[UserAchievement] = result.scalar_one_or_none()
-
-    if user_achievement:
-        logger.info(f"Достижение с ID {achievement_id} уже есть у пользователя с ID {user_id}. Обновляем прогресс.")
-        user_achievement.last_updated = datetime.utcnow()
-        user_achievement.progress += 1
-    else:
-        # Создаём новое достижение
-        user_achievement = UserAchievement(
-            user_id=user_id,
-            achievement_id=achievement_id,
-            last_updated=datetime.utcnow(),
-            is_completed=True
-        )
-        session.add(user_achievement)
-        logger.info(f"Достижение с ID {achievement_id} добавлено пользователю с ID {user_id}.")
-
-    # Применяем бонусы достижения
-    logger.info(f"Применение бонусов достижения '{achievement.name}' для пользователя {user_id}.")
-    await apply_achievement_bonus(session, user, achievement)
-
-    await session.commit()
-    await session.refresh(user_achievement)
 
-    logger.info(f"Достижение '{achievement.name}' успешно начислено пользователю {user_id}.")
-    return user_achievement
+    return UserAchievementRead(
+        achievement=achievement,
+        progress=row.progress,
+        is_completed=row.is_completed,
+        last_updated=row.last_updated,
+        next_eligible_at=row.next_eligible_at,
+    )
 
 
-async def apply_achievement_bonus(session: AsyncSession, user: User, achievement: Achievement) -> None:
+async def apply_achievement_bonus(session: AsyncSession, user_id: int, achievement: AchievementRead) -> None:
     """
-    Применяет бонус достижения к пользователю.
+    Применяет бонус достижения к пользователю одним UPDATE без загрузки пользователя.
+    Транзакцию не фиксирует.
+
+    Перед UPDATE сессия сбрасывает изменения: автосброс в SessionLocal выключен, а UPDATE
+    синхронизирует загруженного пользователя и затёр бы его ещё не записанные атрибуты.
 
     :param session: Сессия базы данных.
-    :param user: Пользователь, к которому применяются бонусы.
+    :param user_id: ID пользователя, к которому применяются бонусы.
     :param achievement: Достижение, бонус которого нужно применить.
     """
-    logger.info(f"Начало применения бонусов достижения '{achievement.name}' к пользователю (ID: {user.id}).")
-
-    # Сохраняем исходные значения для логирования
-    initial_values = {
-        "social_rating": user.social_rating,
-        "autocollect_duration_bonus": user.autocollect_duration_bonus,
-        "autocollect_rice_bonus": user.autocollect_rice_bonus,
-        "rice_bonus": user.rice_bonus,
-    }
-
-    # Применяем бонусы из достижения
-    user.social_rating += achievement.social_rating_bonus
-    user.rice_bonus += achievement.rice_production_bonus
-    user.autocollect_duration_bonus += achievement.autocollect_duration_bonus
-
-    logger.info(
-        f"Бонусы применены к пользователю (ID: {user.id}):\n"
-        f"- Социальный рейтинг: {initial_values['social_rating']} -> {user.social_rating}\n"
-        f"- Бонус к добыче риса: {initial_values['rice_bonus']} -> {user.rice_bonus}\n"
-        f"- Бонус к времени автосбора: {initial_values['autocollect_duration_bonus']} -> {user.autocollect_duration_bonus}"
+    if not (achievement.social_rating_bonus or achievement.rice_production_bonus or achievement.autocollect_duration_bonus):
+        return
+
+    await session.flush()
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            social_rating=User.social_rating + achievement.social_rating_bonus,
+            rice_bonus=User.rice_bonus + achievement.rice_production_bonus,
+            autocollect_duration_bonus=User.autocollect_duration_bonus + achievement.autocollect_duration_bonus,
+        )
     )
 
-    # Сохранение изменений
-    session.add(user)
-    await session.commit()
 
-    logger.info(f"Применение бонусов завершено для пользователя (ID: {user.id}).")
+def build_rule_set(achievements: Sequence[AchievementRead], version: Optional[int] = None) -> AchievementRuleSet:
+    """
+    Компилирует условия активных достижений. Некорректные правила пропускаются с ошибкой в логе.
+
+    :param achievements: Достижения из справочника.
+    :param version: Версия справочника.
+    :return: Набор правил с индексом по счётчикам.
+    """
+    rules = []
+    for achievement in achievements:
+        if not achievement.is_active or not achievement.rule:
+            continue
+        try:
+            rules.append((achievement.id, compile_rule(achievement.rule)))
+        except ValueError as e:
+            logger.error("Условие достижения '%s' (ID %s) не скомпилировано: %s", achievement.name, achievement.id, e)
+    return AchievementRuleSet(rules, version)
+
+
+async def get_rule_set(session: AsyncSession) -> AchievementRuleSet:
+    """
+    Возвращает правила достижений; перекомпилирует их только при смене версии справочника.
+    """
+    global _rule_set
+    snapshot = await achievement_catalog.snapshot(session)
+    if _rule_set is None or _rule_set.version != snapshot.version:
+        _rule_set = build_rule_set(snapshot.items, snapshot.version)
+        logger.info("Скомпилированы условия достижений: %s (справочник v%s).", len(_rule_set), snapshot.version)
+    return _rule_set
+
+
+def _remember_unavailable(user_id: int, achievement_id: int, until: Optional[datetime], now: datetime) -> None:
+    if until is None:
+        unavailable_achievements.set((user_id, achievement_id), True)
+        return
+    seconds = (until - now).total_seconds()
+    if seconds > 0:
+        unavailable_achievements.set((user_id, achievement_id), True, ttl=min(seconds, unavailable_achievements.ttl))
+
+
+def _candidate_achievement_ids(
+    rule_set: AchievementRuleSet, user_id: int, counters: UserCounters, changed: Iterable[str]
+) -> list[int]:
+    return [
+        achievement_id for achievement_id in rule_set.match(counters, changed)
+        if unavailable_achievements.get((user_id, achievement_id)) is None
+    ]
+
+
+def has_rule_candidates(user_id: int, counters: UserCounters, changed: Iterable[str] = COUNTERS) -> bool:
+    """
+    Проверяет без обращения к базе, может ли событие начислить достижение по уже
+    скомпилированным правилам. Позволяет не открывать сессию на каждом клике.
+
+    :param user_id: ID пользователя.
+    :param counters: Текущие счётчики пользователя.
+    :param changed: Счётчики, изменённые событием.
+    :return: `True`, если есть сработавшие правила или правила ещё не скомпилированы.
+    """
+    if _rule_set is None:
+        return True
+    return bool(_candidate_achievement_ids(_rule_set, user_id, counters, changed))
+
+
+async def award_rule_achievements(
+    session: AsyncSession,
+    user_id: int,
+    counters: UserCounters,
+    changed: Iterable[str] = COUNTERS,
+    commit: bool = True,
+) -> list[UserAchievementRead]:
+    """
+    Начисляет достижения, условия которых выполнены. Проверяются только правила, зависящие
+    от изменившихся счётчиков; к базе запрос идёт лишь для сработавших правил, которые ещё
+    не отмечены как недоступные.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param counters: Текущие счётчики пользователя.
+    :param changed: Счётчики, изменённые событием.
+    :param commit: Фиксировать ли каждое начисление. При `False` начисления фиксирует вызывающий код.
+    :return: Начисленные достижения.
+    """
+    rule_set = await get_rule_set(session)
+    matched = _candidate_achievement_ids(rule_set, user_id, counters, changed)
+    if not matched:
+        return []
+
+    snapshot = await achievement_catalog.snapshot(session)
+    awarded = []
+    for achievement_id in matched:
+        achievement = snapshot.by_id.get(achievement_id)
+        if achievement is None:
+            continue
+
+        result = await add_user_achievement(session, user_id, achievement, commit=commit)
+        if result:
+            awarded.append(result)
+            until = result.next_eligible_at
+        else:
+            existing = await get_user_achievement(session, user_id, achievement_id)
+            until = existing.next_eligible_at if existing else None
+        _remember_unavailable(user_id, achievement_id, until, datetime.now(timezone.utc))
+
+    return awarded
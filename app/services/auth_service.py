@@ -1,40 +1,64 @@
 from datetime import datetime, timezone
 from app.crud.collective import update_collective_level
+from app.crud.user import update_user_rice
 from app.models.user import CoreType
 from app.schemas.collective import CollectiveRead
+from app.services.achievement_rules import UserCounters
+from app.services.achievement_service import award_rule_achievements
+from app.services.click_accumulator import click_accumulator
 from app.services.collective_service import apply_collective_bonuses, get_or_create_collective, update_collective_type
 from app.services.core_service import determine_new_core_type, update_user_core
 from app.services.other import serialize_orm_object
 from app.services.user_service import calculate_afk_rice, create_or_update_user
+from app.utils.session_token import issue_session_token
 from app.models.collective import Collective
 from app.schemas.user import UserRead, UserUpdate
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
-from app.core.logger import logger
+from app.core.logger import get_logger
+from app.core.sql_stats import track_statements
+
+logger = get_logger("auth")
 
 async def handle_authentication(session: AsyncSession, vk_id: str, group_id: Optional[int] = None) -> dict:
     """
     Аутентификация пользователя, расчёт афк-рисов, обработка привязки к коллективу и обновление стержня.
+    Все изменения, включая начисление достижений, выполняются в одной транзакции
+    с единственным COMMIT в конце.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param vk_id: VK ID пользователя.
     :param group_id: ID группы VK (если передан).
     :return: Словарь с данными пользователя и коллектива.
     """
-    logger.info(f"Начата аутентификация пользователя {vk_id}.")
+    logger.info("Начата аутентификация пользователя %s.", vk_id)
+
+    with track_statements() as stats:
+        result = await _authenticate(session, vk_id, group_id)
+
+    logger.info(
+        "Аутентификация пользователя %s: выполнено SQL-запросов: %s, "
+        "COMMIT: %s.",
+        vk_id, stats.statements, stats.commits
+    )
+    return result
 
-    # Создание или обновление пользователя и привязка к коллективу
-    user_collective_data = await create_or_update_user(session, vk_id, group_id)
+
+async def _authenticate(session: AsyncSession, vk_id: str, group_id: Optional[int]) -> dict:
+    # Промежуточные шаги только сбрасывают изменения в базу, фиксация одна — в конце
+    user_collective_data = await create_or_update_user(session, vk_id, group_id, commit=False)
     user = user_collective_data["user"]
     collective = user_collective_data["collective"]
 
     logger.info(
-        f"Пользователь {vk_id} успешно создан/обновлён. Текущие данные пользователя:\n"
-        f"- Рис: {user.rice}\n"
-        f"- Социальный рейтинг: {user.social_rating}\n"
-        f"- Текущий стержень: {user.current_core}\n"
-        f"- Коллектив: {collective.id if collective else 'Нет привязки'}."
+        "Пользователь %s успешно создан/обновлён. Текущие данные пользователя:\n"
+        "- Рис: %s\n"
+        "- Социальный рейтинг: %s\n"
+        "- Текущий стержень: %s\n"
+        "- Коллектив: %s.",
+        vk_id, user.rice, user.social_rating, user.current_core,
+        collective.id if collective else 'Нет привязки'
     )
 
     # Рассчёт афк-рисов
@@ -43,22 +67,27 @@ async def handle_authentication(session: AsyncSession, vk_id: str, group_id: Opt
     if user.last_entry:
         afk_rice = await calculate_afk_rice(user, user.last_entry, current_time)
         logger.info(
-            f"Рассчитан афк-рис для пользователя {vk_id}:\n"
-            f"- Предыдущее время входа: {user.last_entry}\n"
-            f"- Текущее время: {current_time}\n"
-            f"- Заработано афк-рисов: {afk_rice}\n"
-            f"- Рис до начисления: {user.rice}\n"
-            f"- Рис после начисления: {user.rice + afk_rice}."
+            "Рассчитан афк-рис для пользователя %s:\n"
+            "- Предыдущее время входа: %s\n"
+            "- Текущее время: %s\n"
+            "- Заработано афк-рисов: %s\n"
+            "- Рис до начисления: %s\n"
+            "- Рис после начисления: %s.",
+            vk_id, user.last_entry, current_time, afk_rice, user.rice, user.rice + afk_rice
         )
-        user.rice += afk_rice
+        # Дельтой, а не присваиванием: накопитель кликов пишет рис параллельно.
+        # UPDATE обновляет и загруженный объект пользователя
+        if afk_rice:
+            await update_user_rice(session, user.id, afk_rice, commit=False)
 
     # Обновление времени последнего входа
     previous_last_entry = user.last_entry
     user.last_entry = current_time
     logger.info(
-        f"Обновлено время последнего входа для пользователя {vk_id}:\n"
-        f"- Предыдущее значение: {previous_last_entry}\n"
-        f"- Новое значение: {user.last_entry}."
+        "Обновлено время последнего входа для пользователя %s:\n"
+        "- Предыдущее значение: %s\n"
+        "- Новое значение: %s.",
+        vk_id, previous_last_entry, user.last_entry
     )
     session.add(user)
 
@@ -67,41 +96,56 @@ async def handle_authentication(session: AsyncSession, vk_id: str, group_id: Opt
     new_core_type = determine_new_core_type(user.social_rating, current_core)
     if new_core_type != current_core:
         previous_core = user.current_core
-        success = await update_user_core(session, user, new_core_type)
+        success = await update_user_core(session, user, new_core_type, commit=False)
         if success:
             logger.info(
-                f"Пользователь {vk_id} обновил стержень:\n"
-                f"- Предыдущий стержень: {previous_core}\n"
-                f"- Новый стержень: {new_core_type.value}\n"
-                f"- Новый бонус к сбору риса: {user.rice_bonus}%\n"
-                f"- Новый бонус за друзей: {user.invited_users_bonus}x."
+                "Пользователь %s обновил стержень:\n"
+                "- Предыдущий стержень: %s\n"
+                "- Новый стержень: %s\n"
+                "- Новый бонус к сбору риса: %s%%\n"
+                "- Новый бонус за друзей: %sx.",
+                vk_id, previous_core, new_core_type.value, user.rice_bonus, user.invited_users_bonus
             )
 
     # Применение бонусов и обновление уровня коллектива (если коллектив есть)
     collective_data = {}
     if collective:
         previous_collective_rating = collective.social_rating
-        await update_collective_type(session, collective)
-        await apply_collective_bonuses(session, user, collective)
+        await update_collective_type(session, collective, commit=False)
+        await apply_collective_bonuses(session, user, collective, commit=False)
         collective_data = await serialize_orm_object(collective, CollectiveRead)
         logger.info(
-            f"Обновлён коллектив для пользователя {vk_id}:\n"
-            f"- ID коллектива: {collective.id}\n"
-            f"- Рейтинг коллектива до обновления: {previous_collective_rating}\n"
-            f"- Рейтинг коллектива после обновления: {collective.social_rating}."
+            "Обновлён коллектив для пользователя %s:\n"
+            "- ID коллектива: %s\n"
+            "- Рейтинг коллектива до обновления: %s\n"
+            "- Рейтинг коллектива после обновления: %s.",
+            vk_id, collective.id, previous_collective_rating, collective.social_rating
         )
 
+    # Вход проверяет все условия достижений: так начисляются и правила, добавленные после прошлого входа.
+    # Бонусы достижений обновляют и загруженного пользователя, поэтому попадают в ответ
+    achievements = await award_rule_achievements(
+        session,
+        user.id,
+        UserCounters.from_user(user, click_accumulator.pending_rice(user.id), click_accumulator.pending_clicks(user.id)),
+        commit=False,
+    )
+
     # Сериализация данных пользователя
     user_data = await serialize_orm_object(user, UserRead)
 
     # Сохраняем изменения в базе данных
     await session.commit()
     logger.info(
-        f"Аутентификация пользователя {vk_id} завершена. Итоговые данные:\n"
-        f"- Рис: {user.rice}\n"
-        f"- Социальный рейтинг: {user.social_rating}\n"
-        f"- Текущий стержень: {user.current_core}\n"
-        f"- Время последнего входа: {user.last_entry}."
+        "Аутентификация пользователя %s завершена. Итоговые данные:\n"
+        "- Рис: %s\n"
+        "- Социальный рейтинг: %s\n"
+        "- Текущий стержень: %s\n"
+        "- Время последнего входа: %s.",
+        vk_id, user.rice, user.social_rating, user.current_core, user.last_entry
     )
 
-    return {"user": user_data, "collective": collective_data}
\ No newline at end of file
+    # Сессионный токен избавляет последующие запросы от проверки подписи VK и поиска пользователя
+    session_token = issue_session_token(user.id, user.vk_id, user.collective_id, user.role.value)
+
+    return {"user": user_data, "collective": collective_data, "achievements": achievements, "session_token": session_token}
\ No newline at end of file
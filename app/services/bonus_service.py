@@ -2,13 +2,15 @@ from typing import Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.crud.bonus import get_purchasable_bonus, get_user_bonus
-from app.crud.user import get_user, get_user_raw
+from app.crud.user import get_user, get_user_raw, update_user_rice_and_rating
 from app.models.bonus import PurchasableBonus, UserBonus
 from app.models.user import User
 from app.schemas.bonus import UserBonusRead
-from app.core.logger import logger
+from app.core.logger import get_logger
 import re
 
+logger = get_logger("economy")
+
 def calculate_bonus_cost(bonus: PurchasableBonus, user_bonus: Optional[UserBonus]) -> Tuple[int, int]:
     """
     Рассчитывает стоимость бонуса и уровень для пользователя.
@@ -21,28 +23,30 @@ def calculate_bonus_cost(bonus: PurchasableBonus, user_bonus: Optional[UserBonus
         # Если бонус ещё не был куплен
         total_cost = bonus.base_cost
         level = 1
-        logger.info(f"Первое приобретение бонуса. Стоимость: {total_cost}. Уровень: {level}.")
+        logger.info("Первое приобретение бонуса. Стоимость: %s. Уровень: %s.", total_cost, level)
     else:
         # Если бонус уже был куплен, рассчитываем следующий уровень и стоимость
         level = user_bonus.level + 1
         total_cost = int(user_bonus.total_cost + bonus.base_cost * (bonus.cost_modifier ** user_bonus.level))
-        logger.info(f"Повышение уровня бонуса. Новый уровень: {level}. Стоимость: {total_cost}.")
+        logger.info("Повышение уровня бонуса. Новый уровень: %s. Стоимость: %s.", level, total_cost)
     return total_cost, level
 
 
 
 def apply_bonus_effects(user: User, bonus: PurchasableBonus) -> None:
-    logger.info(f"Применение эффектов бонуса '{bonus.name}'.")
+    logger.info("Применение эффектов бонуса '%s'.", bonus.name)
     user.autocollect_rice_bonus += bonus.autocollect_rice_bonus
     user.autocollect_duration_bonus += bonus.autocollect_duration_bonus
     user.rice_bonus += bonus.rice_bonus
     user.invited_users_bonus += bonus.invited_users_bonus
     logger.info(
-        f"Эффекты применены:\n"
-        f"- Длительность автосбора: {user.autocollect_duration_bonus} мин.\n"
-        f"- Объём автосбора: {user.autocollect_rice_bonus} рис/час.\n"
-        f"- Бонус к ручному сбору риса: {user.rice_bonus}%.\n"
-        f"- Бонус за друзей: {user.invited_users_bonus}x."
+        "Эффекты применены:\n"
+        "- Длительность автосбора: %s мин.\n"
+        "- Объём автосбора: %s рис/час.\n"
+        "- Бонус к ручному сбору риса: %s%%.\n"
+        "- Бонус за друзей: %sx.",
+        user.autocollect_duration_bonus, user.autocollect_rice_bonus, user.rice_bonus,
+        user.invited_users_bonus
     )
 
 
@@ -57,12 +61,13 @@ async def update_user_bonus(
             total_cost=total_cost,
         )
         session.add(user_bonus)
-        logger.info(f"Добавлен новый бонус для пользователя ID {user_id}.")
+        logger.info("Добавлен новый бонус для пользователя ID %s.", user_id)
     else:
         logger.info(
-            f"Обновление бонуса для пользователя ID {user_id}:\n"
-            f"- Предыдущий уровень: {user_bonus.level}, новый уровень: {level}.\n"
-            f"- Стоимость обновлена с {user_bonus.total_cost} до {total_cost}."
+            "Обновление бонуса для пользователя ID %s:\n"
+            "- Предыдущий уровень: %s, новый уровень: %s.\n"
+            "- Стоимость обновлена с %s до %s.",
+            user_id, user_bonus.level, level, user_bonus.total_cost, total_cost
         )
         user_bonus.level = level
         user_bonus.total_cost = total_cost
@@ -89,24 +94,25 @@ def process_ogorod_tiapa(user: User, user_bonus: Optional[UserBonus], level: int
     else:
         # Последующие уровни
         logger.info(
-            f"Применение эффекта 'Огородная Тяпка' (уровень {level}):\n"
-            "- Длительность автосбора увеличена на 10 минут."
+            "Применение эффекта 'Огородная Тяпка' (уровень %s):\n"
+            "- Длительность автосбора увеличена на 10 минут.",
+            level
         )
         user.autocollect_duration_bonus += 10  # +10 минут
 
 
 async def purchase_bonus(session: AsyncSession, user_id: int, bonus_id: int) -> UserBonusRead:
-    logger.info(f"Начало обработки покупки бонуса с ID {bonus_id} для пользователя с ID {user_id}.")
+    logger.info("Начало обработки покупки бонуса с ID %s для пользователя с ID %s.", bonus_id, user_id)
 
     # Получение бонуса и пользователя
     bonus = await get_purchasable_bonus(session, bonus_id)
     if not bonus:
-        logger.error(f"Бонус с ID {bonus_id} не найден.")
+        logger.error("Бонус с ID %s не найден.", bonus_id)
         raise ValueError(f"Бонус с ID {bonus_id} не найден.")
 
     user = await get_user_raw(session, user_id)
     if not user:
-        logger.error(f"Пользователь с ID {user_id} не найден.")
+        logger.error("Пользователь с ID %s не найден.", user_id)
         raise ValueError(f"Пользователь с ID {user_id} не найден.")
 
     # Получение и проверка предыдущих покупок бонуса
@@ -117,10 +123,16 @@ async def purchase_bonus(session: AsyncSession, user_id: int, bonus_id: int) ->
 
     # Проверка баланса пользователя
     if user.rice < total_cost:
-        logger.error(f"Недостаточно риса для покупки бонуса. Требуется: {total_cost}, доступно: {user.rice}.")
+        logger.error("Недостаточно риса для покупки бонуса. Требуется: %s, доступно: %s.", total_cost, user.rice)
         raise ValueError(f"Недостаточно риса для покупки бонуса: требуется {total_cost}, доступно {user.rice}.")
-    user.rice -= total_cost
-    logger.info(f"Списание стоимости бонуса. Остаток риса: {user.rice}.")
+
+    # Списание — дельтой с проверкой баланса в самом UPDATE: накопитель кликов этого и других
+    # процессов пишет рис параллельно, и абсолютное значение затёрло бы его запись
+    balance = await update_user_rice_and_rating(session, user_id, total_cost, 0, commit=False)
+    if not balance:
+        logger.error("Недостаточно риса для покупки бонуса. Требуется: %s.", total_cost)
+        raise ValueError(f"Недостаточно риса для покупки бонуса: требуется {total_cost}.")
+    logger.info("Списание стоимости бонуса. Остаток риса: %s.", balance.rice)
 
     # Особая обработка "Огородной Тяпки"
     if bonus.name.lower() == "огородный тяпка":
@@ -138,10 +150,11 @@ async def purchase_bonus(session: AsyncSession, user_id: int, bonus_id: int) ->
     await session.refresh(user_bonus)
 
     logger.info(
-        f"Бонус '{bonus.name}' успешно сохранён для пользователя (ID: {user.id}):\n"
-        f"- Уровень: {user_bonus.level}.\n"
-        f"- Общая стоимость: {user_bonus.total_cost}.\n"
-        f"- Рис: {user.rice}."
+        "Бонус '%s' успешно сохранён для пользователя (ID: %s):\n"
+        "- Уровень: %s.\n"
+        "- Общая стоимость: %s.\n"
+        "- Рис: %s.",
+        bonus.name, user.id, user_bonus.level, user_bonus.total_cost, user.rice
     )
 
     return UserBonusRead(
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Optional
+from sqlalchemy import case, update
+from app.core.database import SessionLocal
+from app.core.game_settings import CLICK_FLUSH_INTERVAL_MS, CLICK_FLUSH_MAX_CLICKS
+from app.core.logger import get_logger
+from app.models.user import User
+
+logger = get_logger("clicker")
+
+
+class ClickAccumulator:
+    """
+    Накопитель кликов с отложенной записью (write-behind).
+
+    Заработанный рис складывается в буфер в памяти процесса, а в таблицу `users`
+    попадает одним UPDATE для всех пользователей сразу: раз в `flush_interval_ms`
+    или досрочно, когда накопилось `max_clicks` кликов.
+    """
+
+    def __init__(self, flush_interval_ms: int, max_clicks: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_clicks = max_clicks
+
+        self._pending: dict[int, list[int]] = {}  # user_id -> [рис, клики], ещё не отправленные в базу
+        self._inflight: dict[int, list[int]] = {}  # Дельты, которые сейчас записываются в базу
+        self._pending_clicks = 0
+
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, user_id: int, rice: int, clicks: int = 0) -> int:
+        """
+        Добавляет заработанный рис в буфер пользователя.
+
+        :param user_id: ID пользователя.
+        :param rice: Количество риса для добавления.
+        :param clicks: Количество кликов, принесших этот рис.
+        :return: Весь ещё не записанный в базу рис пользователя.
+        """
+        entry = self._pending.setdefault(user_id, [0, 0])
+        entry[0] += rice
+        entry[1] += clicks
+
+        self._pending_clicks += clicks
+        if self._pending_clicks >= self.max_clicks:
+            self._wakeup.set()
+
+        return self.pending_rice(user_id)
+
+    def pending_rice(self, user_id: int) -> int:
+        """
+        Возвращает рис пользователя, который ещё не отражён в таблице `users`.
+        """
+        pending = self._pending.get(user_id)
+        inflight = self._inflight.get(user_id)
+        return (pending[0] if pending else 0) + (inflight[0] if inflight else 0)
+
+    def pending_clicks(self, user_id: int) -> int:
+        """
+        Возвращает клики пользователя, которые ещё не отражены в таблице `users`.
+        """
+        pending = self._pending.get(user_id)
+        inflight = self._inflight.get(user_id)
+        return (pending[1] if pending else 0) + (inflight[1] if inflight else 0)
+
+    async def flush(self) -> int:
+        """
+        Записывает все накопленные дельты в базу одним UPDATE.
+
+        :return: Количество обновлённых пользователей.
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            self._pending_clicks = 0
+
+            try:
+                async with SessionLocal() as session:
+                    await session.execute(
+                        update(User)
+                        .where(User.id.in_(batch))
+                        .values(
+                            rice=User.rice + case({user_id: delta[0] for user_id, delta in batch.items()}, value=User.id, else_=0),
+                            clicks=User.clicks + case({user_id: delta[1] for user_id, delta in batch.items()}, value=User.id, else_=0),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+            except BaseException:
+                # Возвращаем дельты в буфер, чтобы не потерять рис при ошибке базы или отмене задачи
+                for user_id, (rice, clicks) in batch.items():
+                    entry = self._pending.setdefault(user_id, [0, 0])
+                    entry[0] += rice
+                    entry[1] += clicks
+                    self._pending_clicks += clicks
+                raise
+            finally:
+                self._inflight = {}
+
+        logger.info("Накопитель кликов записал рис для %s пользователей.", len(batch))
+        return len(batch)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Ошибка при записи накопленных кликов: %s", e)
+
+    def start(self) -> None:
+        """
+        Запускает фоновую задачу периодической записи.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую задачу и записывает остаток буфера.
+
+        Задача не отменяется, а дожидается своей последней записи: отмена посреди
+        `flush()` прервала бы запись пачки, которая уже вынута из буфера.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+
+        await self.flush()
+
+
+click_accumulator = ClickAccumulator(CLICK_FLUSH_INTERVAL_MS, CLICK_FLUSH_MAX_CLICKS)
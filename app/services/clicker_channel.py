@@ -0,0 +1,162 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi import WebSocket
+from app.core.database import SessionLocal
+from app.core.game_settings import CLICKER_WS_REFRESH_SECONDS, CLICKS_PER_SECOND_LIMIT, RICE_PER_CLICK
+from app.core.logger import get_logger
+from app.crud.collective import get_collective
+from app.crud.user import get_user
+from app.models.collective import CollectiveType
+from app.schemas.achievement import UserAchievementRead
+from app.schemas.user import UserRead
+from app.services.achievement_rules import UserCounters
+from app.services.achievement_service import award_rule_achievements, has_rule_candidates
+from app.services.click_accumulator import click_accumulator
+from app.services.clicker_service import CLICK_COUNTERS, refresh_user_core, rice_multiplier
+
+logger = get_logger("clicker")
+
+
+class ClickerChannel:
+    """
+    Состояние WebSocket-канала кликера одного пользователя.
+
+    Пользователь загружается один раз при подключении, клики копятся в общем
+    накопителе (`click_accumulator`), а данные пользователя и совхоза периодически
+    перечитываются из базы, чтобы отправлять клиенту смену стержня и уровня совхоза.
+
+    Между перечитываниями накопитель успевает записать клики в базу, и `self.user`
+    их уже не видит. Поэтому рис и клики сверх `self.user` считаются от момента
+    перечитывания: не записанное на тот момент плюс добавленное каналом после него.
+    """
+
+    def __init__(self, websocket: WebSocket, user: UserRead):
+        self.websocket = websocket
+        self.collective_type: Optional[CollectiveType] = None
+        self._set_user(user)
+
+        self._send_lock = asyncio.Lock()
+        self._second = 0
+        self._second_clicks = 0
+
+    def _set_user(self, user: UserRead) -> None:
+        # Вызывается сразу после чтения из базы, без await между чтением и снимком накопителя
+        self.user = user
+        self._unflushed_rice = click_accumulator.pending_rice(user.id)
+        self._unflushed_clicks = click_accumulator.pending_clicks(user.id)
+
+    def total_rice(self) -> int:
+        return self.user.rice + self._unflushed_rice
+
+    def counters(self) -> UserCounters:
+        return UserCounters.from_user(self.user, self._unflushed_rice, self._unflushed_clicks)
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "state",
+            "total_rice": self.total_rice(),
+            "social_rating": self.user.social_rating,
+            "current_core": self.user.current_core,
+            "collective_type": self.collective_type.value if self.collective_type else None,
+        }
+
+    async def send(self, payload: dict) -> None:
+        # Клики и фоновое обновление отправляют сообщения из разных задач
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    async def handle_frame(self, frame: dict) -> None:
+        """
+        Обрабатывает кадр от клиента вида `{"type": "click", "count": N}`.
+        """
+        if not isinstance(frame, dict) or frame.get("type") != "click":
+            await self.send({"type": "error", "detail": "Неизвестный тип кадра."})
+            return
+
+        count = frame.get("count")
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            await self.send({"type": "error", "detail": "Некорректное количество кликов."})
+            return
+
+        # Лимит кликов считается по серверным секундам в рамках соединения
+        second = int(time.monotonic())
+        if second != self._second:
+            self._second = second
+            self._second_clicks = 0
+        if self._second_clicks + count > CLICKS_PER_SECOND_LIMIT:
+            await self.send({"type": "error", "detail": f"Превышен лимит {CLICKS_PER_SECOND_LIMIT} кликов в секунду."})
+            return
+        self._second_clicks += count
+
+        added_rice = int(count * RICE_PER_CLICK * rice_multiplier(self.user))
+        click_accumulator.add(self.user.id, added_rice, clicks=count)
+        self._unflushed_rice += added_rice
+        self._unflushed_clicks += count
+
+        await self.send({"type": "click", "added_rice": added_rice, "total_rice": self.total_rice()})
+
+        # Сессия нужна только если какое-то условие сработало
+        counters = self.counters()
+        if has_rule_candidates(self.user.id, counters, CLICK_COUNTERS):
+            async with SessionLocal() as session:
+                achievements = await award_rule_achievements(session, self.user.id, counters, CLICK_COUNTERS)
+            await self.send_achievements(achievements)
+
+    async def send_achievements(self, achievements: list[UserAchievementRead]) -> None:
+        for achievement in achievements:
+            await self.send({"type": "achievement", **achievement.model_dump(mode="json")})
+
+    async def refresh(self, notify: bool = True) -> bool:
+        """
+        Перечитывает пользователя и совхоз, применяет смену стержня и рассылает изменения.
+
+        :param notify: Отправлять ли клиенту сообщения об изменениях.
+        :return: `False`, если пользователь больше не существует.
+        """
+        async with SessionLocal() as session:
+            user = await get_user(session, self.user.id)
+            if not user:
+                return False
+            self._set_user(user)
+
+            changed = CLICK_COUNTERS
+            new_core = await refresh_user_core(session, user)
+            if new_core:
+                # Смена стержня меняет бонусы пользователя
+                user = await get_user(session, self.user.id)
+                self._set_user(user)
+                changed += ("core",)
+                if notify:
+                    await self.send({"type": "core", "current_core": new_core.value})
+
+            # Заодно подхватываются правила, изменённые в справочнике после прошлой проверки
+            achievements = await award_rule_achievements(session, user.id, self.counters(), changed)
+            if notify:
+                await self.send_achievements(achievements)
+
+            collective_type = None
+            if user.collective_id:
+                collective = await get_collective(session, user.collective_id)
+                collective_type = collective.type if collective else None
+
+        if notify and collective_type != self.collective_type and collective_type is not None:
+            await self.send({
+                "type": "collective",
+                "collective_type": collective_type.value,
+                "collective_name": collective_type.localized_name(),
+            })
+
+        self.collective_type = collective_type
+        return True
+
+    async def refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(CLICKER_WS_REFRESH_SECONDS)
+            try:
+                if not await self.refresh():
+                    await self.websocket.close()
+                    return
+                await self.send({"type": "state", "total_rice": self.total_rice()})
+            except Exception as e:
+                logger.error("Ошибка обновления WebSocket-канала пользователя %s: %s", self.user.vk_id, e)
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.game_settings import (
+    CLICK_BATCH_CLOCK_SKEW_SECONDS,
+    CLICK_BATCH_MAX_AGE_SECONDS,
+    CLICKS_PER_SECOND_LIMIT,
+    RICE_PER_CLICK,
+)
+from app.core.logger import get_logger, log_event
+from app.crud.user import get_user_raw, update_user_rice
+from app.models.user import CoreType
+from app.services.achievement_rules import UserCounters
+from app.services.achievement_service import award_rule_achievements
+from app.schemas.achievement import UserAchievementRead
+from app.schemas.clicker import ClickBatch, ClickBatchResult
+from app.schemas.user import UserBase
+from app.services.click_accumulator import click_accumulator
+from app.services.core_service import determine_new_core_type, update_user_core
+
+logger = get_logger("clicker")
+
+# Счётчики, которые меняет клик
+CLICK_COUNTERS = ("rice", "clicks")
+
+
+# Время последней принятой пачки по каждому пользователю: защищает от повторной отправки тех же пачек
+_last_batch_at: dict[int, datetime] = {}
+_LAST_BATCH_PRUNE_SIZE = 100_000
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+def _remember_last_batch(user_id: int, timestamp: datetime, now: datetime) -> None:
+    _last_batch_at[user_id] = timestamp
+
+    # Отметки старше окна приёма пачек больше ничего не защищают
+    if len(_last_batch_at) > _LAST_BATCH_PRUNE_SIZE:
+        oldest_allowed = now - timedelta(seconds=CLICK_BATCH_MAX_AGE_SECONDS)
+        for stale_user_id in [uid for uid, ts in _last_batch_at.items() if ts < oldest_allowed]:
+            del _last_batch_at[stale_user_id]
+
+
+def _forget_last_batch(user_id: int, timestamp: datetime, previous: Optional[datetime]) -> None:
+    # Откатываем отметку, только если её не сдвинула более поздняя пачка
+    if _last_batch_at.get(user_id) != timestamp:
+        return
+    if previous is None:
+        del _last_batch_at[user_id]
+    else:
+        _last_batch_at[user_id] = previous
+
+
+def rice_multiplier(user: UserBase) -> float:
+    """
+    Возвращает множитель ручного сбора риса с учётом личного бонуса и бонуса совхоза.
+    """
+    return 1 + user.rice_bonus / 100 + user.collective_rice_boost / 100
+
+
+def validate_click_batches(user_id: int, batches: list[ClickBatch], now: datetime) -> int:
+    """
+    Проверяет пачки кликов на лимиты и возвращает суммарное количество кликов.
+
+    :param user_id: ID пользователя.
+    :param batches: Пачки кликов от клиента.
+    :param now: Текущее время сервера.
+    :return: Суммарное количество кликов.
+    :raises ValueError: Если пачки нарушают ограничения.
+    """
+    oldest_allowed = now - timedelta(seconds=CLICK_BATCH_MAX_AGE_SECONDS)
+    newest_allowed = now + timedelta(seconds=CLICK_BATCH_CLOCK_SKEW_SECONDS)
+    last_accepted = _last_batch_at.get(user_id)
+
+    clicks_per_second: dict[int, int] = defaultdict(int)
+    for batch in batches:
+        timestamp = _as_utc(batch.timestamp)
+        if timestamp < oldest_allowed or timestamp > newest_allowed:
+            raise ValueError(f"Пачка кликов с временем {timestamp.isoformat()} вне допустимого окна.")
+        if last_accepted and timestamp <= last_accepted:
+            raise ValueError(f"Пачка кликов с временем {timestamp.isoformat()} уже была учтена.")
+
+        second = int(timestamp.timestamp())
+        clicks_per_second[second] += batch.count
+        if clicks_per_second[second] > CLICKS_PER_SECOND_LIMIT:
+            raise ValueError(f"Превышен лимит {CLICKS_PER_SECOND_LIMIT} кликов в секунду.")
+
+    return sum(clicks_per_second.values())
+
+
+async def refresh_user_core(session: AsyncSession, user: UserBase) -> Optional[CoreType]:
+    """
+    Проверяет, положен ли пользователю новый стержень, и при необходимости обновляет его.
+    Строка пользователя загружается из базы только при смене стержня.
+
+    :return: Новый стержень или None, если стержень не изменился.
+    """
+    current_core = CoreType[user.current_core]
+    new_core_type = determine_new_core_type(user.social_rating, current_core)
+    if new_core_type == current_core:
+        return None
+
+    db_user = await get_user_raw(session, user.id)
+    if await update_user_core(session, db_user, new_core_type):
+        logger.info(
+            "Смена стержня для пользователя %s:\n"
+            "- Старый стержень: %s\n"
+            "- Новый стержень: %s.",
+            user.vk_id, current_core.value, new_core_type.value
+        )
+        return new_core_type
+    return None
+
+
+async def submit_click_batches(session: AsyncSession, user: UserBase, batches: list[ClickBatch]) -> ClickBatchResult:
+    """
+    Засчитывает пачки кликов одной транзакцией.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user: Данные пользователя.
+    :param batches: Пачки кликов от клиента.
+    :return: Итог обработки пачек.
+    :raises ValueError: Если пачки нарушают ограничения.
+    """
+    now = datetime.now(timezone.utc)
+    total_clicks = validate_click_batches(user.id, batches, now)
+
+    # Отметку ставим до записи в базу, чтобы параллельный повтор тех же пачек был отклонён,
+    # и снимаем, если запись не удалась: иначе повтор клиента после ошибки считался бы дублем
+    previous_batch_at = _last_batch_at.get(user.id)
+    newest_batch_at = max(_as_utc(batch.timestamp) for batch in batches)
+    _remember_last_batch(user.id, newest_batch_at, now)
+
+    # Бонусы применяются один раз ко всей сумме кликов
+    added_rice = int(total_clicks * RICE_PER_CLICK * rice_multiplier(user))
+
+    try:
+        balance = await update_user_rice(session, user.id, added_rice, clicks_to_add=total_clicks)
+        if not balance:
+            raise ValueError(f"Пользователь с ID {user.id} не найден.")
+    except BaseException:
+        _forget_last_batch(user.id, newest_batch_at, previous_batch_at)
+        raise
+
+    log_event(
+        logger, "clicker.batch",
+        "Пользователь %(vk_id)s отправил %(batches)s пачек кликов: %(clicks)s кликов, %(delta)s риса.",
+        user_id=user.id,
+        vk_id=user.vk_id,
+        batches=len(batches),
+        clicks=total_clicks,
+        delta=added_rice,
+    )
+
+    new_core = await refresh_user_core(session, user)
+
+    # Условия достижений проверяются по счётчикам, только что возвращённым UPDATE
+    achievements = await award_click_achievements(session, user.id, balance, new_core)
+
+    return ClickBatchResult(
+        status="success",
+        accepted_clicks=total_clicks,
+        added_rice=added_rice,
+        total_rice=balance.rice + click_accumulator.pending_rice(user.id),
+        new_core=new_core.value if new_core else None,
+        achievements=achievements,
+    )
+
+
+async def award_click_achievements(
+    session: AsyncSession,
+    user_id: int,
+    user: Any,
+    new_core: Optional[CoreType] = None,
+) -> list[UserAchievementRead]:
+    """
+    Проверяет условия достижений, зависящие от риса, кликов и (при смене) стержня.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param user_id: ID пользователя.
+    :param user: Последние известные счётчики пользователя из базы (схема или `UserBalance`);
+        клики из накопителя добавляются к ним.
+    :param new_core: Новый стержень, если он сменился.
+    :return: Начисленные достижения.
+    """
+    counters = UserCounters.from_user(user, click_accumulator.pending_rice(user_id), click_accumulator.pending_clicks(user_id))
+    changed = CLICK_COUNTERS
+    if new_core:
+        counters, changed = counters._replace(core=new_core), changed + ("core",)
+    return await award_rule_achievements(session, user_id, counters, changed)
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.collective import Collective, CollectiveType, collective_factory
+from app.models.collective import Collective, CollectiveType
 from app.models.user import User
 from app.crud.collective import get_collective, create_collective
 from app.schemas.collective import CollectiveCreate
@@ -9,18 +9,22 @@ from sqlalchemy.orm import selectinload
 from app.schemas.collective import CollectiveCreate
 from app.utils.vk_api import get_group_info
 from app.crud.collective import get_collective, create_collective
-from app.core.logger import logger 
+from app.core.logger import get_logger
+from app.services.progression import collective_bonuses, collective_type_for_rating
 
+logger = get_logger("economy")
 
-async def get_or_create_collective(session: AsyncSession, group_id: str) -> Collective:
+
+async def get_or_create_collective(session: AsyncSession, group_id: str, commit: bool = True) -> Collective:
     """
     Проверяет существование коллектива или создает новый.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param group_id: ID группы VK.
+    :param commit: Фиксировать ли транзакцию после создания коллектива.
     :return: Объект коллектива.
     """
-    logger.info(f"Проверка существования коллектива с ID группы {group_id}.")
+    logger.info("Проверка существования коллектива с ID группы %s.", group_id)
 
     # Проверяем наличие коллектива с указанным group_id
     result = await session.execute(
@@ -30,7 +34,7 @@ async def get_or_create_collective(session: AsyncSession, group_id: str) -> Coll
 
     # Если коллектив не найден, создаем новый
     if not collective:
-        logger.info(f"Коллектив с ID {group_id} не найден. Создаём новый коллектив.")
+        logger.info("Коллектив с ID %s не найден. Создаём новый коллектив.", group_id)
         
         group_info = await get_group_info(group_id)  # Предполагается, что эта функция возвращает данные о группе
         collective_data = CollectiveCreate(
@@ -38,11 +42,11 @@ async def get_or_create_collective(session: AsyncSession, group_id: str) -> Coll
             social_rating=0,
             group_id=group_id
         )
-        collective = await create_collective(session, collective_data)
+        collective = await create_collective(session, collective_data, commit=commit)
 
-        logger.info(f"Создан новый коллектив: {collective.name} (ID: {collective.id}).")
+        logger.info("Создан новый коллектив: %s (ID: %s).", collective.name, collective.id)
     else:
-        logger.info(f"Коллектив с ID {group_id} найден: {collective.name} (ID: {collective.id}).")
+        logger.info("Коллектив с ID %s найден: %s (ID: %s).", group_id, collective.name, collective.id)
 
     return collective
 
@@ -55,43 +59,38 @@ def determine_new_collective_type(social_rating: int, current_type: CollectiveTy
     :param current_type: Текущий тип коллектива.
     :return: Новый (или тот же) тип коллектива.
     """
-    all_types = list(CollectiveType)
-    current_index = all_types.index(current_type)
-
-    # Перебираем уровни от большего к меньшему
-    for collective_type in reversed(all_types):  # Ограничиваем до текущего уровня включительно
-        bonuses = collective_factory(collective_type)
-        if social_rating >= bonuses.get("required_rating", 0):
-            return collective_type
-
-    return all_types[0]  # Если ничего не подошло, возвращаем самый начальный тип
+    return collective_type_for_rating(social_rating)
 
 
 
-async def apply_collective_bonuses(session: AsyncSession, user: User, collective: Collective):
+async def apply_collective_bonuses(session: AsyncSession, user: User, collective: Collective, commit: bool = True):
     """
     Применяет бонусы совхоза к пользователю, обновляя их с учётом текущего уровня совхоза.
+    При `commit=False` изменения только добавляются в сессию.
     """
-    logger.info(f"Начало применения бонусов совхоза {collective.type.value} для пользователя {user.vk_id}.")
+    logger.info("Начало применения бонусов совхоза %s для пользователя %s.", collective.type.value, user.vk_id)
 
     # Проверяем, был ли обновлён уровень совхоза
     if user.current_collective_type == collective.type:
         logger.info(
-            f"Бонусы совхоза {collective.type.value} уже применены для пользователя {user.vk_id}. "
-            f"Текущие бонусы: rice_boost={user.collective_rice_boost}, autocollect_bonus={user.collective_autocollect_bonus}."
+            "Бонусы совхоза %s уже применены для пользователя %s. "
+            "Текущие бонусы: rice_boost=%s, autocollect_bonus=%s.",
+            collective.type.value, user.vk_id, user.collective_rice_boost, user.collective_autocollect_bonus
         )
         return
 
     # Получаем бонусы текущего уровня совхоза
-    bonuses = collective_factory(collective.type)
-    new_rice_boost = int(bonuses.get("rice_boost", 0) * 100)
-    new_autocollect_bonus = int(bonuses.get("autocollect_bonus", 0) * 100)
+    bonuses = collective_bonuses(collective.type)
+    new_rice_boost = bonuses.rice_boost
+    new_autocollect_bonus = bonuses.autocollect_bonus
 
     # Логируем изменения
     logger.info(
-        f"Применение новых бонусов: rice_boost={new_rice_boost}, autocollect_bonus={new_autocollect_bonus}. "
-        f"Старые значения для пользователя {user.vk_id}: rice_boost={user.collective_rice_boost}, "
-        f"autocollect_bonus={user.collective_autocollect_bonus}."
+        "Применение новых бонусов: rice_boost=%s, autocollect_bonus=%s. "
+        "Старые значения для пользователя %s: rice_boost=%s, "
+        "autocollect_bonus=%s.",
+        new_rice_boost, new_autocollect_bonus, user.vk_id, user.collective_rice_boost,
+        user.collective_autocollect_bonus
     )
 
     # Обновляем бонусы, добавляя новые к существующим
@@ -103,35 +102,40 @@ async def apply_collective_bonuses(session: AsyncSession, user: User, collective
 
     # Сохраняем изменения
     session.add(user)
-    await session.commit()
+    if commit:
+        await session.commit()
 
     logger.info(
-        f"Обновлённые бонусы для пользователя {user.vk_id}: "
-        f"rice_boost={user.collective_rice_boost}, autocollect_bonus={user.collective_autocollect_bonus}, "
-        f"current_collective_type={user.current_collective_type}."
+        "Обновлённые бонусы для пользователя %s: "
+        "rice_boost=%s, autocollect_bonus=%s, "
+        "current_collective_type=%s.",
+        user.vk_id, user.collective_rice_boost, user.collective_autocollect_bonus,
+        user.current_collective_type
     )
 
         
-async def update_collective_type(session: AsyncSession, collective: Collective) -> bool:
+async def update_collective_type(session: AsyncSession, collective: Collective, commit: bool = True) -> bool:
     """
     Проверяет и обновляет тип совхоза на основании его социального рейтинга.
     
     :param session: Асинхронная сессия SQLAlchemy.
     :param collective: Объект совхоза.
+    :param commit: Фиксировать ли транзакцию.
     :return: `True`, если тип был обновлён, иначе `False`.
     """
     new_type = determine_new_collective_type(collective.social_rating, collective.type)
 
     if new_type != collective.type:
         logger.info(
-            f"Обновление типа совхоза {collective.name}: {collective.type.localized_name()} -> {new_type.localized_name()}."
+            "Обновление типа совхоза %s: %s -> %s.", collective.name, collective.type.localized_name(), new_type.localized_name()
         )
         collective.type = new_type
         session.add(collective)
-        await session.commit()
+        if commit:
+            await session.commit()
         return True
 
-    logger.info(f"Тип совхоза {collective.name} остаётся неизменным ({collective.type.localized_name()}).")
+    logger.info("Тип совхоза %s остаётся неизменным (%s).", collective.name, collective.type.localized_name())
     return False
 
 
@@ -1,44 +1,37 @@
 from enum import Enum
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.user import CoreType, User, core_factory, get_all_cores
+from app.models.user import CoreType, User
+from app.services.progression import core_bonuses, core_for_rating, core_required_rating
 
-async def update_user_core(session: AsyncSession, user: User, new_core_type: CoreType) -> bool:
+async def update_user_core(session: AsyncSession, user: User, new_core_type: CoreType, commit: bool = True) -> bool:
     """
     Обновляет стержень пользователя, добавляя бонусы нового стержня и предыдущих.
+    При `commit=False` изменения только добавляются в сессию.
 
     :return: `True`, если стержень успешно обновлён, иначе `False`.
     """
-    all_cores = get_all_cores()
-    new_core = core_factory(new_core_type)
-
     # Проверка: можно ли перейти на новый стержень
-    if user.social_rating < new_core.required_rating:
+    if user.social_rating < core_required_rating(new_core_type):
         return False  # Недостаточно рейтинга — не обновляем стержень
 
     # Если текущий стержень уже соответствует новому, ничего не делаем
     if user.current_core == new_core_type.value:
         return False
 
-    # Накопление бонусов от всех предыдущих стержней
-    cumulative_bonuses = {"rice_boost": 0, "party_respect": 0, "badge_boost": 0}
-    for core in all_cores:
-        if user.social_rating >= core.required_rating:
-            for bonus, value in core.bonuses.items():
-                cumulative_bonuses[bonus] = cumulative_bonuses.get(bonus, 0) + value
-
-        # Останавливаемся на текущем стержне
-        if core.type == new_core.type:  # Исправлено: используем type вместо name
-            break
+    # Бонусы всех предыдущих стержней накоплены заранее
+    cumulative_bonuses = core_bonuses(new_core_type)
 
     # Обновление пользователя
     user.current_core = new_core_type.value
-    user.rice_bonus = int(cumulative_bonuses.get("rice_boost", 0) * 100)  # Конвертируем множитель в проценты
-    user.social_rating += cumulative_bonuses.get("party_respect", 0)
-    user.invited_users_bonus = cumulative_bonuses.get("badge_boost", 0)
+    user.rice_bonus = int(cumulative_bonuses.rice_boost * 100)  # Конвертируем множитель в проценты
+    user.social_rating += cumulative_bonuses.party_respect
+    # Столбец целочисленный; дробный множитель нефритового стержня (0.5) иначе ломал сериализацию пользователя
+    user.invited_users_bonus = int(cumulative_bonuses.badge_boost)
 
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    if commit:
+        await session.commit()
+        await session.refresh(user)
 
     return True
 
@@ -52,13 +45,4 @@ def determine_new_core_type(social_rating: int, current_core: CoreType) -> CoreT
     :param current_core: Текущий уровень стержня пользователя.
     :return: Тип стержня (CoreType).
     """
-    all_cores = get_all_cores()
-
-    for core in reversed(all_cores):  # Начинаем с самого высокого стержня
-        if social_rating >= core.required_rating:
-            if core.type != current_core:
-                return core.type  # Возвращаем новый уровень, если он выше текущего
-            return current_core  # Возвращаем текущий, если он актуален
-
-    # Если рейтинг слишком низкий, остаёмся на базовом уровне
-    return CoreType.COPPER
+    return core_for_rating(social_rating)
@@ -0,0 +1,154 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+from app.models.achievement import AchievementType
+from app.models.collective import CollectiveType, collective_factory
+from app.models.user import CoreType, get_all_cores
+
+
+class CoreBonuses(NamedTuple):
+    """
+    Суммарные бонусы стержня с учётом всех предыдущих стержней.
+    """
+    rice_boost: float
+    party_respect: int
+    badge_boost: float
+
+
+class CollectiveBonuses(NamedTuple):
+    """
+    Бонусы уровня совхоза в процентах.
+    """
+    rice_boost: int
+    autocollect_bonus: int
+
+
+class ProgressionTiers(NamedTuple):
+    """
+    Результат массовой оценки уровней для списка рейтингов.
+    """
+    cores: list[CoreType]
+    collectives: list[CollectiveType]
+
+
+# Таблицы строятся один раз при импорте: пороги в компактных массивах, бонусы — заранее накопленными
+CORE_TYPES: tuple[CoreType, ...] = tuple(core.type for core in get_all_cores())
+CORE_THRESHOLDS = array("q", (core.required_rating for core in get_all_cores()))
+
+
+def _accumulate_core_bonuses() -> tuple[CoreBonuses, ...]:
+    cumulative = {"rice_boost": 0, "party_respect": 0, "badge_boost": 0}
+    result = []
+    for core in get_all_cores():
+        for bonus, value in core.bonuses.items():
+            cumulative[bonus] = cumulative.get(bonus, 0) + value
+        result.append(CoreBonuses(**cumulative))
+    return tuple(result)
+
+
+CORE_CUMULATIVE_BONUSES: tuple[CoreBonuses, ...] = _accumulate_core_bonuses()
+_CORE_INDEX: dict[CoreType, int] = {core_type: index for index, core_type in enumerate(CORE_TYPES)}
+
+COLLECTIVE_TYPES: tuple[CollectiveType, ...] = tuple(CollectiveType)
+COLLECTIVE_THRESHOLDS = array("q", (int(collective_factory(t)["required_rating"]) for t in COLLECTIVE_TYPES))
+COLLECTIVE_BONUSES: tuple[CollectiveBonuses, ...] = tuple(
+    CollectiveBonuses(
+        rice_boost=int(collective_factory(t).get("rice_boost", 0) * 100),
+        autocollect_bonus=int(collective_factory(t).get("autocollect_bonus", 0) * 100),
+    )
+    for t in COLLECTIVE_TYPES
+)
+_COLLECTIVE_INDEX: dict[CollectiveType, int] = {t: index for index, t in enumerate(COLLECTIVE_TYPES)}
+
+# bisect опирается на возрастающие пороги
+assert list(CORE_THRESHOLDS) == sorted(CORE_THRESHOLDS)
+assert list(COLLECTIVE_THRESHOLDS) == sorted(COLLECTIVE_THRESHOLDS)
+
+
+def core_for_rating(social_rating: int) -> CoreType:
+    """
+    Возвращает стержень, соответствующий рейтингу. Ниже первого порога — базовый стержень.
+    """
+    return CORE_TYPES[max(bisect_right(CORE_THRESHOLDS, social_rating) - 1, 0)]
+
+
+def core_bonuses(core_type: CoreType) -> CoreBonuses:
+    """
+    Возвращает накопленные бонусы стержня и всех предыдущих.
+    """
+    return CORE_CUMULATIVE_BONUSES[_CORE_INDEX[core_type]]
+
+
+def core_required_rating(core_type: CoreType) -> int:
+    return CORE_THRESHOLDS[_CORE_INDEX[core_type]]
+
+
+def core_rank(core_type: CoreType) -> int:
+    """
+    Порядковый номер стержня: чем выше стержень, тем больше номер.
+    """
+    return _CORE_INDEX[core_type]
+
+
+def collective_type_for_rating(social_rating: int) -> CollectiveType:
+    """
+    Возвращает тип совхоза, соответствующий рейтингу.
+    """
+    return COLLECTIVE_TYPES[max(bisect_right(COLLECTIVE_THRESHOLDS, social_rating) - 1, 0)]
+
+
+def collective_bonuses(collective_type: CollectiveType) -> CollectiveBonuses:
+    return COLLECTIVE_BONUSES[_COLLECTIVE_INDEX[collective_type]]
+
+
+def next_collective_type(collective_type: CollectiveType) -> Optional[CollectiveType]:
+    """
+    Возвращает следующий уровень совхоза или None для максимального уровня.
+    """
+    index = _COLLECTIVE_INDEX[collective_type] + 1
+    return COLLECTIVE_TYPES[index] if index < len(COLLECTIVE_TYPES) else None
+
+
+def collective_required_rating(collective_type: CollectiveType) -> int:
+    return COLLECTIVE_THRESHOLDS[_COLLECTIVE_INDEX[collective_type]]
+
+
+def evaluate_tiers(ratings: Iterable[int]) -> ProgressionTiers:
+    """
+    Оценивает стержень и уровень совхоза сразу для многих рейтингов.
+
+    :param ratings: Социальные рейтинги.
+    :return: Списки стержней и типов совхоза в порядке входных рейтингов.
+    """
+    core_thresholds, collective_thresholds = CORE_THRESHOLDS, COLLECTIVE_THRESHOLDS
+    core_types, collective_types = CORE_TYPES, COLLECTIVE_TYPES
+
+    core_indices = []
+    collective_indices = []
+    for rating in ratings:
+        core_indices.append(bisect_right(core_thresholds, rating) - 1)
+        collective_indices.append(bisect_right(collective_thresholds, rating) - 1)
+
+    return ProgressionTiers(
+        cores=[core_types[index if index > 0 else 0] for index in core_indices],
+        collectives=[collective_types[index if index > 0 else 0] for index in collective_indices],
+    )
+
+
+def next_eligible_at(achievement_type: AchievementType, claimed_at: datetime) -> Optional[datetime]:
+    """
+    Момент, начиная с которого достижение можно получить повторно.
+
+    :param achievement_type: Тип достижения.
+    :param claimed_at: Время начисления (UTC).
+    :return: Время следующего получения или None, если повторно достижение не начисляется.
+    """
+    if achievement_type == AchievementType.DAYLY:
+        # Ежедневное — со следующих суток по UTC
+        return claimed_at.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    if achievement_type == AchievementType.WEEKLY:
+        return claimed_at + timedelta(days=7)
+
+    return None  # Уникальное достижение нельзя получить больше одного раза.
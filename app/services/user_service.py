@@ -2,19 +2,22 @@ from app.models.collective import Collective
 from app.models.user import CoreType, User, UserRoles
 from app.schemas.user import UserBase, UserCreate, UserRead, UserUpdate
 from app.schemas.collective import CollectiveBase, CollectiveCreate
+from app.crud.collective import CollectiveRating, increment_collective_rating
 from app.crud.user import create_user, get_user_by_vk_id, update_user, update_user_collective
 from app.services.collective_service import get_or_create_collective
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional, Union
-from app.core.logger import logger
+from app.core.logger import get_logger, log_event
 from datetime import datetime, timezone
 
 from app.services.other import serialize_orm_object
 
+logger = get_logger("economy")
+
 
 async def create_or_update_user(
-    session: AsyncSession, vk_id: str, group_id: Optional[int] = None
+    session: AsyncSession, vk_id: str, group_id: Optional[int] = None, commit: bool = True
 ) -> dict:
     """
     Создаёт нового пользователя или обновляет существующего. Обрабатывает привязку к коллективу.
@@ -22,6 +25,8 @@ async def create_or_update_user(
     :param session: Асинхронная сессия SQLAlchemy.
     :param vk_id: VK ID пользователя.
     :param group_id: ID группы VK (если передан).
+    :param commit: Фиксировать ли транзакцию. При `False` изменения только сбрасываются в базу (flush),
+        а фиксирует их вызывающий код.
     :return: Словарь с объектами пользователя и коллектива (если применимо).
     """
     # Получаем пользователя по VK ID
@@ -52,79 +57,84 @@ async def create_or_update_user(
             start_collective_id=None,
         )
         session.add(user)
-        await session.commit()
-        await session.refresh(user)
+        if commit:
+            await session.commit()
+            await session.refresh(user)
+        else:
+            await session.flush()
 
     # Привязка к коллективу, если передан group_id
-    collective = await session.execute(select(Collective).where(Collective.id == user.collective_id))
-    collective = collective.scalar_one_or_none()
+    collective = None
+    if user.collective_id:
+        collective = await session.get(Collective, user.collective_id)
     if group_id:
         if not user.collective_id or str(group_id) != str(collective.group_id):
             # Вычитаем рейтинг из старого коллектива (если был)
             if user.collective_id:
-                old_collective = await session.get(Collective, user.collective_id)
-                if old_collective:
-                    await subtract_user_rating_from_collective(session, user)
+                await subtract_user_rating_from_collective(session, user, commit=commit)
 
             # Создаем или получаем новый коллектив
-            collective = await get_or_create_collective(session, group_id)
+            collective = await get_or_create_collective(session, group_id, commit=commit)
             user.collective_id = collective.id
             # Добавляем рейтинг к новому коллективу
-            await add_user_rating_to_collective(session, user, collective)
+            await add_user_rating_to_collective(session, user, collective, commit=commit)
 
         # Если у пользователя нет стартового коллектива, устанавливаем его
         if not user.start_collective_id:
             user.start_collective_id = user.collective_id
 
         session.add(user)
-        await session.commit()
-        await session.refresh(user)
-
-    # Получаем данные текущего коллектива, если он уже есть
-    if user.collective_id and not collective:
-        collective = await session.get(Collective, user.collective_id)
+        if commit:
+            await session.commit()
+            await session.refresh(user)
 
     return {"user": user, "collective": collective}
 
 
-async def subtract_user_rating_from_collective(session: AsyncSession, user: User):
+async def subtract_user_rating_from_collective(session: AsyncSession, user: User, commit: bool = True) -> Optional[CollectiveRating]:
     """
     Уменьшает социальный рейтинг коллектива, в котором состоит пользователь.
     
     :param session: Асинхронная сессия SQLAlchemy.
     :param user: Объект пользователя.
+    :param commit: Фиксировать ли транзакцию.
+    :return: Новый рейтинг коллектива или None, если коллектив не найден.
     """
-    if user.collective_id:
-        collective = await session.get(Collective, user.collective_id)
-        if collective:
-            collective.social_rating -= user.social_rating
-            session.add(collective)
-            await session.commit()
-            logger.info(
-                f"Уменьшен социальный рейтинг коллектива '{collective.name}' (ID: {collective.id}). "
-                f"Новое значение: {collective.social_rating}."
-            )
+    if not user.collective_id:
+        return None
+
+    collective = await increment_collective_rating(session, user.collective_id, -user.social_rating, commit=commit)
+    if collective:
+        logger.info(
+            "Уменьшен социальный рейтинг коллектива (ID: %s). "
+            "Новое значение: %s.",
+            collective.id, collective.social_rating
+        )
+    return collective
 
 
-async def add_user_rating_to_collective(session: AsyncSession, user: User, collective: Collective):
+async def add_user_rating_to_collective(session: AsyncSession, user: User, collective: Collective, commit: bool = True) -> Optional[CollectiveRating]:
     """
     Увеличивает социальный рейтинг указанного коллектива на величину рейтинга пользователя.
 
     :param session: Асинхронная сессия SQLAlchemy.
     :param user: Объект пользователя (ORM).
     :param collective: Объект коллектива (ORM).
+    :param commit: Фиксировать ли транзакцию.
+    :return: Новый рейтинг коллектива или None, если коллектив не найден.
     """
     if not isinstance(collective, Collective):
         raise TypeError("Передан объект, не являющийся ORM-классом Collective")
 
-    collective.social_rating += user.social_rating
-    session.add(collective)
-    await session.commit()
-
-    logger.info(
-        f"Увеличен социальный рейтинг коллектива '{collective.name}' (ID: {collective.id}). "
-        f"Новое значение: {collective.social_rating}."
-    )
+    # Загруженный в сессию объект коллектива синхронизируется с результатом UPDATE
+    result = await increment_collective_rating(session, collective.id, user.social_rating, commit=commit)
+    if result:
+        logger.info(
+            "Увеличен социальный рейтинг коллектива '%s' (ID: %s). "
+            "Новое значение: %s.",
+            collective.name, collective.id, result.social_rating
+        )
+    return result
 
     
 async def get_user_data(session: AsyncSession, user_id: int) -> dict:
@@ -183,19 +193,17 @@ async def calculate_afk_rice(user: User, last_entry: datetime, current_time: dat
     afk_rice = int(effective_seconds * rice_per_second)
     
     # Логируем данные для анализа
-    logger.info(
-        f"\n----- АФК РИС РАСЧЁТ -----\n"
-        f"Пользователь ID: {user.id}, VK ID: {user.vk_id}\n"
-        f"Прошло времени с последнего входа: {elapsed_seconds:.2f} сек "
-        f"({elapsed_seconds / 60:.2f} мин / {elapsed_seconds / 3600:.2f} час).\n"
-        f"Максимальное время фарма: {max_afk_seconds:.2f} сек "
-        f"({max_afk_seconds / 60:.2f} мин / {max_afk_seconds / 3600:.2f} час).\n"
-        f"Учтено времени для расчёта: {effective_seconds:.2f} сек "
-        f"({effective_seconds / 60:.2f} мин / {effective_seconds / 3600:.2f} час).\n"
-        f"Автосбор в рис/час: {user.autocollect_rice_bonus}, "
-        f"что составляет {rice_per_second:.5f} рис/сек.\n"
-        f"Заработано афк-рисов: {afk_rice}.\n"
-        f"----- КОНЕЦ РАСЧЁТА -----"
+    log_event(
+        logger, "afk.collected",
+        "Афк-рис пользователя %(vk_id)s: прошло %(elapsed_seconds).2f сек, учтено %(effective_seconds).2f сек "
+        "из %(max_seconds).2f, автосбор %(rice_per_hour)s рис/час, заработано %(delta)s.",
+        user_id=user.id,
+        vk_id=user.vk_id,
+        elapsed_seconds=elapsed_seconds,
+        max_seconds=max_afk_seconds,
+        effective_seconds=effective_seconds,
+        rice_per_hour=user.autocollect_rice_bonus,
+        delta=afk_rice,
     )
 
     return max(0, afk_rice)
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Generic, Hashable, NamedTuple, Optional, Sequence, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+
+class CatalogSnapshot(NamedTuple):
+    """
+    Загруженное состояние справочника.
+    """
+    version: int
+    items: tuple
+    by_id: dict
+    groups: dict  # Элементы, сгруппированные по `group_by`
+    payload: Optional[bytes]  # Заранее сериализованный JSON для отдачи списком
+    loaded_at: float
+
+
+class Catalog(Generic[T]):
+    """
+    Версионированный кэш редко меняющегося справочника в памяти процесса.
+
+    Справочник загружается целиком через `loader`, после изменения данных сбрасывается
+    вызовом `invalidate()` и перечитывается при следующем обращении. `ttl` ограничивает
+    время жизни снимка: изменения, сделанные другим процессом, станут видны не позже чем через `ttl` секунд.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[AsyncSession], Awaitable[Sequence[T]]],
+        key: Callable[[T], Hashable] = lambda item: item.id,
+        group_by: Optional[Callable[[T], Hashable]] = None,
+        serializer: Optional[Callable[[Sequence[T]], bytes]] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._loader = loader
+        self._key = key
+        self._group_by = group_by
+        self._serializer = serializer
+        self._ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        if snapshot is None or snapshot.version != self.version:
+            return False
+        return self._ttl is None or time.monotonic() - snapshot.loaded_at < self._ttl
+
+    async def load(self, session: AsyncSession) -> CatalogSnapshot:
+        """
+        Загружает справочник из базы, не дожидаясь устаревания текущего снимка.
+        """
+        async with self._lock:
+            return await self._load(session)
+
+    async def _load(self, session: AsyncSession) -> CatalogSnapshot:
+        version = self.version
+        items = tuple(await self._loader(session))
+        groups: dict = {}
+        if self._group_by:
+            for item in items:
+                groups.setdefault(self._group_by(item), []).append(item)
+        snapshot = CatalogSnapshot(
+            version=version,
+            items=items,
+            by_id={self._key(item): item for item in items},
+            groups={group: tuple(group_items) for group, group_items in groups.items()},
+            payload=self._serializer(items) if self._serializer else None,
+            loaded_at=time.monotonic(),
+        )
+        # Если справочник сбросили во время загрузки, снимок уже устарел и не сохраняется
+        if version == self.version:
+            self._snapshot = snapshot
+        return snapshot
+
+    async def snapshot(self, session: AsyncSession) -> CatalogSnapshot:
+        """
+        Возвращает актуальный снимок справочника, загружая его при необходимости.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        # Одновременные промахи ждут одну загрузку
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+            return await self._load(session)
+
+    async def get(self, session: AsyncSession, item_id: Hashable) -> Optional[T]:
+        return (await self.snapshot(session)).by_id.get(item_id)
+
+    async def all(self, session: AsyncSession) -> list[T]:
+        return list((await self.snapshot(session)).items)
+
+    async def group(self, session: AsyncSession, group: Hashable) -> list[T]:
+        return list((await self.snapshot(session)).groups.get(group, ()))
+
+    def invalidate(self) -> None:
+        """
+        Сбрасывает справочник после изменения данных.
+        """
+        self.version += 1
+        self._snapshot = None
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "version": self.version,
+            "size": len(snapshot.items) if snapshot else 0,
+        }
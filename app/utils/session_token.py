@@ -0,0 +1,100 @@
+import json
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import sha256
+from hmac import HMAC, compare_digest
+from typing import NamedTuple, Optional
+from app.core.config import settings
+
+SESSION_TOKEN_PREFIX = "st1."
+
+
+class SessionClaims(NamedTuple):
+    """
+    Данные, зашитые в сессионный токен.
+    """
+    user_id: int
+    vk_id: str
+    collective_id: Optional[int]
+    role: str
+    expires_at: int
+
+
+def _signing_key() -> bytes:
+    # Ключ выводится из секрета приложения, чтобы подпись токена нельзя было спутать с подписью VK
+    secret = settings.session_secret_key or settings.application_secret_key
+    return HMAC(secret.encode(), b"session-token", sha256).digest()
+
+
+_SIGNING_KEY = _signing_key()
+
+
+def _b64encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(HMAC(_SIGNING_KEY, (SESSION_TOKEN_PREFIX + payload).encode(), sha256).digest())
+
+
+def is_session_token(token: str) -> bool:
+    return token.startswith(SESSION_TOKEN_PREFIX)
+
+
+def issue_session_token(user_id: int, vk_id: str, collective_id: Optional[int], role: str, ttl: Optional[int] = None) -> str:
+    """
+    Выпускает подписанный сессионный токен.
+
+    :param user_id: Внутренний ID пользователя.
+    :param vk_id: VK ID пользователя.
+    :param collective_id: ID коллектива пользователя (если есть).
+    :param role: Роль пользователя.
+    :param ttl: Время жизни токена в секундах.
+    :return: Строка токена вида `st1.<payload>.<signature>`.
+    """
+    expires_at = int(time.time()) + (settings.session_token_ttl_seconds if ttl is None else ttl)
+    payload = _b64encode(json.dumps(
+        {"uid": user_id, "vk": vk_id, "cid": collective_id, "role": role, "exp": expires_at},
+        separators=(",", ":"),
+    ).encode())
+    return f"{SESSION_TOKEN_PREFIX}{payload}.{_sign(payload)}"
+
+
+def decode_session_token(token: str) -> Optional[SessionClaims]:
+    """
+    Проверяет подпись и срок действия сессионного токена без обращения к базе.
+
+    :param token: Строка токена.
+    :return: Данные токена или None, если токен недействителен.
+    """
+    if not is_session_token(token):
+        return None
+
+    try:
+        payload, signature = token[len(SESSION_TOKEN_PREFIX):].split(".")
+    except ValueError:
+        return None
+
+    # Байты, а не строки: compare_digest бросает TypeError на не-ASCII строках
+    if not compare_digest(_sign(payload).encode(), signature.encode()):
+        return None
+
+    try:
+        data = json.loads(_b64decode(payload))
+        claims = SessionClaims(
+            user_id=int(data["uid"]),
+            vk_id=str(data["vk"]),
+            collective_id=data.get("cid"),
+            role=data.get("role", "user"),
+            expires_at=int(data["exp"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    if claims.expires_at < time.time():
+        return None
+    return claims
@@ -1,10 +1,85 @@
+import asyncio
+from typing import Optional
 import httpx
 from app.core.config import settings
+from app.core.metrics import registry
+from app.utils.cache import TTLCache
+
+# Клиент живёт всё время работы приложения: открывается и закрывается в lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+group_info_cache = TTLCache(settings.vk_group_cache_size, settings.vk_group_cache_ttl_seconds)
+registry.register_cache("vk_group_info", group_info_cache)
+
+# Запросы к VK, которые уже выполняются: параллельные вызовы для одной группы ждут один и тот же запрос
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.vk_api_url,
+        timeout=settings.vk_api_timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=settings.vk_api_max_connections,
+            max_keepalive_connections=settings.vk_api_max_connections,
+        ),
+    )
+
+
+async def open_vk_client() -> None:
+    """
+    Открывает общий HTTP-клиент VK API с пулом соединений.
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_vk_client() -> None:
+    """
+    Закрывает общий HTTP-клиент VK API.
+    """
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _fetch_group_info(group_id: int) -> dict:
+    params = {
+        "group_id": group_id,
+        "access_token": settings.application_secret_key,
+        "v": settings.vk_api_version,
+    }
+    if _client is not None:
+        response = await _client.get("/groups.getById", params=params)
+    else:
+        # Вне приложения (скрипты загрузки данных) общий клиент не открыт
+        async with _create_client() as client:
+            response = await client.get("/groups.getById", params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    if "response" not in data or not data["response"]:
+        raise ValueError("Invalid response from VK API")
+
+    return data["response"][0]  # Возвращаем данные первой (и единственной) группы в ответе
+
+
+def _forget_inflight(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Ошибку получают ожидающие вызовы, здесь лишь помечаем её как обработанную
+
 
 async def get_group_info(group_id: int) -> dict:
     """
     Получение информации о группе через VK API.
 
+    Ответы кэшируются на `vk_group_cache_ttl_seconds`, а одновременные запросы
+    для одной группы объединяются в один вызов VK API.
+
     :param group_id: ID группы VK.
     :return: Словарь с данными группы. 
              Формат ответа включает следующие поля:
@@ -33,18 +108,18 @@ async def get_group_info(group_id: int) -> dict:
 
     Возможны дополнительные поля в зависимости от настроек сообщества или разрешений API.
     """
-    url = f"https://api.vk.com/method/groups.getById"
-    params = {
-        "group_id": group_id,
-        "access_token": settings.application_secret_key,
-        "v": "5.131"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+    key = str(group_id)
+    group_info = group_info_cache.get(key)
+    if group_info is not None:
+        return group_info
 
-    if "response" not in data or not data["response"]:
-        raise ValueError("Invalid response from VK API")
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_group_info(group_id))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
 
-    return data["response"][0]  # Возвращаем данные первой (и единственной) группы в ответе
+    # shield: отмена одного из ожидающих не должна прерывать запрос для остальных
+    group_info = await asyncio.shield(task)
+    group_info_cache.set(key, group_info)
+    return group_info
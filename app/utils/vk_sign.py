@@ -0,0 +1,46 @@
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from hmac import HMAC, compare_digest
+from typing import Mapping
+from urllib.parse import urlencode
+
+
+def sign_launch_params(params: Mapping[str, str], secret_key: str) -> str:
+    """
+    Вычисляет подпись параметров запуска VK Mini Apps.
+
+    Подписываются только параметры с префиксом `vk_`, отсортированные по имени:
+    HMAC-SHA256 от строки запроса в base64 с URL-safe алфавитом и без завершающего `=`.
+
+    :param params: Параметры запуска (лишние параметры, в том числе `sign`, игнорируются).
+    :param secret_key: Защищённый ключ приложения.
+    :return: Подпись в формате параметра `sign`.
+    """
+    ordered = {key: params[key] for key in sorted(params) if key.startswith("vk_")}
+    digest = HMAC(secret_key.encode(), urlencode(ordered, doseq=True).encode(), sha256).digest()
+    return urlsafe_b64encode(digest).decode("utf-8").rstrip("=")
+
+
+def is_valid_launch_sign(params: Mapping[str, str], secret_key: str) -> bool:
+    """
+    Сверяет параметр `sign` с подписью остальных параметров запуска.
+    """
+    sign = params.get("sign")
+    if not sign:
+        return False
+    # Байты, а не строки: compare_digest бросает TypeError на не-ASCII строках
+    return compare_digest(sign.encode(), sign_launch_params(params, secret_key).encode())
+
+
+def build_launch_params(params: Mapping[str, str], secret_key: str) -> str:
+    """
+    Собирает подписанную строку параметров запуска в том виде, в каком её присылает клиент.
+    Используется в нагрузочных тестах и скриптах.
+
+    :param params: Параметры запуска, например `vk_user_id`, `vk_app_id`, `vk_group_id`.
+    :param secret_key: Защищённый ключ приложения.
+    :return: Строка вида `?vk_app_id=...&vk_user_id=...&sign=...`.
+    """
+    query = {key: str(value) for key, value in params.items() if key != "sign"}
+    query["sign"] = sign_launch_params(query, secret_key)
+    return "?" + urlencode(query)
@@ -0,0 +1,99 @@
+"""
+Массовый импорт справочников бонусов и достижений из JSON-массива.
+
+Весь файл загружается одной транзакцией через `INSERT ... ON CONFLICT (name)`: новые элементы
+добавляются, изменённые обновляются, совпадающие не трогаются. В конце печатается сводка.
+
+По умолчанию файл отправляется в запущенное приложение (`POST /bonuses/bulk`,
+`POST /achievements/crud/bulk`), и оно сразу перезагружает справочники в памяти.
+Эти ручки доступны только администратору: нужен его сессионный токен из `POST /auth`
+(`--token` или переменная окружения SOCIAL_RATING_ADMIN_TOKEN).
+С `--direct` импорт выполняется напрямую в базу из DATABASE_URL; работающие процессы
+приложения увидят изменения не позже чем через `catalog_ttl_seconds`.
+
+    python -m load_data.import_catalog bonuses load_data/bonuses.json
+    python -m load_data.import_catalog achievements load_data/achievements.json --url https://rating.radmate.ru
+    python -m load_data.import_catalog achievements load_data/achievements.json --direct
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import httpx
+
+ENDPOINTS = {
+    "bonuses": "/bonuses/bulk",
+    "achievements": "/achievements/crud/bulk",
+}
+
+
+def import_over_http(kind: str, items: list[dict], base_url: str, token: str, timeout: float) -> dict:
+    response = httpx.post(
+        base_url.rstrip("/") + ENDPOINTS[kind],
+        json=items,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        sys.exit(f"Ошибка импорта: {response.status_code} {response.text}")
+    return response.json()
+
+
+async def import_direct(kind: str, items: list[dict]) -> dict:
+    # Приложение импортируется только в этом режиме: для HTTP настройки базы не нужны
+    from app.core.database import SessionLocal
+    from app.crud.achievement import import_achievements
+    from app.crud.bonus import import_purchasable_bonuses
+    from app.models import achievement, bonus, collective, user  # noqa: F401 — регистрация моделей
+    from app.schemas.achievement import AchievementCreate
+    from app.schemas.bonus import BonusCreate
+
+    async with SessionLocal() as session:
+        if kind == "bonuses":
+            result = await import_purchasable_bonuses(session, [BonusCreate(**item) for item in items])
+        else:
+            result = await import_achievements(session, [AchievementCreate(**item) for item in items])
+    return result.model_dump()
+
+
+def print_summary(kind: str, summary: dict) -> None:
+    labels = {"created": "Добавлено", "updated": "Обновлено", "unchanged": "Без изменений"}
+    for key, label in labels.items():
+        names = summary.get(key, [])
+        print(f"{label}: {len(names)}")
+        for name in names if key != "unchanged" else ():
+            print(f"  - {name}")
+    print(f"Версия справочника {kind}: {summary.get('catalog_version')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Массовый импорт бонусов и достижений")
+    parser.add_argument("kind", choices=sorted(ENDPOINTS), help="Тип справочника")
+    parser.add_argument("path", help="JSON-файл с массивом элементов")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Адрес приложения")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("SOCIAL_RATING_ADMIN_TOKEN"),
+        help="Сессионный токен администратора (по умолчанию SOCIAL_RATING_ADMIN_TOKEN)",
+    )
+    parser.add_argument("--direct", action="store_true", help="Писать напрямую в базу, минуя HTTP")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as file:
+        items = json.load(file)
+    if not isinstance(items, list):
+        sys.exit("Ожидается JSON-массив")
+
+    if args.direct:
+        summary = asyncio.run(import_direct(args.kind, items))
+    elif not args.token:
+        sys.exit("Для импорта через HTTP нужен токен администратора: --token или SOCIAL_RATING_ADMIN_TOKEN")
+    else:
+        summary = import_over_http(args.kind, items, args.url, args.token, args.timeout)
+    print_summary(args.kind, summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,23 @@
 import requests
 import json
+import os
 
 # Загрузка файла с данными
 with open("./load_data/achievements.json", "r", encoding="utf-8") as file:
     achievements = json.load(file)
 
-url = "http://127.0.0.1:8000/achievements/crud/"  # Замените на ваш реальный URL
-# url = "https://rating.radmate.ru/achievements/crud/"  # Замените на ваш реальный URL
+url = "http://127.0.0.1:8000/achievements/crud/bulk"  # Замените на ваш реальный URL
+# url = "https://rating.radmate.ru/achievements/crud/bulk"  # Замените на ваш реальный URL
 
-
-for achievement in achievements:
-    response = requests.post(url, json=achievement)
-    if response.status_code == 200:
-        print(f"Достижение '{achievement['name']}' успешно добавлено.")
-    else:
-        print(f"Ошибка при добавлении достижения '{achievement['name']}': {response.status_code} {response.text}")
+# Весь список загружается одним запросом и одной транзакцией; существующие достижения обновляются по названию
+# Ручка доступна только администратору: нужен его сессионный токен из POST /auth
+token = os.environ["SOCIAL_RATING_ADMIN_TOKEN"]
+response = requests.post(url, json=achievements, headers={"Authorization": f"Bearer {token}"})
+if response.status_code == 200:
+    result = response.json()
+    print(
+        f"Достижения загружены: добавлено {len(result['created'])}, обновлено {len(result['updated'])}, "
+        f"без изменений {len(result['unchanged'])}."
+    )
+else:
+    print(f"Ошибка при загрузке достижений: {response.status_code} {response.text}")
@@ -1,17 +1,23 @@
 import requests
 import json
+import os
 
 # Загрузка файла с данными
 with open("load_data/bonuses.json", "r", encoding="utf-8") as file:
     bonuses = json.load(file)
 
-url = "http://127.0.0.1:8000/bonuses/"  # Замените на ваш реальный URL
-# url = "https://rating.radmate.ru/bonuses/"  # Замените на ваш реальный URL
+url = "http://127.0.0.1:8000/bonuses/bulk"  # Замените на ваш реальный URL
+# url = "https://rating.radmate.ru/bonuses/bulk"  # Замените на ваш реальный URL
 
-
-for bonus in bonuses:
-    response = requests.post(url, json=bonus)
-    if response.status_code == 200:
-        print(f"Бонус '{bonus['name']}' успешно добавлен.")
-    else:
-        print(f"Ошибка при добавлении бонуса '{bonus['name']}': {response.status_code} {response.text}")
+# Весь список загружается одним запросом и одной транзакцией; существующие бонусы обновляются по названию
+# Ручка доступна только администратору: нужен его сессионный токен из POST /auth
+token = os.environ["SOCIAL_RATING_ADMIN_TOKEN"]
+response = requests.post(url, json=bonuses, headers={"Authorization": f"Bearer {token}"})
+if response.status_code == 200:
+    result = response.json()
+    print(
+        f"Бонусы загружены: добавлено {len(result['created'])}, обновлено {len(result['updated'])}, "
+        f"без изменений {len(result['unchanged'])}."
+    )
+else:
+    print(f"Ошибка при загрузке бонусов: {response.status_code} {response.text}")
@@ -0,0 +1,383 @@
+"""
+Генератор синтетических данных для проверки производительности на реальном масштабе.
+
+Заполняет `collectives`, `users`, `user_bonuses` и `user_achievements` правдоподобными данными:
+рейтинг распределён с тяжёлым хвостом, стержень и его бонусы вычисляются по тем же таблицам,
+что и в приложении (`app.services.progression`), уровни и стоимость бонусов — по формуле
+`calculate_bonus_cost`, а рейтинг и уровень совхоза — как сумма рейтингов участников.
+
+Строки генерируются параллельно в отдельных процессах и загружаются через COPY (asyncpg),
+минуя ORM. Каждый блок пользователей генерируется от своего зерна, зависящего только от `--seed` и номера блока,
+поэтому при одинаковых `--seed` и `--reference-time` данные совпадают при любом числе воркеров.
+
+Таблицы и справочники (бонусы, достижения из load_data/*.json) должны существовать заранее.
+
+Пример:
+
+    python -m load_data.seed_synthetic --users 2000000 --collectives 200000 --workers 8 --seed 42
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+import asyncpg
+from app.core.config import settings
+from app.models.achievement import AchievementType
+from app.models.collective import CollectiveType
+from app.models.user import UserRoles
+from app.services.progression import (
+    COLLECTIVE_BONUSES,
+    COLLECTIVE_THRESHOLDS,
+    COLLECTIVE_TYPES,
+    core_bonuses,
+    core_for_rating,
+    next_eligible_at,
+)
+
+USER_COLUMNS = (
+    "id", "vk_id", "username", "is_invited", "role", "rice", "social_rating", "clicks", "invited_users",
+    "achievements_count", "last_entry", "current_core", "autocollect_rice_bonus", "autocollect_duration_bonus",
+    "rice_bonus", "invited_users_bonus", "collective_id", "start_collective_id", "current_collective_type",
+    "collective_rice_boost", "collective_autocollect_bonus",
+)
+COLLECTIVE_COLUMNS = ("id", "name", "social_rating", "type", "group_id")
+USER_BONUS_COLUMNS = ("user_id", "bonus_id", "level", "total_cost")
+USER_ACHIEVEMENT_COLUMNS = ("user_id", "achievement_id", "is_completed", "progress", "last_updated", "next_eligible_at")
+
+# Синтетические VK ID и группы берутся из диапазона, не пересекающегося с настоящими
+VK_ID_OFFSET = 3_000_000_000
+GROUP_ID_OFFSET = 900_000_000
+
+# Предел уровня для бонусов без max_level: стоимость растёт экспоненциально, дальше игроки не доходят
+UNLIMITED_BONUS_LEVEL_CAP = 30
+# Столбцы стоимости и users.clicks — INTEGER
+INT32_MAX = 2**31 - 1
+
+
+class BonusInfo(NamedTuple):
+    id: int
+    base_cost: int
+    cost_modifier: float
+    max_level: Optional[int]
+    autocollect_rice_bonus: int
+    autocollect_duration_bonus: int
+    rice_bonus: int
+    invited_users_bonus: int
+
+
+class ChunkSpec(NamedTuple):
+    index: int
+    first_user_id: int
+    count: int
+    seed: int
+    reference_time: datetime
+    first_collective_id: int
+    collectives: int
+    membership_rate: float
+    bonuses: tuple[BonusInfo, ...]
+    achievements: tuple[tuple[int, AchievementType], ...]
+
+
+class ChunkRows(NamedTuple):
+    users: list[tuple]
+    user_bonuses: list[tuple]
+    user_achievements: list[tuple]
+
+
+def bonus_total_cost(bonus: BonusInfo, level: int) -> int:
+    """
+    Суммарная стоимость бонуса, купленного до уровня `level`, по формуле `calculate_bonus_cost`.
+    """
+    total = bonus.base_cost
+    for current_level in range(1, level):
+        total = int(total + bonus.base_cost * bonus.cost_modifier ** current_level)
+    return total
+
+
+def _engagement(social_rating: int) -> float:
+    # Вовлечённость 0..1 растёт с порядком рейтинга: от неё зависят покупки и достижения
+    return min(math.log10(social_rating + 1) / 7, 1.0)
+
+
+def generate_chunk(spec: ChunkSpec) -> ChunkRows:
+    """
+    Генерирует пользователей блока вместе с их бонусами и достижениями.
+    Выполняется в процессе-воркере, поэтому не обращается к базе.
+    """
+    rng = random.Random(spec.seed * 1_000_003 + spec.index)
+    users, user_bonuses, user_achievements = [], [], []
+
+    for user_id in range(spec.first_user_id, spec.first_user_id + spec.count):
+        # Рейтинг: медиана около сотни, хвост до миллионов
+        social_rating = int(rng.lognormvariate(4.6, 2.3))
+        engagement = _engagement(social_rating)
+        core = core_for_rating(social_rating)
+        core_bonus = core_bonuses(core)
+
+        # Рис конвертируется в рейтинг по курсу 100:1, клики примерно равны заработанному рису.
+        # Хвост рейтинга выходит за INTEGER, а одно переполнение откатывает COPY всей пачки
+        rice = int(rng.lognormvariate(6.5, 1.8))
+        clicks = min(int((social_rating * 100 + rice) * rng.uniform(0.6, 1.1)), INT32_MAX)
+
+        autocollect_rice = autocollect_duration = bought_rice_bonus = invited_bonus = 0
+        purchase_chance = 0.1 + 0.8 * engagement
+        for bonus in spec.bonuses:
+            if rng.random() >= purchase_chance:
+                continue
+            level = min(1 + int(rng.expovariate(1 / (1 + 9 * engagement))), bonus.max_level or UNLIMITED_BONUS_LEVEL_CAP)
+            user_bonuses.append((user_id, bonus.id, level, min(bonus_total_cost(bonus, level), INT32_MAX)))
+            autocollect_rice += bonus.autocollect_rice_bonus * level
+            autocollect_duration += bonus.autocollect_duration_bonus * level
+            bought_rice_bonus += bonus.rice_bonus * level
+            invited_bonus += bonus.invited_users_bonus * level
+
+        achievements_count = 0
+        achievement_chance = 0.15 + 0.75 * engagement
+        for achievement_id, achievement_type in spec.achievements:
+            if rng.random() >= achievement_chance:
+                continue
+            achievements_count += 1
+            last_updated = spec.reference_time - timedelta(seconds=rng.uniform(0, 90 * 86400))
+            user_achievements.append((
+                user_id,
+                achievement_id,
+                True,
+                1 + int(rng.expovariate(0.3)),
+                last_updated,
+                next_eligible_at(achievement_type, last_updated),
+            ))
+
+        # Состав совхозов неравномерный: у первых совхозов намного больше участников
+        collective_id = None
+        if spec.collectives and rng.random() < spec.membership_rate:
+            collective_id = spec.first_collective_id + int(spec.collectives * rng.random() ** 3)
+
+        invited_users = int(rng.expovariate(1.0) * 3 * engagement)
+        last_entry = spec.reference_time - timedelta(seconds=rng.expovariate(1 / (2 * 86400)))
+
+        users.append((
+            user_id,
+            str(VK_ID_OFFSET + user_id),
+            f"user_{user_id}",
+            invited_users > 0 or rng.random() < 0.2,
+            UserRoles.user.name,
+            rice,
+            social_rating,
+            clicks,
+            invited_users,
+            achievements_count,
+            last_entry,
+            core.name,
+            autocollect_rice,
+            autocollect_duration,
+            int(core_bonus.rice_boost * 100) + bought_rice_bonus,
+            int(core_bonus.badge_boost) + invited_bonus,
+            collective_id,
+            collective_id,
+            None,  # Уровень совхоза и его бонусы проставляются после подсчёта рейтинга совхозов
+            0,
+            0,
+        ))
+
+    return ChunkRows(users, user_bonuses, user_achievements)
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def _next_id(conn: asyncpg.Connection, table: str) -> int:
+    return await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+
+
+async def _load_catalogs(conn: asyncpg.Connection) -> tuple[tuple[BonusInfo, ...], tuple[tuple[int, AchievementType], ...]]:
+    bonuses = tuple(
+        BonusInfo(**dict(row))
+        for row in await conn.fetch(
+            "SELECT id, base_cost, cost_modifier, max_level, autocollect_rice_bonus, autocollect_duration_bonus, "
+            "rice_bonus, invited_users_bonus FROM purchasable_bonuses ORDER BY id"
+        )
+    )
+    achievements = tuple(
+        (row["id"], AchievementType[row["type"]])
+        for row in await conn.fetch("SELECT id, type::text FROM achievements WHERE is_active ORDER BY id")
+    )
+    return bonuses, achievements
+
+
+async def seed_collectives(conn: asyncpg.Connection, first_id: int, count: int, chunk_size: int) -> None:
+    for start in range(0, count, chunk_size):
+        records = [
+            (collective_id, f"Совхоз №{collective_id}", 0, CollectiveType.INITIAL.name, str(GROUP_ID_OFFSET + collective_id))
+            for collective_id in range(first_id + start, first_id + min(start + chunk_size, count))
+        ]
+        await conn.copy_records_to_table("collectives", records=records, columns=COLLECTIVE_COLUMNS)
+
+
+def _collective_case(column: str, values: list) -> str:
+    branches = " ".join(f"WHEN '{t.name}' THEN {value}" for t, value in zip(COLLECTIVE_TYPES, values))
+    return f"CASE {column}::text {branches} ELSE 0 END"
+
+
+async def finalize_collectives(conn: asyncpg.Connection, first_id: int, last_id: int, first_user_id: int) -> None:
+    """
+    Пересчитывает рейтинг и уровень созданных совхозов и переносит бонусы уровня на участников.
+    Бонусы уровней накапливаются так же, как в `apply_collective_bonuses`.
+    """
+    type_case = "CASE " + " ".join(
+        f"WHEN c.social_rating >= {threshold} THEN '{t.name}'"
+        for t, threshold in reversed(list(zip(COLLECTIVE_TYPES, COLLECTIVE_THRESHOLDS)))
+    ) + f" ELSE '{COLLECTIVE_TYPES[0].name}' END"
+
+    await conn.execute(
+        "UPDATE collectives c SET social_rating = s.total "
+        "FROM (SELECT collective_id, SUM(social_rating) AS total FROM users "
+        "      WHERE collective_id BETWEEN $1 AND $2 GROUP BY collective_id) s "
+        "WHERE c.id = s.collective_id",
+        first_id, last_id,
+    )
+    await conn.execute(
+        f"UPDATE collectives c SET type = ({type_case})::collectivetype WHERE c.id BETWEEN $1 AND $2",
+        first_id, last_id,
+    )
+
+    rice_boost, autocollect = [], []
+    for bonuses in COLLECTIVE_BONUSES:
+        rice_boost.append((rice_boost[-1] if rice_boost else 0) + bonuses.rice_boost)
+        autocollect.append((autocollect[-1] if autocollect else 0) + bonuses.autocollect_bonus)
+
+    await conn.execute(
+        "UPDATE users u SET current_collective_type = c.type, "
+        f"collective_rice_boost = {_collective_case('c.type', rice_boost)}, "
+        f"collective_autocollect_bonus = {_collective_case('c.type', autocollect)} "
+        "FROM collectives c WHERE u.collective_id = c.id AND u.id >= $1",
+        first_user_id,
+    )
+
+
+async def _reset_sequences(conn: asyncpg.Connection) -> None:
+    for table in ("collectives", "users", "user_bonuses", "user_achievements"):
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        )
+
+
+async def seed(args: argparse.Namespace) -> None:
+    dsn = _asyncpg_dsn(settings.database_url)
+    conn = await asyncpg.connect(dsn)
+    try:
+        if args.truncate:
+            print("Очистка таблиц пользователей и совхозов...")
+            await conn.execute("TRUNCATE user_achievements, user_bonuses, users, collectives RESTART IDENTITY CASCADE")
+
+        bonuses, achievements = await _load_catalogs(conn)
+        if not bonuses or not achievements:
+            sys.exit("Справочники бонусов и достижений пусты: сначала загрузите load_data/*.json")
+
+        first_collective_id = await _next_id(conn, "collectives")
+        first_user_id = await _next_id(conn, "users")
+
+        started_at = time.perf_counter()
+        await seed_collectives(conn, first_collective_id, args.collectives, args.chunk_size)
+        print(f"Совхозы: {args.collectives} за {time.perf_counter() - started_at:.1f} с")
+    finally:
+        await conn.close()
+
+    reference_time = args.reference_time or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    specs = [
+        ChunkSpec(
+            index=index,
+            first_user_id=first_user_id + start,
+            count=min(args.chunk_size, args.users - start),
+            seed=args.seed,
+            reference_time=reference_time,
+            first_collective_id=first_collective_id,
+            collectives=args.collectives,
+            membership_rate=args.membership_rate,
+            bonuses=bonuses,
+            achievements=achievements,
+        )
+        for index, start in enumerate(range(0, args.users, args.chunk_size))
+    ]
+
+    totals = {"users": 0, "user_bonuses": 0, "user_achievements": 0}
+    queue: asyncio.Queue = asyncio.Queue()
+    for spec in specs:
+        queue.put_nowait(spec)
+
+    loop = asyncio.get_running_loop()
+    started_at = time.perf_counter()
+
+    async def worker(pool: ProcessPoolExecutor) -> None:
+        # Пока процесс генерирует следующий блок, соединение воркера загружает предыдущий
+        connection = await asyncpg.connect(dsn)
+        try:
+            while not queue.empty():
+                spec = queue.get_nowait()
+                rows = await loop.run_in_executor(pool, generate_chunk, spec)
+                async with connection.transaction():
+                    await connection.copy_records_to_table("users", records=rows.users, columns=USER_COLUMNS)
+                    await connection.copy_records_to_table(
+                        "user_bonuses", records=rows.user_bonuses, columns=USER_BONUS_COLUMNS
+                    )
+                    await connection.copy_records_to_table(
+                        "user_achievements", records=rows.user_achievements, columns=USER_ACHIEVEMENT_COLUMNS
+                    )
+                totals["users"] += len(rows.users)
+                totals["user_bonuses"] += len(rows.user_bonuses)
+                totals["user_achievements"] += len(rows.user_achievements)
+                elapsed = time.perf_counter() - started_at
+                print(
+                    f"Блок {spec.index + 1}/{len(specs)}: пользователей {totals['users']}, "
+                    f"бонусов {totals['user_bonuses']}, достижений {totals['user_achievements']} "
+                    f"({totals['users'] / elapsed:,.0f} польз./с)"
+                )
+        finally:
+            await connection.close()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        await asyncio.gather(*(worker(pool) for _ in range(args.workers)))
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        print("Пересчёт рейтинга и уровней совхозов...")
+        await finalize_collectives(conn, first_collective_id, first_collective_id + args.collectives - 1, first_user_id)
+        await _reset_sequences(conn)
+        print("ANALYZE...")
+        await conn.execute("ANALYZE collectives, users, user_bonuses, user_achievements")
+    finally:
+        await conn.close()
+
+    print(f"Готово за {time.perf_counter() - started_at:.1f} с: {totals}")
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заполнение базы синтетическими пользователями и совхозами")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--collectives", type=int, default=100_000)
+    parser.add_argument("--membership-rate", type=float, default=0.85, help="Доля пользователей, состоящих в совхозе")
+    parser.add_argument("--workers", type=int, default=4, help="Процессов генерации и соединений для COPY")
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="Пользователей в одном блоке COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reference-time", type=_parse_time, default=None,
+        help="Момент, от которого отсчитываются даты (по умолчанию — начало текущих суток UTC)",
+    )
+    parser.add_argument("--truncate", action="store_true", help="Очистить пользователей, совхозы и их связи перед загрузкой")
+    args = parser.parse_args()
+
+    asyncio.run(seed(args))
+
+
+if __name__ == "__main__":
+    main()
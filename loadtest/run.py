@@ -0,0 +1,314 @@
+"""
+Нагрузочный генератор для SocialRating.
+
+Создаёт виртуальных пользователей с корректно подписанными параметрами запуска VK
+(тем же алгоритмом, что и проверка в приложении), аутентифицирует их через `/auth`
+и выполняет смесь сценариев с заданной параллельностью. В конце печатает пропускную
+способность, перцентили задержек и долю ошибок по каждому сценарию.
+
+Пример (приложение с локальным Postgres и заглушкой VK из `loadtest.vk_stub`):
+
+    APPLICATION_SECRET_KEY=... python -m loadtest.run --base-url http://127.0.0.1:8000 \\
+        --users 200 --concurrency 50 --duration 60 \\
+        --mix click=60,convert=10,purchase=5,achievement=5,auth=5,me=15 --json result.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+import httpx
+from app.utils.vk_sign import build_launch_params
+
+DEFAULT_MIX = "click=60,convert=10,purchase=5,achievement=5,auth=5,me=15"
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class VirtualUser:
+    vk_id: int
+    launch_params: str
+    session_token: Optional[str] = None
+
+
+@dataclass
+class ScenarioStats:
+    """
+    Результаты одного сценария. Ответы 4xx (нехватка риса, повторное достижение) — ожидаемые
+    отказы бизнес-логики и учитываются отдельно от ошибок (5xx и сетевые сбои).
+    """
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    rejected: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        total = len(self.latencies)
+        ordered = sorted(self.latencies)
+        return {
+            "requests": total,
+            "rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "rejected": self.rejected,
+            "latency_ms": {
+                **{f"p{p}": round(_percentile(ordered, p) * 1000, 2) for p in PERCENTILES},
+                "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+                "mean": round(sum(ordered) / total * 1000, 2) if total else 0.0,
+            },
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items(), key=lambda i: str(i[0]))},
+        }
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    # Метод ближайшего ранга по отсортированной выборке
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class LoadRunner:
+    """
+    Замкнутая модель нагрузки: `concurrency` воркеров непрерывно выбирают случайного пользователя
+    и сценарий по весам смеси, пока не истечёт время теста.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, users: list[VirtualUser], mix: dict[str, float]):
+        self.client = client
+        self.users = users
+        self.stats: dict[str, ScenarioStats] = {}
+        self.bonus_ids: list[int] = []
+        self.achievement_ids: list[int] = []
+
+        self._scenarios: dict[str, Callable[[VirtualUser], Awaitable[httpx.Response]]] = {
+            "auth": self.auth,
+            "click": self.click,
+            "batch": self.click_batch,
+            "convert": self.convert,
+            "purchase": self.purchase,
+            "achievement": self.assign_achievement,
+            "me": self.me,
+        }
+        unknown = set(mix) - set(self._scenarios)
+        if unknown:
+            raise ValueError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+
+    def _headers(self, user: VirtualUser) -> dict:
+        return {"Authorization": f"Bearer {user.session_token or user.launch_params}"}
+
+    # Сценарии
+
+    async def auth(self, user: VirtualUser) -> httpx.Response:
+        response = await self.client.get("/auth", headers={"Authorization": f"Bearer {user.launch_params}"})
+        if response.status_code == 200:
+            user.session_token = response.json().get("session_token")
+        return response
+
+    async def click(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.post(
+            "/clicker/", params={"earned_rice": random.randint(1, 100)}, headers=self._headers(user)
+        )
+
+    async def click_batch(self, user: VirtualUser) -> httpx.Response:
+        now = time.time()
+        batches = [
+            {"timestamp": _isoformat(now - offset), "count": random.randint(1, 10)}
+            for offset in range(5, 0, -1)
+        ]
+        return await self.client.post("/clicker/batch", json={"batches": batches}, headers=self._headers(user))
+
+    async def convert(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.post(
+            "/clicker/convert_rice_to_rating", params={"rice_to_convert": 100}, headers=self._headers(user)
+        )
+
+    async def purchase(self, user: VirtualUser) -> httpx.Response:
+        bonus_id = random.choice(self.bonus_ids) if self.bonus_ids else 1
+        return await self.client.post(f"/bonuses/{bonus_id}/purchase", headers=self._headers(user))
+
+    async def assign_achievement(self, user: VirtualUser) -> httpx.Response:
+        achievement_id = random.choice(self.achievement_ids) if self.achievement_ids else 1
+        return await self.client.post(f"/achievements/assign/{achievement_id}", headers=self._headers(user))
+
+    async def me(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.get("/user/me", headers=self._headers(user))
+
+    # Выполнение
+
+    async def _timed(self, name: str, user: VirtualUser) -> None:
+        stats = self.stats.setdefault(name, ScenarioStats())
+        started_at = time.perf_counter()
+        try:
+            response = await self._scenarios[name](user)
+        except httpx.HTTPError as e:
+            stats.latencies.append(time.perf_counter() - started_at)
+            stats.statuses[type(e).__name__] += 1
+            stats.errors += 1
+            return
+        stats.latencies.append(time.perf_counter() - started_at)
+        stats.statuses[response.status_code] += 1
+        if response.status_code >= 500:
+            stats.errors += 1
+        elif response.status_code >= 400:
+            stats.rejected += 1
+
+    async def prepare(self, concurrency: int) -> None:
+        """
+        Загружает справочники и аутентифицирует всех пользователей до начала замера.
+        """
+        bonuses = await self.client.get("/bonuses/all/bonuses")
+        if bonuses.status_code == 200:
+            self.bonus_ids = [bonus["id"] for bonus in bonuses.json().get("bonuses", [])]
+        achievements = await self.client.get("/achievements/")
+        if achievements.status_code == 200:
+            self.achievement_ids = [achievement["id"] for achievement in achievements.json()]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(user: VirtualUser) -> None:
+            async with semaphore:
+                await self._timed("auth", user)
+
+        await asyncio.gather(*(login(user) for user in self.users))
+        # Первичная аутентификация — разогрев, в итоговые цифры она не входит
+        self.stats.pop("auth", None)
+
+    async def run(self, concurrency: int, duration: float, think_time: float = 0.0) -> float:
+        deadline = time.perf_counter() + duration
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                name = random.choices(self.names, self.weights)[0]
+                await self._timed(name, random.choice(self.users))
+                if think_time:
+                    await asyncio.sleep(random.uniform(0, think_time * 2))
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started_at
+
+    def report(self, elapsed: float) -> dict:
+        total = ScenarioStats()
+        for stats in self.stats.values():
+            total.latencies.extend(stats.latencies)
+            total.statuses.update(stats.statuses)
+            total.errors += stats.errors
+            total.rejected += stats.rejected
+        return {
+            "duration_seconds": round(elapsed, 2),
+            "users": len(self.users),
+            "total": total.summary(elapsed),
+            "scenarios": {name: stats.summary(elapsed) for name, stats in sorted(self.stats.items())},
+        }
+
+
+def _isoformat(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(timestamp))
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """
+    Разбирает смесь сценариев вида `click=60,convert=10`.
+    """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if not name.strip():
+            continue
+        mix[name.strip()] = float(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError("Смесь сценариев пуста")
+    return mix
+
+
+def make_users(count: int, secret_key: str, app_id: int, first_vk_id: int, groups: int) -> list[VirtualUser]:
+    """
+    Создаёт пользователей с подписанными параметрами запуска; `groups` групп VK распределяются по кругу.
+    """
+    users = []
+    for index in range(count):
+        vk_id = first_vk_id + index
+        params = {
+            "vk_app_id": app_id,
+            "vk_user_id": vk_id,
+            "vk_platform": "mobile_web",
+            "vk_ts": int(time.time()),
+        }
+        if groups:
+            params["vk_group_id"] = 1_000_000 + index % groups
+        users.append(VirtualUser(vk_id=vk_id, launch_params=build_launch_params(params, secret_key)))
+    return users
+
+
+def print_report(report: dict, out=sys.stdout) -> None:
+    header = f"{'сценарий':<12} {'запросов':>9} {'rps':>9} {'ошибки':>8} {'отказы':>8}" + "".join(
+        f" {f'p{p}, мс':>10}" for p in PERCENTILES
+    ) + f" {'max, мс':>10}"
+    print(f"Длительность: {report['duration_seconds']} с, пользователей: {report['users']}", file=out)
+    print(header, file=out)
+    rows = [*report["scenarios"].items(), ("ИТОГО", report["total"])]
+    for name, summary in rows:
+        latency = summary["latency_ms"]
+        print(
+            f"{name:<12} {summary['requests']:>9} {summary['rps']:>9} "
+            f"{summary['error_rate']:>8.2%} {summary['rejected']:>8}"
+            + "".join(f" {latency[f'p{p}']:>10}" for p in PERCENTILES)
+            + f" {latency['max']:>10}",
+            file=out,
+        )
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    users = make_users(args.users, args.secret_key, args.app_id, args.first_vk_id, args.groups)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        runner = LoadRunner(client, users, parse_mix(args.mix))
+        await runner.prepare(args.concurrency)
+        elapsed = await runner.run(args.concurrency, args.duration, args.think_time)
+    return runner.report(elapsed)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест SocialRating")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--secret-key",
+        default=os.environ.get("APPLICATION_SECRET_KEY"),
+        help="Ключ подписи параметров запуска (по умолчанию APPLICATION_SECRET_KEY)",
+    )
+    parser.add_argument("--users", type=int, default=100, help="Количество виртуальных пользователей")
+    parser.add_argument("--concurrency", type=int, default=20, help="Количество одновременных запросов")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность замера, секунды")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Средняя пауза между запросами воркера, секунды")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Веса сценариев (по умолчанию {DEFAULT_MIX})")
+    parser.add_argument("--groups", type=int, default=10, help="Количество групп VK, 0 — пользователи без групп")
+    parser.add_argument("--app-id", type=int, default=1)
+    parser.add_argument("--first-vk-id", type=int, default=900_000_000, help="VK ID первого виртуального пользователя")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчёт в JSON-файл")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    if not args.secret_key:
+        sys.exit("Не задан ключ подписи: --secret-key или APPLICATION_SECRET_KEY")
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
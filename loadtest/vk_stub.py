@@ -0,0 +1,68 @@
+"""
+Заглушка VK API для нагрузочного тестирования.
+
+Отвечает на `groups.getById` правдоподобными данными группы без обращения к настоящему VK.
+Приложение направляется на заглушку переменной окружения:
+
+    VK_API_URL=http://127.0.0.1:8081/method uvicorn app.main:app
+
+Запуск заглушки:
+
+    python -m loadtest.vk_stub --port 8081 --latency-ms 30
+"""
+import argparse
+import asyncio
+from fastapi import FastAPI, Query
+import uvicorn
+
+app = FastAPI(title="VK API stub")
+
+# Задержка ответа, имитирующая сетевой вызов к VK; задаётся из командной строки
+latency_seconds = 0.0
+requests_served = 0
+
+
+@app.get("/method/groups.getById")
+async def groups_get_by_id(group_id: int = Query(...), v: str = Query("5.131")):
+    global requests_served
+    requests_served += 1
+    if latency_seconds:
+        await asyncio.sleep(latency_seconds)
+    return {
+        "response": [
+            {
+                "id": group_id,
+                "name": f"Нагрузочная группа {group_id}",
+                "screen_name": f"club{group_id}",
+                "is_closed": 0,
+                "type": "group",
+                "photo_50": "https://vk.com/images/community_50.png",
+                "photo_100": "https://vk.com/images/community_100.png",
+                "photo_200": "https://vk.com/images/community_200.png",
+            }
+        ]
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Количество обработанных вызовов: позволяет проверить, что кэш групп в приложении работает.
+    """
+    return {"requests_served": requests_served}
+
+
+def main() -> None:
+    global latency_seconds
+    parser = argparse.ArgumentParser(description="Заглушка VK API для нагрузочных тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Искусственная задержка ответа")
+    args = parser.parse_args()
+
+    latency_seconds = args.latency_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
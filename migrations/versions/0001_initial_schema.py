@@ -0,0 +1,119 @@
+"""Исходная схема, ранее создававшаяся Base.metadata.create_all при старте
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-12-20 12:00:00
+
+Базы, созданные старым create_all, уже содержат эти таблицы: в этом случае миграция
+ничего не делает и только фиксирует версию, после чего применяются следующие миграции.
+"""
+from typing import Sequence, Union
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Перечисления хранятся по именам членов Enum, как их создаёт SQLAlchemy. Типы создаются явно:
+# collectivetype используется в двух таблицах и не должен создаваться повторно
+achievement_type = postgresql.ENUM("UNIQUE", "DAYLY", "WEEKLY", name="achievementtype", create_type=False)
+collective_type = postgresql.ENUM("INITIAL", "MEDIUM", "GOLD", "DIAMOND", "JADE", name="collectivetype", create_type=False)
+core_type = postgresql.ENUM("COPPER", "IRON", "GOLD", "DIAMOND", "JADE", name="coretype", create_type=False)
+user_roles = postgresql.ENUM("admin", "user", name="userroles", create_type=False)
+ENUMS = (achievement_type, collective_type, core_type, user_roles)
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("users"):
+        return
+
+    for enum in ENUMS:
+        enum.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "achievements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("condition", sa.Text(), nullable=False),
+        sa.Column("visual", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("type", achievement_type, nullable=False),
+        sa.Column("social_rating_bonus", sa.Integer(), nullable=False),
+        sa.Column("rice_production_bonus", sa.Float(), nullable=False),
+        sa.Column("autocollect_duration_bonus", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "collectives",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("social_rating", sa.BigInteger(), nullable=False),
+        sa.Column("type", collective_type, nullable=False),
+        sa.Column("group_id", sa.String(), nullable=False, unique=True),
+    )
+    op.create_table(
+        "purchasable_bonuses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("base_cost", sa.Integer(), nullable=False),
+        sa.Column("cost_modifier", sa.Float(), nullable=False),
+        sa.Column("max_level", sa.Integer(), nullable=True),
+        sa.Column("effect", sa.String(), nullable=False),
+        sa.Column("image", sa.String(), nullable=True),
+        sa.Column("autocollect_rice_bonus", sa.Integer(), nullable=False),
+        sa.Column("autocollect_duration_bonus", sa.Integer(), nullable=False),
+        sa.Column("rice_bonus", sa.Integer(), nullable=False),
+        sa.Column("invited_users_bonus", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("vk_id", sa.String(), nullable=False, unique=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("is_invited", sa.Boolean(), nullable=False),
+        sa.Column("role", user_roles, nullable=False),
+        sa.Column("current_collective_type", collective_type, nullable=True),
+        sa.Column("rice", sa.BigInteger(), nullable=False),
+        sa.Column("social_rating", sa.BigInteger(), nullable=False),
+        sa.Column("clicks", sa.Integer(), nullable=False),
+        sa.Column("invited_users", sa.Integer(), nullable=False),
+        sa.Column("achievements_count", sa.Integer(), nullable=False),
+        sa.Column("last_entry", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("current_core", core_type, nullable=False),
+        sa.Column("autocollect_rice_bonus", sa.Integer(), nullable=False),
+        sa.Column("autocollect_duration_bonus", sa.Integer(), nullable=False),
+        sa.Column("rice_bonus", sa.Integer(), nullable=False),
+        sa.Column("invited_users_bonus", sa.Integer(), nullable=False),
+        sa.Column("collective_id", sa.Integer(), sa.ForeignKey("collectives.id"), nullable=True),
+        sa.Column("start_collective_id", sa.Integer(), sa.ForeignKey("collectives.id"), nullable=True),
+        sa.Column("collective_rice_boost", sa.Integer(), nullable=False),
+        sa.Column("collective_autocollect_bonus", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "user_achievements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("achievement_id", sa.Integer(), sa.ForeignKey("achievements.id"), nullable=False),
+        sa.Column("is_completed", sa.Boolean(), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("last_updated", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_table(
+        "user_bonuses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bonus_id", sa.Integer(), sa.ForeignKey("purchasable_bonuses.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("level", sa.Integer(), nullable=False),
+        sa.Column("total_cost", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in ("user_bonuses", "user_achievements", "users", "purchasable_bonuses", "collectives", "achievements"):
+        op.drop_table(table)
+    for enum in ENUMS:
+        enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,90 @@
+"""Индексы для поиска прогресса, бонусов и участников совхоза; уникальные названия справочников
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-12-20 12:30:00
+
+- user_achievements(user_id, achievement_id) и user_bonuses(user_id, bonus_id) — уникальные
+  составные индексы для get_user_achievement и get_user_bonus. Дубликаты пар, появившиеся
+  из-за гонок без ограничения, удаляются заранее: остаётся запись с наибольшим прогрессом,
+  при равенстве — обновлённая последней (по ней считается окно повторного получения);
+  для бонусов — с наибольшим уровнем, затем стоимостью.
+- users(collective_id) — для get_collective_members и пересчёта рейтинга совхоза.
+- achievements(name), purchasable_bonuses(name) — уникальность, на которую опирается
+  массовый импорт справочников через ON CONFLICT (name).
+
+Индексы строятся CONCURRENTLY вне транзакции, чтобы не блокировать запись в больших таблицах.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Имя индекса -> (уникальный, таблица, столбцы); имена совпадают с объявленными в моделях
+INDEXES = {
+    "ix_user_achievements_user_id_achievement_id": (True, "user_achievements", ("user_id", "achievement_id")),
+    "ix_user_bonuses_user_id_bonus_id": (True, "user_bonuses", ("user_id", "bonus_id")),
+    "ix_users_collective_id": (False, "users", ("collective_id",)),
+}
+
+# Ограничения с именами, которые PostgreSQL выдаёт для unique=True при create_all
+NAME_CONSTRAINTS = {
+    "achievements_name_key": "achievements",
+    "purchasable_bonuses_name_key": "purchasable_bonuses",
+}
+
+
+def _constraint_exists(name: str) -> bool:
+    return bool(op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}
+    ).scalar())
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DELETE FROM user_achievements ua
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, achievement_id ORDER BY progress DESC, last_updated DESC, id
+            ) AS position
+            FROM user_achievements
+        ) ranked
+        WHERE ua.id = ranked.id AND ranked.position > 1
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM user_bonuses ub
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, bonus_id ORDER BY level DESC, total_cost DESC, id
+            ) AS position
+            FROM user_bonuses
+        ) ranked
+        WHERE ub.id = ranked.id AND ranked.position > 1
+        """
+    )
+
+    # Базы, созданные create_all после появления unique=True в моделях, уже содержат ограничения
+    for name, table in NAME_CONSTRAINTS.items():
+        if not _constraint_exists(name):
+            op.create_unique_constraint(name, table, ["name"])
+
+    with op.get_context().autocommit_block():
+        for name, (unique, table, columns) in INDEXES.items():
+            # Прерванная сборка CONCURRENTLY оставляет невалидный индекс: пересоздаём его
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.create_index(name, table, list(columns), unique=unique, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    for name, table in NAME_CONSTRAINTS.items():
+        op.drop_constraint(name, table, type_="unique")
@@ -0,0 +1,53 @@
+"""Время следующего получения достижения: user_achievements.next_eligible_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-12-21 10:00:00
+
+- user_achievements.next_eligible_at — когда достижение можно получить снова; NULL для
+  уникальных. Добавление nullable-столбца без значения по умолчанию не переписывает таблицу.
+- Значения для ежедневных и еженедельных достижений вычисляются из last_updated по тем же
+  правилам, что и next_eligible_at() в app.services.progression.
+- user_achievements(user_id, next_eligible_at) — для GET /achievements/claimable,
+  строится CONCURRENTLY.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_user_achievements_user_id_next_eligible_at"
+
+
+def upgrade() -> None:
+    op.add_column("user_achievements", sa.Column("next_eligible_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Ежедневные — с начала следующих суток по UTC, еженедельные — через 7 дней после получения
+    op.execute(
+        """
+        UPDATE user_achievements ua
+        SET next_eligible_at = CASE a.type
+            WHEN 'DAYLY' THEN (date_trunc('day', ua.last_updated AT TIME ZONE 'UTC') + interval '1 day') AT TIME ZONE 'UTC'
+            WHEN 'WEEKLY' THEN ua.last_updated + interval '7 days'
+        END
+        FROM achievements a
+        WHERE a.id = ua.achievement_id AND a.type IN ('DAYLY', 'WEEKLY')
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        # Прерванная сборка CONCURRENTLY оставляет невалидный индекс: пересоздаём его
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+        op.create_index(
+            INDEX_NAME, "user_achievements", ["user_id", "next_eligible_at"], postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+    op.drop_column("user_achievements", "next_eligible_at")
@@ -0,0 +1,27 @@
+"""Условия автоматического начисления достижений: achievements.rule
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-12-22 10:00:00
+
+- achievements.rule (JSONB) — выражение над счётчиками пользователя, по которому достижение
+  начисляется сервером при кликах, конвертации и входе (app.services.achievement_rules).
+  NULL — достижение начисляется только через /achievements/assign.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("achievements", sa.Column("rule", postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("achievements", "rule")